@@ -562,6 +562,10 @@ class WaldurMarketplaceScript(BaseModel):
     K8S_JOB_TIMEOUT = Field(
         30 * 60, description="Timeout for execution of one Kubernetes job in seconds"
     )
+    K8S_JOB_POLL_INTERVAL = Field(
+        10,
+        description="Interval in seconds between checks of Kubernetes job state when order is processed asynchronously",
+    )
 
 
 class WaldurMarketplaceRemoteSlurm(BaseModel):
@@ -811,6 +815,19 @@ class WaldurConfiguration(BaseModel):
     IPSTACK_ACCESS_KEY: str | None = Field(
         description="Unique authentication key used to gain access to the ipstack API."
     )
+    GEOIP_BACKEND = Field(
+        "ipstack",
+        description="Backend used for detection of location by IP address. "
+        "Supported values are ipstack and maxmind.",
+    )
+    GEOIP_DATABASE_PATH = Field(
+        "",
+        description="Path to local GeoIP database in MaxMind DB format used by maxmind backend.",
+    )
+    GEOIP_CACHE_TIMEOUT = Field(
+        timedelta(days=7),
+        description="Period of time during which location detected by IP address is cached.",
+    )
     IMPORT_EXPORT_USE_TRANSACTIONS = Field(
         True,
         description="Controls if resource importing should use database transactions. "
@@ -1,15 +1,200 @@
+import base64
+import binascii
+import json
 from collections import OrderedDict
 
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.utils.urls import remove_query_param, replace_query_param
 
+# Planner estimates are unreliable for small tables, so exact count is used below this value.
+EXACT_COUNT_THRESHOLD = 1000
+
+
+def get_estimated_count(queryset):
+    """
+    Return number of rows estimated by PostgreSQL planner for queryset
+    without executing it. Exact count is used for other database backends.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.get_compiler(queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = plan[0]["Plan"]["Plan Rows"]
+
+    if estimate < EXACT_COUNT_THRESHOLD:
+        return queryset.count()
+    return estimate
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    """
+    Paginator which relies on planner estimate instead of COUNT query.
+    One extra row is fetched for every page, so that next page is detected
+    even if estimate is lower than actual number of rows.
+    """
+
+    def validate_number(self, number):
+        # Upper bound is not validated, because estimate may be lower than actual count.
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_("That page number is not an integer"))
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if len(object_list) > self.per_page:
+            count = max(self.count, bottom + len(object_list))
+        else:
+            count = bottom + len(object_list)
+            if not object_list and number > 1:
+                raise EmptyPage(_("That page contains no results"))
+        # Page links are computed from count, so it is adjusted to actual page content.
+        self.__dict__["count"] = count
+        self.__dict__.pop("num_pages", None)
+        return self._get_page(object_list[: self.per_page], number, self)
+
+    @cached_property
+    def count(self):
+        return get_estimated_count(self.object_list)
+
+
+class KeysetPagination:
+    """
+    Paginate queryset by primary key using opaque cursor.
+    It does not issue COUNT query and its cost does not depend on page number.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, page_size):
+        self.request = request
+        position, reverse = self.decode_cursor(request)
+
+        if reverse:
+            queryset = queryset.order_by("-pk")
+            if position is not None:
+                queryset = queryset.filter(pk__lt=position)
+        else:
+            queryset = queryset.order_by("pk")
+            if position is not None:
+                queryset = queryset.filter(pk__gt=position)
+
+        results = list(queryset[: page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_previous = has_more
+            self.has_next = position is not None
+        else:
+            self.has_previous = position is not None
+            self.has_next = has_more
+
+        self.results = results
+        return results
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            return cursor["p"], bool(cursor["r"])
+        except (
+            binascii.Error,
+            KeyError,
+            TypeError,
+            UnicodeError,
+            ValueError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        cursor = json.dumps({"p": position, "r": int(reverse)})
+        encoded = base64.urlsafe_b64encode(cursor.encode("ascii")).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_next_link(self):
+        if not self.has_next or not self.results:
+            return None
+        return self.encode_cursor(self.results[-1].pk, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.results:
+            return None
+        return self.encode_cursor(self.results[0].pk, reverse=True)
+
 
 class LinkHeaderPagination(pagination.PageNumberPagination):
+    """
+    Page number pagination with links in Link header and total count in X-Result-Count header.
+
+    Following modes are selected per request:
+    - ?pagination=cursor orders results by primary key, returns opaque cursors
+      in Link header and skips COUNT query and X-Result-Count header.
+    - ?count=estimate uses PostgreSQL planner estimate for X-Result-Count header
+      instead of COUNT query.
+    """
+
     page_size_query_param = "page_size"
     max_page_size = 300
+    pagination_query_param = "pagination"
+    count_query_param = "count"
+
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        mode = request.query_params.get(self.pagination_query_param)
+        if mode == "cursor" and isinstance(queryset, QuerySet):
+            page_size = self.get_page_size(request)
+            if not page_size:
+                return None
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, page_size)
+
+        if request.query_params.get(self.count_query_param) == "estimate":
+            self.django_paginator_class = EstimatedCountPaginator
+
+        return super().paginate_queryset(queryset, request, view)
 
     def get_paginated_response(self, data):
+        if self.keyset:
+            link_candidates = OrderedDict(
+                (
+                    ("first", self.keyset.get_first_link),
+                    ("prev", self.keyset.get_previous_link),
+                    ("next", self.keyset.get_next_link),
+                )
+            )
+            return Response(data, headers={"Link": self.format_links(link_candidates)})
+
         link_candidates = OrderedDict(
             (
                 ("first", self.get_first_link),
@@ -19,19 +204,20 @@ class LinkHeaderPagination(pagination.PageNumberPagination):
             )
         )
 
-        link = ", ".join(
-            f'<{get_link()}>; rel="{rel}"'
-            for rel, get_link in link_candidates.items()
-            if get_link()
-        )
-
         headers = {
             "X-Result-Count": self.page.paginator.count,
-            "Link": link,
+            "Link": self.format_links(link_candidates),
         }
 
         return Response(data, headers=headers)
 
+    def format_links(self, link_candidates):
+        return ", ".join(
+            f'<{get_link()}>; rel="{rel}"'
+            for rel, get_link in link_candidates.items()
+            if get_link()
+        )
+
     def get_first_link(self):
         url = self.request.build_absolute_uri()
         return remove_query_param(url, self.page_query_param)
@@ -0,0 +1,95 @@
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status, test
+
+from waldur_core.structure.tests import factories as structure_factories
+
+
+def get_links(response):
+    return dict(
+        (rel, url)
+        for url, rel in re.findall(r'<([^>]+)>; rel="(\w+)"', response["Link"])
+    )
+
+
+class CursorPaginationTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.customers = [
+            structure_factories.CustomerFactory(name=f"Customer {i}") for i in range(5)
+        ]
+        self.client.force_authenticate(structure_factories.UserFactory(is_staff=True))
+        self.url = structure_factories.CustomerFactory.get_list_url()
+
+    def test_all_pages_are_iterated_without_count_query(self):
+        url = self.url + "?pagination=cursor&page_size=2"
+        names = []
+        with CaptureQueriesContext(connection) as context:
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotIn("X-Result-Count", response)
+                names.extend(customer["name"] for customer in response.data)
+                url = get_links(response).get("next")
+
+        self.assertEqual(names, [customer.name for customer in self.customers])
+        # Serializer counts related objects, but customers themselves are not counted.
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if '"__count"' in query["sql"]
+                and 'FROM "structure_customer"' in query["sql"]
+            ]
+        )
+
+    def test_previous_link_returns_previous_page(self):
+        response = self.client.get(self.url + "?pagination=cursor&page_size=2")
+        self.assertNotIn("prev", get_links(response))
+        first_page = [customer["name"] for customer in response.data]
+
+        response = self.client.get(get_links(response)["next"])
+        response = self.client.get(get_links(response)["prev"])
+        self.assertEqual([customer["name"] for customer in response.data], first_page)
+
+    def test_filters_are_applied(self):
+        response = self.client.get(
+            self.url, {"pagination": "cursor", "name": "Customer 3"}
+        )
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["name"], "Customer 3")
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(
+            self.url, {"pagination": "cursor", "cursor": "invalid"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class EstimatedCountPaginationTest(test.APITransactionTestCase):
+    def setUp(self):
+        for i in range(5):
+            structure_factories.CustomerFactory(name=f"Customer {i}")
+        self.client.force_authenticate(structure_factories.UserFactory(is_staff=True))
+        self.url = structure_factories.CustomerFactory.get_list_url()
+
+    def test_count_of_small_table_is_exact(self):
+        response = self.client.get(self.url, {"count": "estimate", "page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Result-Count"], "5")
+        self.assertIn("next", get_links(response))
+
+    def test_last_page_is_served(self):
+        response = self.client.get(
+            self.url, {"count": "estimate", "page_size": 2, "page": 3}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertNotIn("next", get_links(response))
+
+    def test_page_beyond_last_one_is_not_found(self):
+        response = self.client.get(
+            self.url, {"count": "estimate", "page_size": 2, "page": 4}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -19,7 +19,7 @@ from constance import config
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.management.base import BaseCommand
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models import F, Subquery
@@ -210,7 +210,7 @@ def find_template_from_registry(app, event_type, template_suffix):
             return f"{app}/{event_type}_{template_suffix}"
 
 
-def send_mail(
+def create_mail(
     subject,
     body,
     to,
@@ -221,8 +221,13 @@ def send_mail(
     content_type="text/plain",
     bcc=None,
     reply_to=None,
-    fail_silently=False,
+    footer=None,
+    connection=None,
 ):
+    """
+    Build email message with common footer attached.
+    If footer is not specified, pair of text and HTML footer is fetched from configuration.
+    """
     from_email = from_email or settings.DEFAULT_FROM_EMAIL
     reply_to = reply_to or settings.DEFAULT_REPLY_TO_EMAIL
     email = EmailMultiAlternatives(
@@ -232,10 +237,13 @@ def send_mail(
         from_email=from_email,
         bcc=bcc,
         reply_to=[reply_to],
+        connection=connection,
     )
 
-    footer_text = config.COMMON_FOOTER_TEXT
-    footer_html = config.COMMON_FOOTER_HTML
+    footer_text, footer_html = footer or (
+        config.COMMON_FOOTER_TEXT,
+        config.COMMON_FOOTER_HTML,
+    )
     if footer_text != "" or footer_html != "":
         email.body += f"\n\n{footer_text}"
 
@@ -247,6 +255,34 @@ def send_mail(
 
     if filename:
         email.attach(filename, attachment, content_type)
+    return email
+
+
+def send_mail(
+    subject,
+    body,
+    to,
+    from_email=None,
+    html_message=None,
+    filename=None,
+    attachment=None,
+    content_type="text/plain",
+    bcc=None,
+    reply_to=None,
+    fail_silently=False,
+):
+    email = create_mail(
+        subject,
+        body,
+        to,
+        from_email=from_email,
+        html_message=html_message,
+        filename=filename,
+        attachment=attachment,
+        content_type=content_type,
+        bcc=bcc,
+        reply_to=reply_to,
+    )
     return email.send(fail_silently=fail_silently)
 
 
@@ -318,6 +354,57 @@ def broadcast_mail(
             )
 
 
+def broadcast_personal_mail(app, event_type, contexts):
+    """
+    Format email message from template file for each recipient using its own context
+    and send all messages over single connection. Templates are the same as for broadcast_mail.
+
+    :param app: prefix for template filename.
+    :param event_type: postfix for template filename.
+    :param contexts: dictionary mapping email address to context passed to the template for rendering,
+    or list of (email address, context) pairs if the same recipient may receive several messages.
+    """
+    from .models import Notification
+
+    if not contexts:
+        return
+
+    if not Notification.objects.filter(
+        key=f"{app}.{event_type}", enabled=True
+    ).exists():
+        return
+
+    subject_template = get_template(
+        find_template_from_registry(app, event_type, "subject.txt")
+    ).template
+    text_template = get_template(
+        find_template_from_registry(app, event_type, "message.txt")
+    ).template
+    html_template = get_template(
+        find_template_from_registry(app, event_type, "message.html")
+    )
+    footer = (config.COMMON_FOOTER_TEXT, config.COMMON_FOOTER_HTML)
+
+    if isinstance(contexts, dict):
+        contexts = contexts.items()
+
+    messages = []
+    for recipient, context in contexts:
+        logger.info(f"About to send {event_type} notification to {recipient}")
+        messages.append(
+            create_mail(
+                subject_template.render(Context(context, autoescape=False)).strip(),
+                text_template.render(Context(context, autoescape=False)).strip(),
+                to=[recipient],
+                html_message=html_template.render(context),
+                footer=footer,
+            )
+        )
+
+    with get_connection() as connection:
+        connection.send_messages(messages)
+
+
 def get_ordering(request):
     """
     Extract ordering from HTTP request.
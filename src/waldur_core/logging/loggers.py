@@ -10,6 +10,7 @@ from collections import defaultdict
 
 from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 
 from waldur_core.logging import models
 from waldur_core.logging.log import EventLoggerAdapter
@@ -240,6 +241,43 @@ class EventLogger(BaseLogger):
                 if scope and scope.id:
                     models.Feed.objects.create(scope=scope, event=event)
 
+    def process_many(self, level, events, event_type="undefined"):
+        """
+        Log events of the same type using bulk inserts.
+        Hooks for all events are processed by single background task.
+
+        :param events: list of pairs of message template and event context.
+        """
+        from waldur_core.logging import tasks
+
+        self.validate_logging_type(event_type)
+        log = getattr(self.logger, level)
+
+        event_objects = []
+        event_scopes = []
+        for message_template, event_context in events:
+            context = self.compile_context(**event_context)
+            msg = self.compile_message(message_template, context)
+            log(msg, extra={"event_type": event_type, "event_context": context})
+            event_objects.append(
+                models.Event(event_type=event_type, message=msg, context=context)
+            )
+            event_scopes.append(self.get_scopes(event_context) or [])
+
+        event_objects = models.Event.objects.bulk_create(event_objects)
+        models.Feed.objects.bulk_create(
+            [
+                models.Feed(scope=scope, event=event)
+                for event, scopes in zip(event_objects, event_scopes)
+                for scope in scopes
+                if scope and scope.id
+            ]
+        )
+        # Bulk insert does not emit post_save signal, so hooks are processed explicitly.
+        event_ids = [event.id for event in event_objects]
+        if event_ids:
+            transaction.on_commit(lambda: tasks.process_events.delay(event_ids))
+
 
 class LoggableMixin:
     """Mixin to serialize model in logs.
@@ -19,6 +19,12 @@ def process_event(event_id):
     process_system_notification(event)
 
 
+@shared_task(name="waldur_core.logging.process_events")
+def process_events(event_ids):
+    for event_id in event_ids:
+        process_event(event_id)
+
+
 def process_system_notification(event):
     project_ct = ContentType.objects.get_for_model(structure_models.Project)
     project_feed = Feed.objects.filter(event=event, content_type=project_ct).first()
@@ -0,0 +1,130 @@
+import io
+import logging
+
+from django.db.models import Count, Q
+from PIL import Image
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Derivative image fits into the box of given width and height.
+PRESETS = {
+    "thumbnail": (160, 160),
+    "small": (320, 320),
+    "medium": (800, 800),
+}
+DERIVATIVE_FORMAT = "WEBP"
+DERIVATIVE_MIME_TYPE = "image/webp"
+DERIVATIVE_QUALITY = 80
+
+# SVG is not rasterized, because it is compact and scales without loss anyway.
+SOURCE_MIME_TYPES = (
+    "image/bmp",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+)
+
+
+def render_derivatives(content, presets):
+    """
+    Resize image to every preset and encode it as WebP.
+    Larger presets are rendered first, so that every next preset
+    is resized from the previous one instead of the original image.
+
+    :return: dictionary mapping preset to tuple of content, width and height.
+    """
+    image = Image.open(io.BytesIO(content))
+    image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    results = {}
+    for preset in sorted(presets, key=lambda preset: PRESETS[preset], reverse=True):
+        image = image.copy()
+        image.thumbnail(PRESETS[preset], Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, DERIVATIVE_FORMAT, quality=DERIVATIVE_QUALITY)
+        results[preset] = output.getvalue(), image.width, image.height
+    return results
+
+
+def get_pending_sources(presets=None):
+    """
+    Return IDs of image content which lacks derivatives for any of the presets.
+    """
+    presets = presets or list(PRESETS)
+    return (
+        models.FileContent.objects.filter(
+            id__in=models.File.objects.filter(mime_type__in=SOURCE_MIME_TYPES).values(
+                "blob_id"
+            )
+        )
+        .annotate(
+            derivatives_count=Count(
+                "derivatives", filter=Q(derivatives__preset__in=presets)
+            )
+        )
+        .filter(derivatives_count__lt=len(presets))
+        .values_list("id", flat=True)
+        .order_by("id")
+    )
+
+
+def create_derivatives(source_ids, presets=None):
+    """
+    Create missing derivatives of image content.
+    Content which is not a valid image is skipped.
+
+    :return: number of created derivatives.
+    """
+    presets = presets or list(PRESETS)
+    existing = set(
+        models.FileDerivative.objects.filter(
+            source_id__in=source_ids, preset__in=presets
+        ).values_list("source_id", "preset")
+    )
+
+    derivatives = []
+    for source in models.FileContent.objects.filter(id__in=source_ids).iterator(
+        chunk_size=10
+    ):
+        missing = [preset for preset in presets if (source.id, preset) not in existing]
+        if not missing:
+            continue
+        try:
+            results = render_derivatives(bytes(source.content), missing)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning(
+                "Unable to create derivatives of media content %s: %s", source.hash, e
+            )
+            continue
+        for preset, (content, width, height) in results.items():
+            derivatives.append(
+                models.FileDerivative(
+                    source_id=source.id,
+                    preset=preset,
+                    content=content,
+                    width=width,
+                    height=height,
+                )
+            )
+
+    # Derivatives may be created concurrently on first request.
+    models.FileDerivative.objects.bulk_create(derivatives, ignore_conflicts=True)
+    return len(derivatives)
+
+
+def get_derivative(source_id, preset):
+    """
+    Return derivative of image content for preset, creating it on first request.
+    None is returned if content is not a valid image.
+    """
+    queryset = models.FileDerivative.objects.filter(source_id=source_id, preset=preset)
+    derivative = queryset.first()
+    if derivative is None:
+        create_derivatives([source_id], [preset])
+        derivative = queryset.first()
+    return derivative
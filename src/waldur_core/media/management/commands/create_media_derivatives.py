@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from waldur_core.media import derivatives
+
+
+def create_batch(source_ids, presets):
+    try:
+        return derivatives.create_derivatives(source_ids, presets)
+    finally:
+        # Every worker thread opens its own database connection.
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = """
+    Create resized copies of uploaded images for size presets.
+    Images are processed in batches by parallel workers.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--preset",
+            action="append",
+            choices=list(derivatives.PRESETS),
+            help="Size preset, all presets are used by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20,
+            help="Number of images processed by worker at once.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Number of parallel workers."
+        )
+
+    def handle(self, *args, **options):
+        presets = options["preset"] or list(derivatives.PRESETS)
+        batch_size = options["batch_size"]
+
+        source_ids = list(derivatives.get_pending_sources(presets))
+        batches = [
+            source_ids[offset : offset + batch_size]
+            for offset in range(0, len(source_ids), batch_size)
+        ]
+        self.stdout.write(
+            f"Processing {len(source_ids)} images in {len(batches)} batches."
+        )
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            created = sum(
+                executor.map(lambda batch: create_batch(batch, presets), batches)
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} derivatives "
+                f"in {time.perf_counter() - started:.2f} seconds."
+            )
+        )
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def move_file_content(apps, schema_editor):
+    File = apps.get_model("media", "File")
+    FileContent = apps.get_model("media", "FileContent")
+
+    blob_ids = dict(FileContent.objects.values_list("hash", "id"))
+    for file_id, file_hash in File.objects.values_list("id", "hash").iterator():
+        if file_hash not in blob_ids:
+            content = File.objects.values_list("content", flat=True).get(id=file_id)
+            blob_ids[file_hash] = FileContent.objects.create(
+                hash=file_hash, content=content
+            ).id
+        File.objects.filter(id=file_id).update(blob_id=blob_ids[file_hash])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media", "0007_filecontent"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_file_content),
+    ]
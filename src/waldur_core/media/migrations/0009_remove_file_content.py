@@ -0,0 +1,24 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media", "0008_fill_filecontent"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="file",
+            name="content",
+        ),
+        migrations.AlterField(
+            model_name="file",
+            name="blob",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="files",
+                to="media.filecontent",
+            ),
+        ),
+    ]
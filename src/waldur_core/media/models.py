@@ -4,11 +4,44 @@ from model_utils.models import TimeStampedModel
 from waldur_core.core.models import UuidMixin
 
 
+class FileContent(models.Model):
+    """
+    Content of uploaded file, stored once for every distinct SHA-256 hash.
+    """
+
+    hash = models.CharField(max_length=64, unique=True)
+    content = models.BinaryField(blank=False, null=False)
+
+
 class File(TimeStampedModel, UuidMixin):
     name = models.CharField(
         max_length=255, unique=True, blank=False, null=False, db_index=True
     )
-    content = models.BinaryField(blank=False, null=False)
+    blob = models.ForeignKey(
+        FileContent, on_delete=models.PROTECT, related_name="files"
+    )
     size = models.PositiveIntegerField(blank=False, null=False)
     mime_type = models.CharField(max_length=100, blank=True)
     hash = models.CharField(max_length=64, blank=False, null=False, db_index=True)
+
+    @property
+    def content(self):
+        return self.blob.content
+
+
+class FileDerivative(models.Model):
+    """
+    Resized copy of image content generated for size preset.
+    It is shared by all files with the same content.
+    """
+
+    source = models.ForeignKey(
+        FileContent, on_delete=models.CASCADE, related_name="derivatives"
+    )
+    preset = models.CharField(max_length=30)
+    content = models.BinaryField(blank=False, null=False)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ("source", "preset")
@@ -0,0 +1,46 @@
+from django.db import models
+from rest_framework import serializers
+
+from . import derivatives, storage
+
+
+class MediaListSerializer(serializers.ListSerializer):
+    """
+    Resolve URLs of files of all serialized objects by single query
+    instead of a query per file field.
+
+    In order to use it set Meta.list_serializer_class.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        data = list(data)
+        storage.prefetch_urls(data)
+        return super().to_representation(data)
+
+
+class ImagePresetURLField(serializers.ImageField):
+    """
+    Read-only URL of resized copy of image for given size preset.
+    Files which are not stored in the database are referenced as is.
+    """
+
+    def __init__(self, preset, **kwargs):
+        assert preset in derivatives.PRESETS, f"Unknown preset {preset}."
+        self.preset = preset
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = value.url
+        if not url:
+            return None
+        if isinstance(value.storage, storage.DatabaseStorage):
+            url = f"{url}?preset={self.preset}"
+        request = self.context.get("request")
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
@@ -1,13 +1,62 @@
+import hashlib
 from io import BytesIO
 
 import magic
 from django.core import files
+from django.core.cache import cache
 from django.core.files.storage.base import Storage
+from django.db import transaction
+from django.db.models import FileField
 from rest_framework.reverse import reverse
 
 from bs4 import BeautifulSoup
 
-from . import models, utils
+from . import derivatives, models, tasks, utils
+
+# File UUID is cached by name, so that URL is not resolved by query per serialized field.
+URL_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def get_url_cache_key(name):
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+    return f"media_file_uuid_{digest}"
+
+
+def get_file_uuids(names):
+    """
+    Return mapping of file names to UUIDs of files.
+    Names missing in cache are resolved by single query.
+    """
+    keys = {get_url_cache_key(name): name for name in set(names) if name}
+    uuids = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+    missing = set(keys.values()) - set(uuids)
+    if missing:
+        found = {
+            name: uuid.hex
+            for name, uuid in models.File.objects.filter(name__in=missing).values_list(
+                "name", "uuid"
+            )
+        }
+        cache.set_many(
+            {get_url_cache_key(name): value for name, value in found.items()},
+            URL_CACHE_TIMEOUT,
+        )
+        uuids.update(found)
+    return uuids
+
+
+def prefetch_urls(instances):
+    """
+    Resolve URLs of all files stored in the database for given model instances at once.
+    """
+    names = []
+    for instance in instances:
+        for field in instance._meta.concrete_fields:
+            if isinstance(field, FileField) and isinstance(
+                field.storage, DatabaseStorage
+            ):
+                names.append(field.value_from_object(instance).name)
+    get_file_uuids(names)
 
 
 def remove_scripts(svg_string: str):
@@ -25,10 +74,15 @@ class DatabaseFile(files.File):
 
 
 class DatabaseStorage(Storage):
+    """
+    Store uploaded files in the database.
+    Identical content is stored only once, because it is addressed by SHA-256 hash.
+    """
+
     def _open(self, name, mode="rb"):
         try:
-            f = models.File.objects.get(name=name)
-            content = f.content
+            f = models.File.objects.select_related("blob").get(name=name)
+            content = f.blob.content
             size = f.size
         except models.File.DoesNotExist:
             size = 0
@@ -52,28 +106,43 @@ class DatabaseStorage(Storage):
 
         content_hash = utils.get_image_hash(content_data)
 
-        models.File.objects.create(
-            content=content_data,
-            size=len(content_data),
-            name=name,
-            mime_type=mime_type,
-            hash=content_hash,
-        )
+        with transaction.atomic():
+            blob, created = models.FileContent.objects.get_or_create(
+                hash=content_hash, defaults={"content": content_data}
+            )
+            cache.delete(get_url_cache_key(name))
+            models.File.objects.create(
+                blob=blob,
+                size=len(content_data),
+                name=name,
+                mime_type=mime_type,
+                hash=content_hash,
+            )
+        if created and mime_type in derivatives.SOURCE_MIME_TYPES:
+            transaction.on_commit(
+                lambda blob_id=blob.id: tasks.create_file_derivatives.delay([blob_id])
+            )
         return name
 
     def exists(self, name):
         return models.File.objects.filter(name=name).exists()
 
     def delete(self, name):
-        models.File.objects.filter(name=name).delete()
+        with transaction.atomic():
+            blob_ids = list(
+                models.File.objects.filter(name=name).values_list("blob_id", flat=True)
+            )
+            models.File.objects.filter(name=name).delete()
+            cache.delete(get_url_cache_key(name))
+            # Content is removed only when it is not shared with other files.
+            models.FileContent.objects.filter(
+                id__in=blob_ids, files__isnull=True
+            ).delete()
 
     def url(self, name):
-        try:
-            file = models.File.objects.get(name=name)
-        except models.File.DoesNotExist:
-            return
-        else:
-            return reverse("media", kwargs={"uuid": file.uuid.hex})
+        uuid = get_file_uuids([name]).get(name)
+        if uuid:
+            return reverse("media", kwargs={"uuid": uuid})
 
     def size(self, name):
         try:
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from . import derivatives
+
+
+@shared_task(name="waldur_core.media.create_file_derivatives")
+def create_file_derivatives(source_ids):
+    derivatives.create_derivatives(source_ids)
@@ -0,0 +1,214 @@
+import io
+import uuid
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase
+from PIL import Image
+from rest_framework import status, test
+
+from waldur_core.media import derivatives, models, serializers, storage, utils, views
+from waldur_core.media.storage import DatabaseStorage
+from waldur_core.structure.tests.factories import CustomerFactory
+
+
+class DatabaseStorageTest(TestCase):
+    def setUp(self):
+        self.storage = DatabaseStorage()
+
+    def test_identical_content_is_stored_once(self):
+        self.storage.save("first.txt", ContentFile(b"content"))
+        self.storage.save("second.txt", ContentFile(b"content"))
+
+        self.assertEqual(models.File.objects.count(), 2)
+        self.assertEqual(models.FileContent.objects.count(), 1)
+
+    def test_shared_content_is_deleted_with_last_file(self):
+        self.storage.save("first.txt", ContentFile(b"content"))
+        self.storage.save("second.txt", ContentFile(b"content"))
+
+        self.storage.delete("first.txt")
+        self.assertEqual(models.FileContent.objects.count(), 1)
+        self.assertEqual(self.storage.open("second.txt").read(), b"content")
+
+        self.storage.delete("second.txt")
+        self.assertEqual(models.FileContent.objects.count(), 0)
+
+    def test_url_contains_uuid_of_file(self):
+        self.storage.save("offering/image.txt", ContentFile(b"content"))
+        file = models.File.objects.get(name="offering/image.txt")
+
+        self.assertEqual(
+            self.storage.url("offering/image.txt"), f"/api/media/{file.uuid.hex}/"
+        )
+
+    def test_urls_are_resolved_by_single_query(self):
+        names = [f"offering/image{i}.txt" for i in range(3)]
+        for name in names:
+            self.storage.save(name, ContentFile(name.encode()))
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            storage.get_file_uuids(names)
+        with self.assertNumQueries(0):
+            urls = [self.storage.url(name) for name in names]
+        self.assertEqual(len(set(urls)), 3)
+
+    def test_url_of_replaced_file_is_not_cached(self):
+        self.storage.save("offering/image.txt", ContentFile(b"first"))
+        first_url = self.storage.url("offering/image.txt")
+        self.storage.delete("offering/image.txt")
+        self.storage.save("offering/image.txt", ContentFile(b"second"))
+
+        self.assertNotEqual(self.storage.url("offering/image.txt"), first_url)
+
+
+class MediaViewTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.content = b"0123456789" * 10
+        DatabaseStorage().save("offering/file.txt", ContentFile(self.content))
+        self.file = models.File.objects.get(name="offering/file.txt")
+        self.url = DatabaseStorage().url(self.file.name)
+
+    def get_content(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_file_is_not_served_by_name(self):
+        response = self.client.get("/api/media/file/offering/file.txt")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_file_is_served_by_uuid(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_content(response), self.content)
+        self.assertEqual(response["ETag"], f'"{self.file.hash}"')
+        self.assertIn("max-age", response["Cache-Control"])
+
+    def test_content_is_streamed_in_chunks(self):
+        with mock.patch.object(views, "CHUNK_SIZE", 30):
+            chunks = list(views.iter_content(self.file.blob_id, 0, 99))
+        self.assertEqual([len(chunk) for chunk in chunks], [30, 30, 30, 10])
+        self.assertEqual(b"".join(chunks), self.content)
+
+    def test_not_modified_response_is_returned_if_etag_matches(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.file.hash}"')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_byte_range_is_served(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(self.get_content(response), self.content[10:20])
+        self.assertEqual(response["Content-Range"], "bytes 10-19/100")
+
+    def test_suffix_byte_range_is_served(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(self.get_content(response), self.content[-5:])
+
+    def test_unsatisfiable_byte_range_is_rejected(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=200-")
+        self.assertEqual(
+            response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(response["Content-Range"], "bytes */100")
+
+    def test_range_is_ignored_if_etag_has_changed(self):
+        response = self.client.get(
+            self.url, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"outdated"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_content(response), self.content)
+
+    def test_missing_file_is_not_found(self):
+        response = self.client.get(f"/api/media/{uuid.uuid4().hex}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ParseRangeHeaderTest(TestCase):
+    def test_multiple_ranges_are_ignored(self):
+        self.assertIsNone(utils.parse_range_header("bytes=0-1,5-6", 10))
+
+    def test_end_is_limited_by_size(self):
+        self.assertEqual(utils.parse_range_header("bytes=5-100", 10), (5, 9))
+
+
+def make_image(size=(1000, 500), image_format="PNG"):
+    output = io.BytesIO()
+    Image.new("RGB", size, color="red").save(output, image_format)
+    return ContentFile(output.getvalue())
+
+
+class DerivativesTest(test.APITransactionTestCase):
+    def setUp(self):
+        DatabaseStorage().save("offering/image.png", make_image())
+        self.file = models.File.objects.get(name="offering/image.png")
+        self.url = DatabaseStorage().url(self.file.name)
+
+    def test_derivative_is_created_on_first_request(self):
+        response = self.client.get(self.url, {"preset": "thumbnail"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertEqual(response["ETag"], f'"{self.file.hash}-thumbnail"')
+
+        image = Image.open(io.BytesIO(response.content))
+        self.assertEqual(image.size, (160, 80))
+        self.assertEqual(models.FileDerivative.objects.count(), 1)
+
+        self.client.get(self.url, {"preset": "thumbnail"})
+        self.assertEqual(models.FileDerivative.objects.count(), 1)
+
+    def test_derivative_is_shared_by_files_with_same_content(self):
+        derivatives.get_derivative(self.file.blob_id, "small")
+        DatabaseStorage().save("offering/copy.png", make_image())
+
+        response = self.client.get(
+            DatabaseStorage().url("offering/copy.png"), {"preset": "small"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(models.FileDerivative.objects.count(), 1)
+
+    def test_invalid_preset_is_rejected(self):
+        response = self.client.get(self.url, {"preset": "huge"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_original_content_is_served_if_file_is_not_image(self):
+        DatabaseStorage().save("offering/file.txt", ContentFile(b"content"))
+        response = self.client.get(
+            DatabaseStorage().url("offering/file.txt"), {"preset": "thumbnail"}
+        )
+        self.assertEqual(b"".join(response.streaming_content), b"content")
+
+    def test_backfill_command_creates_missing_derivatives(self):
+        DatabaseStorage().save("offering/other.jpeg", make_image((50, 50), "JPEG"))
+        derivatives.get_derivative(self.file.blob_id, "thumbnail")
+
+        call_command(
+            "create_media_derivatives", "--batch-size", "1", stdout=io.StringIO()
+        )
+
+        self.assertEqual(
+            models.FileDerivative.objects.count(), 2 * len(derivatives.PRESETS)
+        )
+        self.assertFalse(derivatives.get_pending_sources().exists())
+
+
+class ImagePresetURLFieldTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.customer = CustomerFactory()
+        self.field = serializers.ImagePresetURLField(source="image", preset="thumbnail")
+
+    def test_url_of_derivative_is_rendered(self):
+        self.customer.image.save("image.png", make_image())
+        file = models.File.objects.get(name=self.customer.image.name)
+
+        url = self.field.to_representation(self.customer.image)
+
+        self.assertEqual(url, f"/api/media/{file.uuid.hex}/?preset=thumbnail")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/webp")
+
+    def test_empty_image_is_rendered_as_none(self):
+        self.assertIsNone(self.field.to_representation(self.customer.image))
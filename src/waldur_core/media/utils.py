@@ -27,3 +27,36 @@ def guess_image_extension(content: bytes) -> str:
 
 def get_image_hash(content: str):
     return hashlib.sha256(content).hexdigest()
+
+
+def parse_range_header(header, size):
+    """
+    Parse single byte range of HTTP Range header.
+
+    :return: tuple of first and last byte positions, None if header is not
+    supported and should be ignored.
+    :raises ValueError: if range is not satisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, sep, end = header[len("bytes=") :].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start:
+            start = int(start)
+            end = int(end) if end else size - 1
+            if end < start:
+                return None
+            end = min(end, size - 1)
+        elif end:
+            # Suffix range, for example, bytes=-500 means last 500 bytes.
+            start = max(size - int(end), 0)
+            end = size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size:
+        raise ValueError("Range is not satisfiable.")
+    return start, end
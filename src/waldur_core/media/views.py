@@ -1,24 +1,135 @@
 import os
 
-from django.http import Http404, HttpResponse
-from django.utils.http import content_disposition_header
+from django.db.models import BinaryField
+from django.db.models.functions import Substr
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 
-from . import models
+from . import derivatives, models, utils
+
+# Content is read from the database and sent to the client by chunks of this size.
+CHUNK_SIZE = 256 * 1024
+
+
+def iter_content(blob_id, start, end):
+    """
+    Yield bytes of file content between start and end positions inclusive,
+    reading at most CHUNK_SIZE bytes per query.
+    """
+    position = start
+    while position <= end:
+        length = min(CHUNK_SIZE, end - position + 1)
+        chunk = (
+            models.FileContent.objects.filter(id=blob_id)
+            .annotate(
+                # SQL positions start from 1.
+                chunk=Substr(
+                    "content", position + 1, length, output_field=BinaryField()
+                )
+            )
+            .values_list("chunk", flat=True)
+            .get()
+        )
+        yield bytes(chunk)
+        position += length
 
 
 class MediaView(APIView):
+    """
+    Serve uploaded file by UUID.
+    Content hash is used as ETag, so that unchanged files are revalidated
+    without transferring content, and single byte range requests are supported.
+    Resized WebP copy of image is served for size preset, for example, ?preset=thumbnail.
+    """
+
     authentication_classes = ()
     permission_classes = ()
 
     def get(self, request, uuid):
+        preset = request.query_params.get("preset")
+        if preset and preset not in derivatives.PRESETS:
+            raise ValidationError(
+                {
+                    "preset": _("Preset must be one of %s.")
+                    % ", ".join(derivatives.PRESETS)
+                }
+            )
+
+        queryset = models.File.objects.only(
+            "name", "size", "mime_type", "hash", "modified", "blob"
+        )
         try:
-            file = models.File.objects.get(uuid=uuid)
+            file = queryset.get(uuid=uuid)
         except models.File.DoesNotExist:
             raise Http404
+
+        if file.mime_type not in derivatives.SOURCE_MIME_TYPES:
+            # Original content is served if image could not be resized.
+            preset = None
+
+        etag = quote_etag(f"{file.hash}-{preset}" if preset else file.hash)
+        last_modified = int(file.modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None and preset:
+            response = self.get_derivative_response(file, preset)
+        if response is None:
+            response = self.get_content_response(request, file, etag)
+
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified)
+        # File with the given UUID is never changed.
+        patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60)
+        return response
+
+    def get_derivative_response(self, file, preset):
+        derivative = derivatives.get_derivative(file.blob_id, preset)
+        if derivative is None:
+            return None
+
+        content = bytes(derivative.content)
+        filename = os.path.splitext(os.path.split(file.name)[-1])[0] + ".webp"
+        response = HttpResponse(content, content_type=derivatives.DERIVATIVE_MIME_TYPE)
+        response.headers["Content-Length"] = len(content)
+        response.headers["Content-Disposition"] = content_disposition_header(
+            as_attachment=True, filename=filename
+        )
+        return response
+
+    def get_content_response(self, request, file, etag):
+        try:
+            byte_range = utils.parse_range_header(
+                request.headers.get("Range"), file.size
+            )
+        except ValueError:
+            response = HttpResponse(status=416)
+            response.headers["Content-Range"] = f"bytes */{file.size}"
+            return response
+
+        if_range = request.headers.get("If-Range")
+        if byte_range and if_range and if_range != etag:
+            byte_range = None
+
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_content(file.blob_id, start, end), status=206
+            )
+            response.headers["Content-Range"] = f"bytes {start}-{end}/{file.size}"
+            response.headers["Content-Length"] = end - start + 1
+        else:
+            response = StreamingHttpResponse(
+                iter_content(file.blob_id, 0, file.size - 1)
+            )
+            response.headers["Content-Length"] = file.size
+
         filename = os.path.split(file.name)[-1]
-        response = HttpResponse(file.content)
-        response.headers["Content-Length"] = file.size
+        response.headers["Accept-Ranges"] = "bytes"
         response.headers["Content-Type"] = file.mime_type or "application/octet-stream"
         response.headers["Content-Disposition"] = content_disposition_header(
             as_attachment=True, filename=filename
@@ -1003,7 +1003,7 @@ class VirtualMachine(IPCoordinatesMixin, core_models.RuntimeStateMixin, BaseReso
 
     def detect_coordinates(self):
         if self.external_ips:
-            return get_coordinates_by_ip(self.external_ips)
+            return get_coordinates_by_ip(self.external_ips[0])
 
     def get_access_url(self):
         if self.external_ips:
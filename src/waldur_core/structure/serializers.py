@@ -20,6 +20,7 @@ from waldur_core.core import models as core_models
 from waldur_core.core import serializers as core_serializers
 from waldur_core.core.clean_html import clean_html
 from waldur_core.core.fields import MappedChoiceField
+from waldur_core.media.serializers import ImagePresetURLField, MediaListSerializer
 from waldur_core.permissions.enums import SYSTEM_CUSTOMER_ROLES, PermissionEnum
 from waldur_core.permissions.models import UserRole
 from waldur_core.permissions.serializers import PermissionSerializer
@@ -393,9 +394,11 @@ class CustomerSerializer(
     )
     projects_count = serializers.SerializerMethodField()
     users_count = serializers.SerializerMethodField()
+    image_thumbnail_url = ImagePresetURLField(source="image", preset="thumbnail")
 
     class Meta:
         model = models.Customer
+        list_serializer_class = MediaListSerializer
         fields = (
             "url",
             "uuid",
@@ -411,6 +414,7 @@ class CustomerSerializer(
             "projects",
             "backend_id",
             "image",
+            "image_thumbnail_url",
             "blocked",
             "archived",
             "default_tax_percent",
@@ -1,4 +1,9 @@
+import csv
+import io
+from collections import Counter
+
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
 from waldur_core.core.serializers import GenericRelatedField
@@ -10,6 +15,9 @@ from waldur_core.users import models
 
 User = get_user_model()
 
+# Maximum number of invitations created by single bulk request.
+BULK_INVITATIONS_LIMIT = 5000
+
 
 class BaseInvitationDetailsSerializer(serializers.HyperlinkedModelSerializer):
     created_by_full_name = serializers.ReadOnlyField(source="created_by.full_name")
@@ -133,6 +141,104 @@ class InvitationSerializer(BaseInvitationSerializer):
         }
 
 
+class InvitationRecipientSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Invitation
+        fields = (
+            "email",
+            "full_name",
+            "native_name",
+            "tax_number",
+            "phone_number",
+            "organization",
+            "job_title",
+            "civil_number",
+        )
+
+
+class InvitationBulkCreateSerializer(serializers.Serializer):
+    """
+    Create invitations for many recipients to the same scope and role.
+    Recipients are passed either as a list or as a CSV file with header row,
+    columns of the file are the same as fields of recipient.
+    """
+
+    scope = GenericRelatedField(get_valid_models)
+    role = serializers.SlugRelatedField(
+        queryset=Role.objects.filter(is_active=True), slug_field="uuid"
+    )
+    extra_invitation_text = serializers.CharField(required=False, allow_blank=True)
+    invitations = InvitationRecipientSerializer(many=True, required=False)
+    file = serializers.FileField(required=False)
+
+    def validate_file(self, file):
+        try:
+            content = file.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise serializers.ValidationError(_("File should be UTF-8 encoded."))
+
+        reader = csv.DictReader(io.StringIO(content))
+        if "email" not in (reader.fieldnames or []):
+            raise serializers.ValidationError(_("File should have email column."))
+
+        rows = [
+            {field: value for field, value in row.items() if field and value}
+            for row in reader
+        ]
+        serializer = InvitationRecipientSerializer(data=rows, many=True)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def validate(self, attrs):
+        role: Role = attrs["role"]
+        if not isinstance(attrs["scope"], role.content_type.model_class()):
+            raise serializers.ValidationError(
+                "Role and scope should belong to the same content type."
+            )
+
+        if ("invitations" in attrs) == ("file" in attrs):
+            raise serializers.ValidationError(
+                _("Either invitations or file should be specified.")
+            )
+        recipients = attrs.pop("file", None) or attrs.get("invitations")
+        if not recipients:
+            raise serializers.ValidationError(
+                _("At least one invitation should be specified.")
+            )
+        if len(recipients) > BULK_INVITATIONS_LIMIT:
+            raise serializers.ValidationError(
+                _("At most %s invitations can be created at once.")
+                % BULK_INVITATIONS_LIMIT
+            )
+
+        emails = Counter(recipient["email"].lower() for recipient in recipients)
+        duplicates = sorted(email for email, count in emails.items() if count > 1)
+        if duplicates:
+            raise serializers.ValidationError(
+                _("Emails are duplicated: %s.") % ", ".join(duplicates)
+            )
+
+        attrs["invitations"] = recipients
+        return attrs
+
+    def create(self, validated_data):
+        scope = validated_data["scope"]
+        customer = _get_customer(scope)
+        invitations = [
+            models.Invitation(
+                scope=scope,
+                customer=customer,
+                role=validated_data["role"],
+                created_by=self.context["request"].user,
+                state=validated_data["state"],
+                extra_invitation_text=validated_data.get("extra_invitation_text", ""),
+                **recipient,
+            )
+            for recipient in validated_data["invitations"]
+        ]
+        return models.Invitation.objects.bulk_create(invitations, batch_size=500)
+
+
 class VisibleInvitationDetailsSerializer(BaseInvitationDetailsSerializer):
     class Meta:
         model = models.Invitation
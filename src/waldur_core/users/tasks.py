@@ -1,8 +1,8 @@
 import logging
 import traceback
+from collections import defaultdict
 from datetime import timedelta
 from smtplib import SMTPException
-from urllib.parse import urlparse
 
 import requests
 from celery import shared_task
@@ -13,7 +13,12 @@ from django.utils import timezone
 from python_freeipa import exceptions as freeipa_exceptions
 
 from waldur_core.core import models as core_models
-from waldur_core.core.utils import broadcast_mail, format_homeport_link, pwgen
+from waldur_core.core.utils import (
+    broadcast_mail,
+    broadcast_personal_mail,
+    format_homeport_link,
+    pwgen,
+)
 from waldur_core.structure import models as structure_models
 from waldur_core.users import models, utils
 from waldur_core.users.utils import generate_safe_username
@@ -21,6 +26,10 @@ from waldur_core.users.utils import generate_safe_username
 logger = logging.getLogger(__name__)
 
 
+def get_invitations_for_notification(invitations):
+    return invitations.select_related("created_by", "role").prefetch_related("scope")
+
+
 @shared_task(name="waldur_core.users.cancel_expired_invitations")
 def cancel_expired_invitations(invitations=None):
     """
@@ -28,30 +37,36 @@ def cancel_expired_invitations(invitations=None):
     "INVITATION_LIFETIME". If invitation creation time is less than expiration time, the invitation will set as expired.
     """
     expiration_date = timezone.now() - settings.WALDUR_CORE["INVITATION_LIFETIME"]
-    if not invitations:
-        invitations = models.Invitation.objects.filter(
-            state=models.Invitation.State.PENDING
+    if invitations is None:
+        invitations = models.Invitation.objects.all()
+    invitations = invitations.filter(
+        state=models.Invitation.State.PENDING, created__lte=expiration_date
+    )
+
+    with transaction.atomic():
+        # Invitations locked by concurrent processing are expired during the next run.
+        invitation_ids = list(
+            invitations.select_for_update(skip_locked=True).values_list("id", flat=True)
+        )
+        models.Invitation.objects.filter(id__in=invitation_ids).update(
+            state=models.Invitation.State.EXPIRED
         )
-    invitations = invitations.filter(created__lte=expiration_date)
-    invitations.update(state=models.Invitation.State.EXPIRED)
 
-    for invitation in invitations:
-        context = utils.get_invitation_context(invitation, invitation.created_by.email)
+    if not invitation_ids:
+        return
 
-        logger.info(
-            "About to send a notification about expired invitation to {email}. Invitation recipient was {user}".format(
-                email=invitation.created_by.email, user=invitation.email, **context
-            )
-        )
+    logger.info("%s invitations have expired.", len(invitation_ids))
 
-        broadcast_mail(
-            "users",
-            "invitation_expired",
-            context,
-            [
-                invitation.created_by.email,
-            ],
-        )
+    contexts = []
+    for invitation in get_invitations_for_notification(
+        models.Invitation.objects.filter(id__in=invitation_ids)
+        .exclude(created_by=None)
+        .exclude(created_by__email="")
+    ):
+        email = invitation.created_by.email
+        contexts.append((email, utils.get_invitation_context(invitation, email)))
+
+    broadcast_personal_mail("users", "invitation_expired", contexts)
 
 
 @shared_task(name="waldur_core.users.send_invitation_created")
@@ -70,13 +85,7 @@ def send_invitation_created(invitation_uuid, sender):
         update_fields=["execution_state", "error_message", "error_traceback"]
     )
 
-    context = utils.get_invitation_context(invitation, sender)
-    context["link"] = utils.get_invitation_link(invitation_uuid)
-    context["scope_link"] = utils.get_scope_link(
-        context["type"], invitation.scope.uuid.hex
-    )
-    site_link = format_homeport_link()
-    context["site_host"] = urlparse(site_link).hostname
+    context = utils.get_invitation_created_context(invitation, sender)
 
     if settings.WALDUR_CORE["INVITATION_USE_WEBHOOKS"]:
         webhook_url = settings.WALDUR_CORE["INVITATION_WEBHOOK_URL"]
@@ -127,22 +136,40 @@ def send_invitation_requested(invitation_uuid, sender):
     """
     Invitation request is sent to staff users so that they can approve or reject invitation.
     """
-    invitation = models.Invitation.objects.get(uuid=invitation_uuid)
-    base_context = utils.get_invitation_context(invitation, sender)
+    send_invitations_requested([invitation_uuid], sender)
+
 
-    staff_users = (
+@shared_task(name="waldur_core.users.send_invitations_requested")
+def send_invitations_requested(invitation_uuids, sender):
+    """
+    Requests for all invitations are rendered at once and sent to staff users over single connection.
+    """
+    invitations = get_invitations_for_notification(
+        models.Invitation.objects.filter(uuid__in=invitation_uuids)
+    )
+    staff_users = list(
         core_models.User.objects.filter(is_staff=True, is_active=True)
         .exclude(email="")
         .exclude(notifications_enabled=False)
     )
-    for user in staff_users:
-        token = utils.get_invitation_token(invitation, user)
-        approve_link = format_homeport_link("invitation_approve/{token}/", token=token)
-        reject_link = format_homeport_link("invitation_reject/{token}/", token=token)
-        context = dict(
-            approve_link=approve_link, reject_link=reject_link, **base_context
-        )
-        broadcast_mail("users", "invitation_requested", context, [user.email])
+
+    contexts = []
+    for invitation in invitations:
+        base_context = utils.get_invitation_context(invitation, sender)
+        for user in staff_users:
+            token = utils.get_invitation_token(invitation, user)
+            approve_link = format_homeport_link(
+                "invitation_approve/{token}/", token=token
+            )
+            reject_link = format_homeport_link(
+                "invitation_reject/{token}/", token=token
+            )
+            context = dict(
+                approve_link=approve_link, reject_link=reject_link, **base_context
+            )
+            contexts.append((user.email, context))
+
+    broadcast_personal_mail("users", "invitation_requested", contexts)
 
 
 @shared_task(name="waldur_core.users.send_invitation_rejected")
@@ -162,31 +189,21 @@ def send_reminder_for_pending_invitations():
     expiration_date = (
         timezone.now() - settings.WALDUR_CORE["INVITATION_LIFETIME"] - timedelta(days=1)
     )
-    pending_invitations = models.Invitation.objects.filter(
-        state=models.Invitation.State.PENDING, created__lte=expiration_date
+    pending_invitations = get_invitations_for_notification(
+        models.Invitation.objects.filter(
+            state=models.Invitation.State.PENDING, created__lte=expiration_date
+        )
     )
 
+    contexts = []
     for invitation in pending_invitations:
-        context = utils.get_invitation_context(invitation, invitation.created_by.email)
-        context["link"] = utils.get_invitation_link(invitation.uuid)
-        site_link = format_homeport_link()
-        context["site_host"] = urlparse(site_link).hostname
+        sender = invitation.created_by.email if invitation.created_by else ""
+        context = utils.get_invitation_created_context(invitation, sender)
         context["reminder"] = True
+        contexts.append((invitation.email, context))
 
-        logger.info(
-            "About to send a reminder about pending invitation to {email} to join {name} {type} as {role}".format(
-                email=invitation.email, **context
-            )
-        )
-
-        broadcast_mail(
-            "users",
-            "invitation_created",
-            context,
-            [
-                invitation.email,
-            ],
-        )
+    logger.info("About to send %s reminders about pending invitations.", len(contexts))
+    broadcast_personal_mail("users", "invitation_created", contexts)
 
 
 @shared_task(name="waldur_core.users.get_or_create_user")
@@ -224,6 +241,56 @@ def process_invitation(invitation_uuid, sender):
         send_invitation_created(invitation_uuid, sender)
 
 
+@shared_task(name="waldur_core.users.process_invitations")
+def process_invitations(invitation_uuids, sender):
+    """
+    Process invitations created at once, for example, by bulk invitation request.
+    Notifications about invitations are sent over single connection unless
+    users are created or webhooks are used, which are handled one by one.
+    """
+    if (
+        settings.WALDUR_CORE["INVITATION_CREATE_MISSING_USER"]
+        or settings.WALDUR_CORE["INVITATION_USE_WEBHOOKS"]
+    ):
+        for invitation_uuid in invitation_uuids:
+            try:
+                process_invitation(invitation_uuid, sender)
+            except Exception:
+                logger.exception("Unable to process invitation %s.", invitation_uuid)
+        return
+
+    invitations = list(
+        get_invitations_for_notification(
+            models.Invitation.objects.filter(uuid__in=invitation_uuids)
+        )
+    )
+    invitation_ids = [invitation.id for invitation in invitations]
+    models.Invitation.objects.filter(id__in=invitation_ids).update(
+        execution_state=models.Invitation.ExecutionState.PROCESSING,
+        error_message="",
+        error_traceback="",
+    )
+    processing = models.Invitation.objects.filter(
+        id__in=invitation_ids,
+        execution_state=models.Invitation.ExecutionState.PROCESSING,
+    )
+
+    contexts = [
+        (invitation.email, utils.get_invitation_created_context(invitation, sender))
+        for invitation in invitations
+    ]
+    try:
+        broadcast_personal_mail("users", "invitation_created", contexts)
+    except SMTPException as e:
+        processing.update(
+            execution_state=models.Invitation.ExecutionState.ERRED,
+            error_message=str(e),
+        )
+        raise
+
+    processing.update(execution_state=models.Invitation.ExecutionState.OK)
+
+
 @shared_task(name="waldur_core.users.cancel_expired_group_invitations")
 def cancel_expired_group_invitations():
     """
@@ -269,15 +336,29 @@ def process_pending_project_invitations():
     active_project_ids = structure_models.Project.objects.filter(
         start_date__lte=timezone.now()
     ).values_list("id", flat=True)
-    invitations = models.Invitation.objects.filter(
-        state=models.Invitation.State.PENDING_PROJECT,
-        object_id__in=active_project_ids,
-        content_type=project_content_type,
-    )
-    for invitation in invitations:
-        invitation.state = models.Invitation.State.PENDING
-        invitation.save()
-        sender = invitation.created_by.full_name or invitation.created_by.username
-        transaction.on_commit(
-            lambda: process_invitation.delay(invitation.uuid.hex, sender)
+
+    with transaction.atomic():
+        invitations = list(
+            models.Invitation.objects.filter(
+                state=models.Invitation.State.PENDING_PROJECT,
+                object_id__in=active_project_ids,
+                content_type=project_content_type,
+            )
+            .select_related("created_by")
+            .select_for_update(of=("self",), skip_locked=True)
         )
+        models.Invitation.objects.filter(
+            id__in=[invitation.id for invitation in invitations]
+        ).update(state=models.Invitation.State.PENDING)
+
+        invitations_by_sender = defaultdict(list)
+        for invitation in invitations:
+            sender = utils.get_invitation_sender(invitation)
+            invitations_by_sender[sender].append(invitation.uuid.hex)
+
+        for sender, invitation_uuids in invitations_by_sender.items():
+            transaction.on_commit(
+                lambda invitation_uuids=invitation_uuids, sender=sender: (
+                    process_invitations.delay(invitation_uuids, sender)
+                )
+            )
@@ -4,6 +4,7 @@ from datetime import timedelta
 from ddt import data, ddt
 from django.conf import settings
 from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import override_settings
 from django.utils import timezone
 from freezegun import freeze_time
@@ -703,6 +704,157 @@ class InvitationSendTest(BaseInvitationTest):
         self.assertEqual(customer_expired_invitation.created, timezone.now())
 
 
+@override_settings(task_always_eager=True)
+class InvitationBulkCreateTest(BaseInvitationTest):
+    def setUp(self):
+        super().setUp()
+        structure_factories.NotificationFactory(key="users.invitation_created")
+        self.url = factories.InvitationBaseFactory.get_list_url("bulk_create")
+        self.payload = {
+            "scope": structure_factories.ProjectFactory.get_url(self.project),
+            "role": ProjectRole.ADMIN.uuid.hex,
+            "invitations": [
+                {"email": f"user{i}@example.com", "full_name": f"User {i}"}
+                for i in range(3)
+            ],
+        }
+
+    def get_invitations(self):
+        return models.Invitation.objects.filter(email__endswith="@example.com")
+
+    def test_staff_can_create_invitations_in_bulk(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.post(self.url, self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["invitations"]), 3)
+        self.assertEqual(self.get_invitations().count(), 3)
+        self.assertEqual(
+            set(self.get_invitations().values_list("execution_state", flat=True)),
+            {models.Invitation.ExecutionState.OK},
+        )
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            [f"user{i}@example.com" for i in range(3)],
+        )
+
+    def test_invitations_are_created_from_csv_file(self):
+        self.client.force_authenticate(user=self.staff)
+        content = "email,full_name,job_title\nuser0@example.com,User 0,Engineer\nuser1@example.com,,\n"
+        payload = {
+            "scope": self.payload["scope"],
+            "role": self.payload["role"],
+            "file": SimpleUploadedFile("users.csv", content.encode()),
+        }
+        response = self.client.post(self.url, payload, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(
+                self.get_invitations()
+                .order_by("email")
+                .values_list("email", "full_name", "job_title")
+            ),
+            [
+                ("user0@example.com", "User 0", "Engineer"),
+                ("user1@example.com", "", ""),
+            ],
+        )
+
+    def test_invalid_row_of_csv_file_is_reported(self):
+        self.client.force_authenticate(user=self.staff)
+        payload = {
+            "scope": self.payload["scope"],
+            "role": self.payload["role"],
+            "file": SimpleUploadedFile(
+                "users.csv", b"email\nuser0@example.com\ninvalid\n"
+            ),
+        }
+        response = self.client.post(self.url, payload, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("file", response.data)
+        self.assertFalse(self.get_invitations().exists())
+
+    def test_duplicate_emails_are_rejected(self):
+        self.client.force_authenticate(user=self.staff)
+        self.payload["invitations"].append({"email": "USER0@example.com"})
+        response = self.client.post(self.url, self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.get_invitations().exists())
+
+    def test_user_without_permission_cannot_create_invitations_in_bulk(self):
+        self.client.force_authenticate(user=self.project_admin)
+        response = self.client.post(self.url, self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(self.get_invitations().exists())
+
+    @override_waldur_core_settings(ONLY_STAFF_CAN_INVITE_USERS=True)
+    def test_invitations_of_non_staff_user_are_requested(self):
+        CustomerRole.OWNER.add_permission(PermissionEnum.CREATE_PROJECT_PERMISSION)
+        structure_factories.NotificationFactory(key="users.invitation_requested")
+        self.client.force_authenticate(user=self.customer_owner)
+        response = self.client.post(self.url, self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(self.get_invitations().values_list("state", flat=True)),
+            {models.Invitation.State.REQUESTED},
+        )
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual({message.to[0] for message in mail.outbox}, {self.staff.email})
+
+
+@override_settings(task_always_eager=True)
+class InvitationBatchProcessingTest(BaseInvitationTest):
+    def test_all_invitations_of_started_project_are_processed(self):
+        structure_factories.NotificationFactory(key="users.invitation_created")
+        invitations = factories.ProjectInvitationFactory.create_batch(
+            2,
+            scope=self.project,
+            created_by=self.customer_owner,
+            state=models.Invitation.State.PENDING_PROJECT,
+        )
+
+        tasks.process_pending_project_invitations()
+
+        for invitation in invitations:
+            invitation.refresh_from_db()
+            self.assertEqual(invitation.state, models.Invitation.State.PENDING)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted(invitation.email for invitation in invitations),
+        )
+
+    @override_waldur_core_settings(INVITATION_LIFETIME=timedelta(weeks=1))
+    def test_creator_is_notified_about_each_expired_invitation(self):
+        structure_factories.NotificationFactory(key="users.invitation_expired")
+        invitations = factories.ProjectInvitationFactory.create_batch(
+            2,
+            created=timezone.now() - timedelta(weeks=2),
+            created_by=self.customer_owner,
+        )
+        accepted = factories.ProjectInvitationFactory(
+            created=timezone.now() - timedelta(weeks=2),
+            created_by=self.customer_owner,
+            state=models.Invitation.State.ACCEPTED,
+        )
+
+        tasks.cancel_expired_invitations()
+
+        for invitation in invitations:
+            invitation.refresh_from_db()
+            self.assertEqual(invitation.state, models.Invitation.State.EXPIRED)
+        accepted.refresh_from_db()
+        self.assertEqual(accepted.state, models.Invitation.State.ACCEPTED)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            {message.to[0] for message in mail.outbox}, {self.customer_owner.email}
+        )
+
+
 class InvitationAcceptTest(BaseInvitationTest):
     def test_authenticated_user_can_accept_project_invitation(self):
         self.client.force_authenticate(user=self.user)
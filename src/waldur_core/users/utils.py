@@ -1,9 +1,11 @@
 import logging
+from urllib.parse import urlparse
 
 import requests
 from django.conf import settings
 from django.core.signing import BadSignature, TimestampSigner
 from django.db import transaction
+from django.utils import timezone
 from python_freeipa import exceptions as freeipa_exceptions
 from rest_framework import serializers
 
@@ -16,6 +18,7 @@ from waldur_core.permissions.utils import (
     get_users_with_permission,
     has_permission,
 )
+from waldur_core.structure import models as structure_models
 from waldur_core.users import models
 from waldur_freeipa import tasks
 from waldur_freeipa.backend import FreeIPABackend
@@ -174,6 +177,35 @@ def get_scope_link(scope_type, scope_uuid):
     )
 
 
+def get_invitation_created_context(invitation: models.Invitation, sender):
+    context = get_invitation_context(invitation, sender)
+    context["link"] = get_invitation_link(invitation.uuid.hex)
+    context["scope_link"] = get_scope_link(context["type"], invitation.scope.uuid.hex)
+    context["site_host"] = urlparse(core_utils.format_homeport_link()).hostname
+    return context
+
+
+def get_invitation_sender(invitation: models.Invitation):
+    if not invitation.created_by:
+        return ""
+    return invitation.created_by.full_name or invitation.created_by.username
+
+
+def get_invitation_initial_state(user, scope):
+    """
+    Invitation for project which has not started yet is processed when project starts.
+    If only staff can invite users, invitations created by other users should be approved first.
+    """
+    if isinstance(scope, structure_models.Project):
+        if scope.start_date and scope.start_date > timezone.now().date():
+            return models.Invitation.State.PENDING_PROJECT
+
+    if settings.WALDUR_CORE["ONLY_STAFF_CAN_INVITE_USERS"] and not user.is_staff:
+        return models.Invitation.State.REQUESTED
+
+    return models.Invitation.State.PENDING
+
+
 def can_manage_invitation_with(request, scope):
     if request.user.is_staff:
         return True
@@ -18,9 +18,13 @@ from waldur_core.permissions.models import UserRole
 from waldur_core.permissions.utils import has_user
 from waldur_core.structure import filters as structure_filters
 from waldur_core.structure import serializers as structure_serializers
-from waldur_core.structure.models import Customer, Project
+from waldur_core.structure.models import Customer
 from waldur_core.users import filters, models, serializers, tasks
-from waldur_core.users.utils import can_manage_invitation_with, parse_invitation_token
+from waldur_core.users.utils import (
+    can_manage_invitation_with,
+    get_invitation_initial_state,
+    parse_invitation_token,
+)
 
 User = get_user_model()
 
@@ -41,31 +45,60 @@ class InvitationViewSet(ProtectedViewSet):
         if not can_manage_invitation_with(self.request, scope):
             raise PermissionDenied()
 
-        invitation: models.Invitation = serializer.save()
-        if isinstance(invitation.scope, Project):
-            project: Project = invitation.scope
-            if project.start_date and project.start_date > timezone.now().date():
-                invitation.state = models.Invitation.State.PENDING_PROJECT
-                invitation.save()
-                return
+        state = get_invitation_initial_state(self.request.user, scope)
+        invitation: models.Invitation = serializer.save(state=state)
 
         sender = self.request.user.full_name or self.request.user.username
-        if (
-            settings.WALDUR_CORE["ONLY_STAFF_CAN_INVITE_USERS"]
-            and not self.request.user.is_staff
-        ):
-            invitation.state = models.Invitation.State.REQUESTED
-            invitation.save()
+        if state == models.Invitation.State.REQUESTED:
             transaction.on_commit(
                 lambda: tasks.send_invitation_requested.delay(
                     invitation.uuid.hex, sender
                 )
             )
-        else:
+        elif state == models.Invitation.State.PENDING:
             transaction.on_commit(
                 lambda: tasks.process_invitation.delay(invitation.uuid.hex, sender)
             )
 
+    @action(
+        detail=False,
+        methods=["post"],
+        serializer_class=serializers.InvitationBulkCreateSerializer,
+    )
+    def bulk_create(self, request):
+        """
+        Create invitations for many users to the same scope and role in one request.
+        Recipients are specified either as invitations list or as CSV file.
+        Notifications about created invitations are sent by single background task.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        scope = serializer.validated_data["scope"]
+        if not can_manage_invitation_with(request, scope):
+            raise PermissionDenied()
+
+        state = get_invitation_initial_state(request.user, scope)
+        with transaction.atomic():
+            invitations = serializer.save(state=state)
+            invitation_uuids = [invitation.uuid.hex for invitation in invitations]
+
+            sender = request.user.full_name or request.user.username
+            if state == models.Invitation.State.REQUESTED:
+                transaction.on_commit(
+                    lambda: tasks.send_invitations_requested.delay(
+                        invitation_uuids, sender
+                    )
+                )
+            elif state == models.Invitation.State.PENDING:
+                transaction.on_commit(
+                    lambda: tasks.process_invitations.delay(invitation_uuids, sender)
+                )
+
+        return Response(
+            {"state": state, "invitations": invitation_uuids},
+            status=status.HTTP_201_CREATED,
+        )
+
     @action(detail=False, methods=["post"], permission_classes=[])
     def approve(self, request):
         """
@@ -1,5 +1,6 @@
 import collections
 import csv
+import logging
 from io import StringIO
 
 import python_freeipa
@@ -12,6 +13,13 @@ from waldur_core.structure import models as structure_models
 
 from . import models, utils
 
+logger = logging.getLogger(__name__)
+
+# Number of commands sent to FreeIPA in single batch request.
+BATCH_SIZE = 100
+# FreeIPA returns this error code if there are no modifications to be performed.
+NO_MODIFICATIONS_ERROR = 4202
+
 
 class GroupSynchronizer:
     """
@@ -87,24 +95,39 @@ class GroupSynchronizer:
 
         self.group_children[customer_group].add(project_group)
 
-    def add_customer_user(self, customer, user):
-        username = self.profiles.get(user.id)
+    def add_customer_user(self, customer, user_id):
+        username = self.profiles.get(user_id)
         if username:
             group = self.customer_group_name(customer)
             self.group_users[group].add(username)
 
-    def add_project_user(self, project, user):
-        username = self.profiles.get(user.id)
+    def add_project_user(self, project, user_id):
+        username = self.profiles.get(user_id)
         if username:
             group = self.project_group_name(project)
             self.group_users[group].add(username)
 
     def collect_waldur_permissions(self):
-        for permission in UserRole.objects.filter(is_active=True):
-            if isinstance(permission.scope, structure_models.Customer):
-                self.add_customer_user(permission.scope, permission.user)
-            elif isinstance(permission.scope, structure_models.Project):
-                self.add_project_user(permission.scope, permission.user)
+        # Scopes are fetched by single query per content type
+        # instead of resolving generic foreign key for every permission.
+        permissions = UserRole.objects.filter(
+            is_active=True, user_id__in=models.Profile.objects.values("user_id")
+        )
+        for model, add_user in (
+            (structure_models.Customer, self.add_customer_user),
+            (structure_models.Project, self.add_project_user),
+        ):
+            ctype = ContentType.objects.get_for_model(model)
+            scope_permissions = permissions.filter(content_type=ctype)
+            scopes = model.objects.filter(
+                id__in=scope_permissions.values("object_id")
+            ).in_bulk()
+            for object_id, user_id in scope_permissions.values_list(
+                "object_id", "user_id"
+            ):
+                scope = scopes.get(object_id)
+                if scope:
+                    add_user(scope, user_id)
 
     def get_limits(self, model):
         ctype = ContentType.objects.get_for_model(model)
@@ -299,7 +322,7 @@ class FreeIPABackend:
             self._client.user_mod(profile.username, **params)
         except python_freeipa.exceptions.BadRequest as e:
             # If no modifications to be performed freeipa-server return an exception.
-            if e.code == 4202:
+            if e.code == NO_MODIFICATIONS_ERROR:
                 pass
 
     def update_user(self, profile):
@@ -318,28 +341,88 @@ class FreeIPABackend:
         }
         self._update_profile(profile, params)
 
-    def update_gecos(self, profile):
-        params = {
+    def _get_gecos_params(self, profile):
+        return {
             "gecos": profile.gecos,
         }
-        self._update_profile(profile, params)
 
-    def update_name(self, profile):
-        params = {
+    def _get_name_params(self, profile):
+        return {
             "givenname": profile.user.first_name or "N/A",
             "sn": profile.user.last_name or "N/A",
             "cn": profile.user.full_name,
             "displayname": profile.user.full_name,
         }
-        self._update_profile(profile, params)
+
+    def update_gecos(self, profile):
+        self._update_profile(profile, self._get_gecos_params(profile))
+
+    def update_name(self, profile):
+        self._update_profile(profile, self._get_name_params(profile))
+
+    def _get_changed_params(self, remote_user, params):
+        """
+        Return parameters which differ from attributes of FreeIPA user.
+        Attributes are returned by FreeIPA as lists, and missing attribute equals to empty value.
+        """
+        changes = {}
+        for key, value in params.items():
+            remote_value = remote_user.get(key) or [""]
+            if (value or "") != remote_value[0]:
+                changes[key] = value
+        return changes
+
+    def _execute_batch(self, calls):
+        """
+        Execute calls using FreeIPA batch command in chunks of BATCH_SIZE calls.
+        Client does not implement batch command, therefore JSON-RPC request is made directly.
+
+        :return: list of errors of failed calls.
+        """
+        errors = []
+        for offset in range(0, len(calls), BATCH_SIZE):
+            chunk = calls[offset : offset + BATCH_SIZE]
+            response = self._client._request("batch", chunk)
+            for call, result in zip(chunk, response["results"]):
+                error_code = result.get("error_code")
+                if result.get("error") and error_code != NO_MODIFICATIONS_ERROR:
+                    logger.warning(
+                        "Unable to execute FreeIPA command %s for %s: %s",
+                        call["method"],
+                        call["params"][0],
+                        result["error"],
+                    )
+                    errors.append(result)
+        return errors
+
+    def _synchronize_profiles(self, get_params):
+        """
+        Compare attributes of active profiles with FreeIPA users fetched at once
+        and update only users whose attributes have been changed.
+        """
+        remote_users = {
+            user["uid"][0]: user for user in self._client.user_find()["result"]
+        }
+        calls = []
+        for profile in models.Profile.objects.filter(is_active=True).select_related(
+            "user"
+        ):
+            remote_user = remote_users.get(profile.username)
+            if remote_user is None:
+                continue
+            changes = self._get_changed_params(remote_user, get_params(profile))
+            if changes:
+                calls.append(
+                    {"method": "user_mod", "params": [[profile.username], changes]}
+                )
+        self._execute_batch(calls)
+        return len(calls)
 
     def synchronize_names(self):
-        for profile in models.Profile.objects.filter(is_active=True):
-            self.update_name(profile)
+        return self._synchronize_profiles(self._get_name_params)
 
     def synchronize_gecos(self):
-        for profile in models.Profile.objects.filter(is_active=True):
-            self.update_gecos(profile)
+        return self._synchronize_profiles(self._get_gecos_params)
 
     def synchronize_groups(self):
         synchronizer = GroupSynchronizer(self._client)
@@ -3,9 +3,11 @@ import logging
 from celery import shared_task
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from python_freeipa import exceptions as freeipa_exceptions
 
 from waldur_core.core import utils as core_utils
+from waldur_core.logging.loggers import event_logger
 
 from . import models, utils
 from .backend import FreeIPABackend
@@ -114,12 +116,29 @@ def disable_accounts_without_allocations():
     if not settings.WALDUR_FREEIPA["ENABLED"]:
         return
 
-    has_changed = False
-    for profile in models.Profile.objects.filter(is_active=True):
-        new_is_active = utils.is_profile_active_for_user(profile.user)
-        if new_is_active != profile.is_active:
-            profile.is_active = new_is_active
-            profile.save(update_fields=["is_active"])
-            has_changed = True
-    if has_changed:
-        schedule_sync()
+    with transaction.atomic():
+        profiles = list(
+            models.Profile.objects.filter(is_active=True)
+            .exclude(user_id__in=utils.get_users_with_allocations())
+            .select_for_update(of=("self",))
+            .select_related("user")
+        )
+        if not profiles:
+            return
+
+        models.Profile.objects.filter(
+            id__in=[profile.id for profile in profiles]
+        ).update(is_active=False)
+        # Bulk update does not emit pre_save signal, so events are logged explicitly.
+        event_logger.freeipa.process_many(
+            "info",
+            [
+                (
+                    "{username} FreeIPA profile has been disabled.",
+                    {"user": profile.user, "username": profile.username},
+                )
+                for profile in profiles
+            ],
+            event_type="freeipa_profile_disabled",
+        )
+    schedule_sync()
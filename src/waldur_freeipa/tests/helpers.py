@@ -8,3 +8,56 @@ def override_plugin_settings(**kwargs):
     plugin_settings = copy.deepcopy(settings.WALDUR_FREEIPA)
     plugin_settings.update(kwargs)
     return override_settings(WALDUR_FREEIPA=plugin_settings)
+
+
+class FakeFreeIPAClient:
+    """
+    In-memory FreeIPA client which supports user search and batch user modification.
+    Users are stored as dictionaries of attributes with list values, as FreeIPA returns them.
+    """
+
+    def __init__(self, users=None):
+        self.users = users or {}
+        self.batches = []
+
+    def login(self, username, password):
+        pass
+
+    def add_user(self, username, **attributes):
+        user = {"uid": [username]}
+        user.update({key: [value] for key, value in attributes.items()})
+        self.users[username] = user
+
+    def user_find(self):
+        return {"result": list(self.users.values())}
+
+    def _request(self, method, args=None, params=None):
+        assert method == "batch"
+        self.batches.append(args)
+        results = []
+        for call in args:
+            assert call["method"] == "user_mod"
+            [username], changes = call["params"]
+            user = self.users.get(username)
+            if user is None:
+                results.append(
+                    {"error": "user not found", "error_code": 4001, "result": None}
+                )
+                continue
+            modified = {
+                key: [value]
+                for key, value in changes.items()
+                if user.get(key) != [value]
+            }
+            if not modified:
+                results.append(
+                    {
+                        "error": "no modifications to be performed",
+                        "error_code": 4202,
+                        "result": None,
+                    }
+                )
+                continue
+            user.update(modified)
+            results.append({"error": None, "result": user})
+        return {"count": len(results), "results": results}
@@ -5,12 +5,13 @@ from python_freeipa import exceptions as freeipa_exceptions
 from rest_framework import status, test
 
 from waldur_core.core import utils as core_utils
-from waldur_core.permissions.fixtures import ProjectRole
+from waldur_core.logging.models import Event
+from waldur_core.permissions.fixtures import CustomerRole, ProjectRole
 from waldur_core.structure.tests import factories as structure_factories
-from waldur_freeipa import tasks
+from waldur_freeipa import tasks, utils
 from waldur_freeipa.backend import FreeIPABackend
 from waldur_freeipa.tests import factories
-from waldur_freeipa.tests.helpers import override_plugin_settings
+from waldur_freeipa.tests.helpers import FakeFreeIPAClient, override_plugin_settings
 from waldur_slurm import models as slurm_models
 from waldur_slurm import signals as slurm_signals
 from waldur_slurm.tests import fixtures as slurm_fixtures
@@ -300,6 +301,59 @@ class ProfileAllocationTest(test.APITransactionTestCase):
         self.profile.refresh_from_db()
         self.assertTrue(self.profile.is_active)
 
+    @mock.patch("waldur_freeipa.tasks.schedule_sync")
+    def test_set_based_check_matches_per_profile_check(self, mock_sync):
+        other_fixture = slurm_fixtures.SlurmFixture()
+        other_fixture.allocation.is_active = False
+        other_fixture.allocation.save()
+        self.fixture.allocation
+
+        profiles = {}
+        for name in ("project", "customer", "inactive", "revoked", "none"):
+            user = structure_factories.UserFactory()
+            profiles[name] = factories.ProfileFactory(user=user, is_active=True)
+
+        self.fixture.project.add_user(profiles["project"].user, ProjectRole.MEMBER)
+        self.fixture.customer.add_user(profiles["customer"].user, CustomerRole.OWNER)
+        other_fixture.project.add_user(profiles["inactive"].user, ProjectRole.ADMIN)
+        self.fixture.project.add_user(profiles["revoked"].user, ProjectRole.ADMIN)
+        self.fixture.project.remove_user(profiles["revoked"].user)
+
+        expected = {
+            name: utils.is_profile_active_for_user(profile.user)
+            for name, profile in profiles.items()
+        }
+        self.assertEqual(
+            expected,
+            {
+                "project": True,
+                "customer": True,
+                "inactive": False,
+                "revoked": False,
+                "none": False,
+            },
+        )
+
+        tasks.disable_accounts_without_allocations()
+
+        for name, profile in profiles.items():
+            profile.refresh_from_db()
+            self.assertEqual(profile.is_active, expected[name], name)
+        mock_sync.assert_called_once_with()
+        self.assertEqual(
+            Event.objects.filter(event_type="freeipa_profile_disabled").count(), 3
+        )
+
+    @mock.patch("waldur_freeipa.tasks.schedule_sync")
+    def test_sync_is_not_scheduled_if_nothing_has_changed(self, mock_sync):
+        self.fixture.allocation.project.add_user(self.user, ProjectRole.ADMIN)
+        self.profile.is_active = True
+        self.profile.save()
+
+        tasks.disable_accounts_without_allocations()
+
+        mock_sync.assert_not_called()
+
 
 @override_plugin_settings(ENABLED=True)
 @mock.patch("python_freeipa.Client")
@@ -357,3 +411,86 @@ class ProfileStatusTest(test.APITransactionTestCase):
 
         self.assertEqual(0, mock_client().user_disable.call_count)
         self.assertEqual(0, mock_client().user_enable.call_count)
+
+
+@override_plugin_settings(ENABLED=True)
+class ProfileSynchronizationTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.freeipa = FakeFreeIPAClient()
+        patcher = mock.patch("python_freeipa.Client", return_value=self.freeipa)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.profiles = []
+        for i in range(5):
+            user = structure_factories.UserFactory(
+                first_name=f"Alex{i}", last_name="Bloggs", full_name=f"Alex{i} Bloggs"
+            )
+            profile = factories.ProfileFactory(user=user, is_active=True)
+            self.freeipa.add_user(
+                profile.username,
+                givenname=user.first_name,
+                sn=user.last_name,
+                cn=user.full_name,
+                displayname=user.full_name,
+                gecos=profile.gecos,
+            )
+            self.profiles.append(profile)
+
+    def test_unchanged_names_are_not_sent(self):
+        self.assertEqual(FreeIPABackend().synchronize_names(), 0)
+        self.assertEqual(self.freeipa.batches, [])
+
+    def test_only_changed_names_are_sent_in_batch(self):
+        user = self.profiles[1].user
+        user.full_name = "Alice Bloggs"
+        user.save()
+
+        self.assertEqual(FreeIPABackend().synchronize_names(), 1)
+        self.assertEqual(len(self.freeipa.batches), 1)
+        self.assertEqual(
+            self.freeipa.batches[0],
+            [
+                {
+                    "method": "user_mod",
+                    "params": [
+                        [self.profiles[1].username],
+                        {"cn": "Alice Bloggs", "displayname": "Alice Bloggs"},
+                    ],
+                }
+            ],
+        )
+        self.assertEqual(
+            self.freeipa.users[self.profiles[1].username]["cn"], ["Alice Bloggs"]
+        )
+
+    def test_changes_are_sent_in_bounded_batches(self):
+        for profile in self.profiles:
+            profile.user.phone_number = "+3725555555"
+            profile.user.save()
+
+        with mock.patch("waldur_freeipa.backend.BATCH_SIZE", 2):
+            self.assertEqual(FreeIPABackend().synchronize_gecos(), 5)
+
+        self.assertEqual([len(batch) for batch in self.freeipa.batches], [2, 2, 1])
+        self.assertEqual(FreeIPABackend().synchronize_gecos(), 0)
+
+    def test_missing_remote_user_is_skipped(self):
+        del self.freeipa.users[self.profiles[0].username]
+        self.profiles[0].user.full_name = "Alice Bloggs"
+        self.profiles[0].user.save()
+
+        self.assertEqual(FreeIPABackend().synchronize_names(), 0)
+
+    def test_empty_placeholder_names_are_not_resent(self):
+        user = self.profiles[2].user
+        user.first_name = ""
+        user.save()
+
+        FreeIPABackend().synchronize_names()
+        self.assertEqual(
+            self.freeipa.users[self.profiles[2].username]["givenname"], ["N/A"]
+        )
+        self.freeipa.batches = []
+
+        self.assertEqual(FreeIPABackend().synchronize_names(), 0)
@@ -1,5 +1,7 @@
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
+from django.db.models import Q
 
 QUOTA_NAME = "freeipa_quota"
 
@@ -39,3 +41,33 @@ def is_profile_active_for_user(user):
     project_allocations, customer_allocations = utils.get_user_allocations(user)
 
     return project_allocations.exists() or customer_allocations.exists()
+
+
+def get_users_with_allocations():
+    """
+    Return IDs of users who have access to any active allocation
+    either via project or via customer role. It is set-based
+    equivalent of is_profile_active_for_user.
+    """
+    from waldur_core.permissions.models import UserRole
+    from waldur_core.structure import models as structure_models
+    from waldur_slurm import models as slurm_models
+
+    allocations = slurm_models.Allocation.objects.filter(is_active=True)
+    project_ctype = ContentType.objects.get_for_model(structure_models.Project)
+    customer_ctype = ContentType.objects.get_for_model(structure_models.Customer)
+
+    return (
+        UserRole.objects.filter(is_active=True)
+        .filter(
+            Q(
+                content_type=project_ctype,
+                object_id__in=allocations.values("project_id"),
+            )
+            | Q(
+                content_type=customer_ctype,
+                object_id__in=allocations.values("project__customer_id"),
+            )
+        )
+        .values("user_id")
+    )
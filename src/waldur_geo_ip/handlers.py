@@ -1,3 +1,5 @@
+import threading
+
 from django.db import transaction
 
 from waldur_core.core import utils
@@ -5,6 +7,8 @@ from waldur_core.core.models import StateMixin
 
 from . import tasks
 
+_local = threading.local()
+
 
 def detect_vm_coordinates(sender, instance, name, source, target, **kwargs):
     # VM already has coordinates
@@ -19,6 +23,13 @@ def detect_vm_coordinates(sender, instance, name, source, target, **kwargs):
         )
 
 
+def schedule_events_location_detection():
+    event_ids = getattr(_local, "event_ids", [])
+    _local.event_ids = []
+    if event_ids:
+        tasks.detect_events_location.delay(event_ids)
+
+
 def detect_event_geo_location(sender, instance, created=False, **kwargs):
     event = instance
 
@@ -27,8 +38,10 @@ def detect_event_geo_location(sender, instance, created=False, **kwargs):
             event.context.get("ip_address")
             and event.context.get("location") == "pending"
         ):
-            transaction.on_commit(
-                lambda: tasks.detect_event_location.delay(
-                    utils.serialize_instance(event)
-                )
-            )
+            # Events created within the same transaction are processed by single task.
+            # IDs of events from rolled back transaction are dispatched with the next batch
+            # and skipped by the task, because these events do not exist.
+            if not hasattr(_local, "event_ids"):
+                _local.event_ids = []
+            _local.event_ids.append(event.id)
+            transaction.on_commit(schedule_events_location_detection)
@@ -1,9 +1,12 @@
+import collections
 import logging
 
 from celery import shared_task
+from django.apps import apps
 from django.core import exceptions
 
 from waldur_core.core import utils as core_utils
+from waldur_core.logging.models import Event
 from waldur_geo_ip import utils
 
 logger = logging.getLogger(__name__)
@@ -22,19 +25,40 @@ def detect_vm_coordinates(serialized_virtual_machine):
 
 @shared_task(name="waldur_geo_ip.detect_vm_coordinates_batch")
 def detect_vm_coordinates_batch(serialized_virtual_machines):
-    for vm in serialized_virtual_machines:
-        detect_vm_coordinates.delay(vm)
+    """
+    Detect coordinates of virtual machines in single task.
+    Virtual machines are fetched by one query per model, and locations
+    are resolved through the cache, so that every host is looked up once.
+    """
+    pks_by_model = collections.defaultdict(list)
+    for serialized_virtual_machine in serialized_virtual_machines:
+        model_name, pk = serialized_virtual_machine.split(":")
+        pks_by_model[model_name].append(pk)
+
+    for model_name, pks in pks_by_model.items():
+        model = apps.get_model(model_name)
+        for vm in model._default_manager.filter(pk__in=pks):
+            utils.detect_coordinates(vm)
+
+
+@shared_task(name="waldur_geo_ip.detect_events_location")
+def detect_events_location(event_ids):
+    """
+    Resolve locations of unique IP addresses of events at once
+    and update context of all events by single query.
+    """
+    events = list(Event.objects.filter(id__in=event_ids, context__location="pending"))
+    locations = utils.get_locations(event.context["ip_address"] for event in events)
+
+    for event in events:
+        location = locations.get(event.context["ip_address"])
+        event.context["location"] = location and location.country_name or ""
+
+    Event.objects.bulk_update(events, ["context"])
 
 
 @shared_task()
 def detect_event_location(serialized_event):
+    # It is kept for tasks which have been queued before batch task was introduced.
     event = core_utils.deserialize_instance(serialized_event)
-    location = ""
-
-    try:
-        location = utils.get_country_by_ip(event.context["ip_address"])
-    except Exception as msg:
-        logger.error("Error of get location info: %s", msg)
-
-    event.context["location"] = location
-    event.save(update_fields=["context"])
+    detect_events_location(event_ids=[event.id])
@@ -1,5 +1,7 @@
 from unittest import mock
 
+from django.core.cache import cache
+from django.db import transaction
 from django.test import TransactionTestCase
 from django.test.utils import override_settings
 
@@ -7,15 +9,33 @@ from waldur_core.core import utils
 from waldur_core.logging.tests import factories as logging_factories
 
 from .. import tasks
+from .. import utils as geo_ip_utils
 
 
 class TestDetectEventLocationTask(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        geo_ip_utils.local_cache.clear()
+
     @mock.patch("waldur_geo_ip.handlers.tasks")
     def test_handler(self, mock_tasks):
-        logging_factories.EventFactory(
+        event = logging_factories.EventFactory(
             context={"ip_address": "127.0.0.1", "location": "pending"}
         )
-        mock_tasks.detect_event_location.delay.assert_called_once()
+        mock_tasks.detect_events_location.delay.assert_called_once_with([event.id])
+
+    @mock.patch("waldur_geo_ip.handlers.tasks")
+    def test_events_of_same_transaction_are_processed_by_single_task(self, mock_tasks):
+        with transaction.atomic():
+            events = [
+                logging_factories.EventFactory(
+                    context={"ip_address": "127.0.0.1", "location": "pending"}
+                )
+                for _ in range(3)
+            ]
+        mock_tasks.detect_events_location.delay.assert_called_once_with(
+            [event.id for event in events]
+        )
 
     @mock.patch("requests.get")
     @override_settings(IPSTACK_ACCESS_KEY="IPSTACK_ACCESS_KEY")
@@ -33,3 +53,44 @@ class TestDetectEventLocationTask(TransactionTestCase):
 
         event.refresh_from_db()
         self.assertEqual(event.context.get("location"), "Country")
+
+    @mock.patch("requests.get")
+    @override_settings(IPSTACK_ACCESS_KEY="IPSTACK_ACCESS_KEY")
+    def test_unique_addresses_are_resolved_once(self, mock_request_get):
+        mock_request_get.return_value.ok = True
+        mock_request_get.return_value.json.side_effect = lambda: {
+            "country_name": "Country"
+        }
+        with mock.patch("waldur_geo_ip.handlers.tasks"):
+            events = [
+                logging_factories.EventFactory(
+                    context={"ip_address": f"10.0.0.{i % 2}", "location": "pending"}
+                )
+                for i in range(6)
+            ]
+
+        with self.assertNumQueries(2):
+            tasks.detect_events_location([event.id for event in events])
+        self.assertEqual(mock_request_get.call_count, 2)
+
+        for event in events:
+            event.refresh_from_db()
+            self.assertEqual(event.context["location"], "Country")
+
+        # Locations are served from cache afterwards.
+        geo_ip_utils.local_cache.clear()
+        geo_ip_utils.get_locations(["10.0.0.0", "10.0.0.1"])
+        self.assertEqual(mock_request_get.call_count, 2)
+
+    @mock.patch("requests.get")
+    def test_location_is_cleared_if_it_could_not_be_detected(self, mock_request_get):
+        with mock.patch("waldur_geo_ip.handlers.tasks"):
+            event = logging_factories.EventFactory(
+                context={"ip_address": "127.0.0.1", "location": "pending"}
+            )
+
+        tasks.detect_events_location([event.id])
+
+        event.refresh_from_db()
+        self.assertEqual(event.context["location"], "")
+        mock_request_get.assert_not_called()
@@ -1,15 +1,21 @@
 from unittest import mock
 
-from django.test import TransactionTestCase
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
 from django.test.utils import override_settings
 
 from waldur_core.core import utils
 from waldur_core.structure.tests import factories
 
-from .. import tasks
+from .. import exceptions, tasks
+from .. import utils as geo_ip_utils
 
 
 class TestDetectVMCoordinatesTask(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        geo_ip_utils.local_cache.clear()
+
     @mock.patch("requests.get")
     @override_settings(IPSTACK_ACCESS_KEY="IPSTACK_ACCESS_KEY")
     def test_task_sets_coordinates(self, mock_request_get):
@@ -43,3 +49,59 @@ class TestDetectVMCoordinatesTask(TransactionTestCase):
         instance.refresh_from_db()
         self.assertIsNone(instance.latitude)
         self.assertIsNone(instance.longitude)
+
+    @mock.patch("requests.get")
+    @override_settings(IPSTACK_ACCESS_KEY="IPSTACK_ACCESS_KEY")
+    def test_batch_task_resolves_shared_host_once(self, mock_request_get):
+        instances = [
+            factories.TestNewInstanceFactory(external_ips="10.0.0.1") for _ in range(3)
+        ]
+        mock_request_get.return_value.ok = True
+        mock_request_get.return_value.json.return_value = {
+            "latitude": 20,
+            "longitude": 30,
+        }
+
+        tasks.detect_vm_coordinates_batch(
+            [utils.serialize_instance(instance) for instance in instances]
+        )
+
+        mock_request_get.assert_called_once()
+        for instance in instances:
+            instance.refresh_from_db()
+            self.assertEqual(instance.latitude, 20)
+            self.assertEqual(instance.longitude, 30)
+
+
+class MaxMindBackendTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        geo_ip_utils.local_cache.clear()
+        geo_ip_utils._get_backend.cache_clear()
+        self.addCleanup(geo_ip_utils._get_backend.cache_clear)
+
+    @override_settings(
+        GEOIP_BACKEND="maxmind", GEOIP_DATABASE_PATH="/tmp/GeoLite2.mmdb"
+    )
+    def test_location_is_read_from_local_database(self):
+        reader = mock.Mock()
+        reader.get.return_value = {
+            "country": {"names": {"en": "Estonia"}},
+            "location": {"latitude": 59.4, "longitude": 24.7},
+        }
+        maxminddb = mock.Mock(InvalidDatabaseError=ValueError)
+        maxminddb.open_database.return_value = reader
+
+        with mock.patch.dict("sys.modules", {"maxminddb": maxminddb}):
+            location = geo_ip_utils.get_location("10.0.0.1")
+            geo_ip_utils.local_cache.clear()
+            geo_ip_utils.get_location("10.0.0.1")
+
+        self.assertEqual(location, ("Estonia", 59.4, 24.7))
+        maxminddb.open_database.assert_called_once_with("/tmp/GeoLite2.mmdb")
+        reader.get.assert_called_once_with("10.0.0.1")
+
+    @override_settings(GEOIP_BACKEND="unknown")
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(exceptions.GeoIpException):
+            geo_ip_utils.get_location("10.0.0.1")
@@ -1,8 +1,12 @@
 import collections
+import functools
 import logging
+import socket
+import threading
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
 
 from . import exceptions
 
@@ -10,6 +14,12 @@ logger = logging.getLogger(__name__)
 
 
 Coordinates = collections.namedtuple("Coordinates", ("latitude", "longitude"))
+Location = collections.namedtuple("Location", ("country_name", "latitude", "longitude"))
+
+# Timeout of request to ipstack API in seconds.
+REQUEST_TIMEOUT = 10
+# Number of locations kept in memory of every process.
+LOCAL_CACHE_SIZE = 1024
 
 
 def get_response(ip_address):
@@ -19,7 +29,7 @@ def get_response(ip_address):
     url = f"http://api.ipstack.com/{ip_address}?access_key={settings.IPSTACK_ACCESS_KEY}&output=json&legacy=1"  # We don't use https, because current plan does not support HTTPS Encryption
 
     try:
-        response = requests.get(url)
+        response = requests.get(url, timeout=REQUEST_TIMEOUT)
     except requests.exceptions.RequestException as e:
         raise exceptions.GeoIpException(f"Request to geoip API {url} failed: {e}")
 
@@ -32,15 +42,164 @@ def get_response(ip_address):
     )
 
 
+class IpstackBackend:
+    """
+    Resolve location using ipstack API.
+    """
+
+    def lookup(self, ip_address):
+        data = get_response(ip_address)
+        return Location(
+            country_name=data.get("country_name"),
+            latitude=data.get("latitude"),
+            longitude=data.get("longitude"),
+        )
+
+
+class MaxMindBackend:
+    """
+    Resolve location using local database in MaxMind DB format,
+    for example, GeoLite2 City. It requires maxminddb package.
+    """
+
+    def __init__(self, database_path):
+        try:
+            import maxminddb
+        except ImportError:
+            raise exceptions.GeoIpException("maxminddb package is not installed.")
+
+        if not database_path:
+            raise exceptions.GeoIpException("GEOIP_DATABASE_PATH is empty.")
+
+        try:
+            self.reader = maxminddb.open_database(database_path)
+        except (OSError, maxminddb.InvalidDatabaseError) as e:
+            raise exceptions.GeoIpException(
+                f"Unable to open GeoIP database {database_path}: {e}"
+            )
+
+    def lookup(self, ip_address):
+        try:
+            # Hostnames are accepted as well, so they are resolved to IP address first.
+            address = socket.gethostbyname(ip_address)
+            record = self.reader.get(address) or {}
+        except (OSError, ValueError) as e:
+            raise exceptions.GeoIpException(
+                f"Unable to resolve location of {ip_address}: {e}"
+            )
+
+        country = record.get("country", {}).get("names", {})
+        location = record.get("location", {})
+        return Location(
+            country_name=country.get("en"),
+            latitude=location.get("latitude"),
+            longitude=location.get("longitude"),
+        )
+
+
+@functools.cache
+def _get_backend(backend, database_path):
+    if backend == "ipstack":
+        return IpstackBackend()
+    if backend == "maxmind":
+        return MaxMindBackend(database_path)
+    raise exceptions.GeoIpException(f"GeoIP backend {backend} is not supported.")
+
+
+def get_backend():
+    # Backend is created once per process, because opening database is expensive.
+    return _get_backend(settings.GEOIP_BACKEND, settings.GEOIP_DATABASE_PATH)
+
+
+class LocalCache:
+    """
+    Thread-safe in-process LRU cache.
+    It is used in front of shared cache to avoid network round trip for hot IP addresses.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, keys):
+        with self.lock:
+            result = {}
+            for key in keys:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    result[key] = self.entries[key]
+            return result
+
+    def set_many(self, values):
+        with self.lock:
+            for key, value in values.items():
+                self.entries[key] = value
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalCache(LOCAL_CACHE_SIZE)
+
+
+def get_cache_key(ip_address):
+    return f"geo_ip_location_{settings.GEOIP_BACKEND}_{ip_address}"
+
+
+def get_locations(ip_addresses, raise_exception=False):
+    """
+    Resolve locations of IP addresses or hostnames.
+    Every unique address is looked up in process cache, then in shared cache,
+    and only addresses missing in both caches are resolved by backend.
+    Failed lookups are not cached.
+
+    :return: dictionary mapping address to location for resolved addresses.
+    """
+    keys = {get_cache_key(ip_address): ip_address for ip_address in set(ip_addresses)}
+    found = local_cache.get_many(keys)
+
+    missing = [key for key in keys if key not in found]
+    if missing:
+        shared = cache.get_many(missing)
+        local_cache.set_many(shared)
+        found.update(shared)
+
+    resolved = {}
+    for key in keys:
+        if key in found:
+            continue
+        try:
+            resolved[key] = tuple(get_backend().lookup(keys[key]))
+        except exceptions.GeoIpException as e:
+            if raise_exception:
+                raise
+            logger.warning("Unable to detect location of %s: %s", keys[key], e)
+
+    if resolved:
+        timeout = settings.GEOIP_CACHE_TIMEOUT.total_seconds()
+        cache.set_many(resolved, timeout=timeout)
+        local_cache.set_many(resolved)
+        found.update(resolved)
+
+    return {keys[key]: Location(*value) for key, value in found.items()}
+
+
+def get_location(ip_address):
+    return get_locations([ip_address], raise_exception=True)[ip_address]
+
+
 def get_coordinates_by_ip(ip_address):
     """
     Return coordinates by IP or hostname.
     :param ip_address: IP or hostname
     """
-    data = get_response(ip_address)
-    latitude = data.get("latitude")
-    longitude = data.get("longitude")
-    return Coordinates(latitude=latitude, longitude=longitude)
+    location = get_location(ip_address)
+    return Coordinates(latitude=location.latitude, longitude=location.longitude)
 
 
 def get_country_by_ip(ip_address):
@@ -48,8 +207,7 @@ def get_country_by_ip(ip_address):
     Return country by IP or hostname.
     :param ip_address: IP or hostname
     """
-    data = get_response(ip_address)
-    return data.get("country_name")
+    return get_location(ip_address).country_name
 
 
 def detect_coordinates(instance):
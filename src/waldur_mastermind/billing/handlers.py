@@ -42,8 +42,19 @@ def process_invoice_item(sender, instance, created=False, **kwargs):
 
     if not instance.project:
         return
+    update_estimates([instance.project, instance.project.customer])
+
+
+def process_invoice_items(sender, invoice, items, **kwargs):
+    projects = {item.project for item in items if item.project}
+    if not projects:
+        return
+    update_estimates(list(projects) + [invoice.customer])
+
+
+def update_estimates(scopes):
     with transaction.atomic():
-        for scope in [instance.project, instance.project.customer]:
+        for scope in scopes:
             estimate, _ = models.PriceEstimate.objects.get_or_create(scope=scope)
             estimate.update_total()
             estimate.save(update_fields=["total"])
@@ -10,7 +10,7 @@ class BookingConfig(AppConfig):
         from waldur_mastermind.marketplace import models as marketplace_models
         from waldur_mastermind.marketplace.plugins import manager
 
-        from . import PLUGIN_NAME, handlers, processors, utils
+        from . import PLUGIN_NAME, handlers, models, processors, utils
         from . import registrators as booking_registrators
 
         manager.register(
@@ -28,3 +28,33 @@ class BookingConfig(AppConfig):
             sender=marketplace_models.Offering,
             dispatch_uid="waldur_mastermind.booking.handlers.update_google_calendar_name",
         )
+
+        signals.post_save.connect(
+            handlers.delete_busy_slots_index_when_booking_slot_is_changed,
+            sender=models.BookingSlot,
+            dispatch_uid="waldur_mastermind.booking.handlers.delete_busy_slots_index_when_booking_slot_is_saved",
+        )
+
+        signals.post_save.connect(
+            handlers.delete_busy_slots_index_when_busy_slot_is_changed,
+            sender=models.BusySlot,
+            dispatch_uid="waldur_mastermind.booking.handlers.delete_busy_slots_index_when_busy_slot_is_saved",
+        )
+
+        signals.post_delete.connect(
+            handlers.delete_busy_slots_index_when_booking_slot_is_changed,
+            sender=models.BookingSlot,
+            dispatch_uid="waldur_mastermind.booking.handlers.delete_busy_slots_index_when_booking_slot_is_deleted",
+        )
+
+        signals.post_delete.connect(
+            handlers.delete_busy_slots_index_when_busy_slot_is_changed,
+            sender=models.BusySlot,
+            dispatch_uid="waldur_mastermind.booking.handlers.delete_busy_slots_index_when_busy_slot_is_deleted",
+        )
+
+        signals.post_save.connect(
+            handlers.delete_busy_slots_index_when_resource_state_is_changed,
+            sender=marketplace_models.Resource,
+            dispatch_uid="waldur_mastermind.booking.handlers.delete_busy_slots_index_when_resource_state_is_changed",
+        )
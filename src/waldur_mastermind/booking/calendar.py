@@ -1,9 +1,15 @@
 import datetime
 
+from django.db import transaction
 from django.utils.functional import cached_property
+from googleapiclient.errors import HttpError
 
 from waldur_mastermind.booking import models
-from waldur_mastermind.booking.utils import TimePeriod, get_offering_bookings
+from waldur_mastermind.booking.utils import (
+    TimePeriod,
+    delete_offering_busy_slots_index,
+    get_offering_bookings,
+)
 from waldur_mastermind.google.backend import GoogleCalendar
 
 
@@ -29,10 +35,14 @@ class SyncBookings:
             # it will register the error status for the calendar
         return calendar.backend_id
 
+    @cached_property
+    def time_zone(self):
+        return self.backend.get_calendar_time_zone(self.calendar_id)
+
     def get_bookings(self):
         waldur_bookings = get_offering_bookings(self.offering)
         busy_slots = []
-        google_bookings = []
+        google_bookings = {}
 
         for event in self.backend.get_events(calendar_id=self.calendar_id):
             start = event.get("start")
@@ -57,7 +67,7 @@ class SyncBookings:
                         start,
                         end,
                         event["id"],
-                        time_zone=self.backend.get_calendar_time_zone(self.calendar_id),
+                        time_zone=self.time_zone,
                     )
                 )
                 continue
@@ -72,26 +82,22 @@ class SyncBookings:
                         }
                     )
 
-            google_bookings.append(
-                TimePeriod(
-                    start,
-                    end,
-                    event["id"],
-                    location=event.get("location"),
-                    attendees=attendees,
-                )
+            google_booking = TimePeriod(
+                start,
+                end,
+                event["id"],
+                location=event.get("location"),
+                attendees=attendees,
             )
+            google_bookings[google_booking.id] = google_booking
 
-        need_to_delete = {b.id for b in google_bookings} - {
-            b.id for b in waldur_bookings
-        }
+        need_to_delete = set(google_bookings) - {b.id for b in waldur_bookings}
         need_to_update = []
         need_to_add = []
 
         for booking in waldur_bookings:
-            google_booking = list(filter(lambda x: x.id == booking.id, google_bookings))
-            if len(google_booking):
-                google_booking = google_booking[0]
+            google_booking = google_bookings.get(booking.id)
+            if google_booking:
                 if (
                     booking.start != google_booking.start
                     or booking.end != google_booking.end
@@ -104,46 +110,97 @@ class SyncBookings:
 
         return need_to_add, need_to_delete, need_to_update, busy_slots
 
+    def get_insert_request(self, booking):
+        return self.backend.get_insert_event_request(
+            summary=booking.name or self.offering.name,
+            event_id=booking.id,
+            start=booking.start,
+            end=booking.end,
+            calendar_id=self.calendar_id,
+            location=booking.location,
+            attendees=booking.attendees,
+        )
+
+    def get_update_request(self, booking):
+        return self.backend.get_update_event_request(
+            summary=self.offering.name,
+            event_id=booking.id,
+            start=booking.start,
+            end=booking.end,
+            calendar_id=self.calendar_id,
+            location=booking.location,
+            attendees=booking.attendees,
+        )
+
     def sync_events(self):
         need_to_add, need_to_delete, need_to_update, busy_slots = self.get_bookings()
 
+        requests = {}
         for booking in need_to_add:
-            self.backend.create_event(
-                summary=booking.name or self.offering.name,
-                event_id=booking.id,
-                start=booking.start,
-                end=booking.end,
-                calendar_id=self.calendar_id,
-                location=booking.location,
-                attendees=booking.attendees,
-            )
-
+            requests["insert:" + booking.id] = self.get_insert_request(booking)
         for booking_id in need_to_delete:
-            self.backend.delete_event(
-                calendar_id=self.calendar_id,
-                event_id=booking_id,
+            requests["delete:" + booking_id] = self.backend.get_delete_event_request(
+                calendar_id=self.calendar_id, event_id=booking_id
             )
-
         for booking in need_to_update:
-            self.backend.update_event(
-                summary=self.offering.name,
-                event_id=booking.id,
-                start=booking.start,
-                end=booking.end,
-                calendar_id=self.calendar_id,
-                location=booking.location,
-                attendees=booking.attendees,
-            )
+            requests["update:" + booking.id] = self.get_update_request(booking)
+
+        errors = self.backend.execute_batch(requests)
 
-        models.BusySlot.objects.filter(offering=self.offering).delete()
+        # Deleted events are not listed, but their IDs are still taken,
+        # so they are restored by update instead of insert.
+        conflicts = {}
+        for booking in need_to_add:
+            error = errors.get("insert:" + booking.id)
+            if isinstance(error, HttpError) and error.resp.status == 409:
+                del errors["insert:" + booking.id]
+                conflicts["update:" + booking.id] = self.get_update_request(booking)
+        if conflicts:
+            errors.update(self.backend.execute_batch(conflicts))
+
+        self.sync_busy_slots(busy_slots)
+
+        if errors:
+            raise SyncBookingsError(
+                "Unable to synchronize bookings with Google Calendar: %s"
+                % "; ".join(f"{key}: {error}" for key, error in errors.items())
+            )
 
-        for slots in busy_slots:
-            models.BusySlot.objects.create(
-                offering=self.offering,
-                start=slots.start,
-                end=slots.end,
-                backend_id=slots.id,
+    def sync_busy_slots(self, busy_slots):
+        """
+        Reconcile busy slots of the offering with events of Google Calendar,
+        so that only changed slots are removed and created.
+        """
+        google_slots = {slot.id: slot for slot in busy_slots}
+        stale_ids = []
+        for slot in models.BusySlot.objects.filter(offering=self.offering):
+            google_slot = google_slots.get(slot.backend_id)
+            if (
+                google_slot
+                and google_slot.start == slot.start
+                and google_slot.end == slot.end
+            ):
+                del google_slots[slot.backend_id]
+            else:
+                stale_ids.append(slot.id)
+
+        if not stale_ids and not google_slots:
+            return
+
+        with transaction.atomic():
+            if stale_ids:
+                models.BusySlot.objects.filter(id__in=stale_ids).delete()
+            models.BusySlot.objects.bulk_create(
+                models.BusySlot(
+                    offering=self.offering,
+                    start=slot.start,
+                    end=slot.end,
+                    backend_id=slot.id,
+                )
+                for slot in google_slots.values()
             )
+        # bulk_create does not emit signals, so cached index is dropped explicitly.
+        delete_offering_busy_slots_index(self.offering.id)
 
     def update_calendar_name(self):
         self.backend.update_calendar(self.calendar_id, summary=self.offering.name)
@@ -1,5 +1,8 @@
+from django.core.exceptions import ObjectDoesNotExist
+
 from waldur_core.core import models as core_models
 
+from . import utils
 from .executors import GoogleCalendarRenameExecutor
 
 
@@ -19,3 +22,24 @@ def update_google_calendar_name_if_offering_name_has_been_changed(
         and offering.tracker.has_changed("name")
     ):
         GoogleCalendarRenameExecutor.execute(offering.googlecalendar)
+
+
+def delete_busy_slots_index_when_booking_slot_is_changed(sender, instance, **kwargs):
+    try:
+        utils.delete_offering_busy_slots_index(instance.resource.offering_id)
+    except ObjectDoesNotExist:
+        # Index of removed offering is not used anymore
+        pass
+
+
+def delete_busy_slots_index_when_busy_slot_is_changed(sender, instance, **kwargs):
+    utils.delete_offering_busy_slots_index(instance.offering_id)
+
+
+def delete_busy_slots_index_when_resource_state_is_changed(
+    sender, instance, created=False, **kwargs
+):
+    # Only booked periods of resources in OK and CREATING states are indexed.
+    if not created and not instance.tracker.has_changed("state"):
+        return
+    utils.delete_offering_busy_slots_index(instance.offering_id)
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("booking", "0003_bookingslot"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="bookingslot",
+            name="start",
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,53 @@
+import datetime
+import uuid
+
+from django.db import migrations
+from django.utils.dateparse import parse_datetime
+
+PLUGIN_NAME = "Marketplace.Booking"
+
+
+def parse(value):
+    result = parse_datetime(value)
+    if result and result.tzinfo is None:
+        result = result.replace(tzinfo=datetime.UTC)
+    return result
+
+
+def fill_booking_slots(apps, schema_editor):
+    Resource = apps.get_model("marketplace", "Resource")
+    BookingSlot = apps.get_model("booking", "BookingSlot")
+
+    resources = (
+        Resource.objects.filter(offering__type=PLUGIN_NAME)
+        .exclude(id__in=BookingSlot.objects.values("resource_id"))
+        .only("id", "attributes")
+    )
+    slots = []
+    for resource in resources.iterator():
+        for schedule in resource.attributes.get("schedules") or []:
+            if not schedule:
+                continue
+            start = parse(schedule.get("start") or "")
+            end = parse(schedule.get("end") or "")
+            if not start or not end:
+                continue
+            slots.append(
+                BookingSlot(
+                    resource_id=resource.id,
+                    start=start,
+                    end=end,
+                    backend_id="booking_" + uuid.uuid4().hex,
+                )
+            )
+    BookingSlot.objects.bulk_create(slots, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("booking", "0004_alter_bookingslot_start"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_booking_slots, migrations.RunPython.noop),
+    ]
@@ -18,7 +18,7 @@ class BusySlot(TimeStampedModel):
 
 class BookingSlot(TimeStampedModel):
     resource = models.ForeignKey(marketplace_models.Resource, on_delete=models.CASCADE)
-    start = models.DateTimeField()
+    start = models.DateTimeField(db_index=True)
     end = models.DateTimeField()
     backend_id = models.CharField(max_length=255, null=False, blank=False)
 
@@ -6,12 +6,13 @@ from rest_framework.serializers import ValidationError
 
 from waldur_mastermind.booking.models import BookingSlot
 from waldur_mastermind.booking.utils import (
-    get_offering_bookings_and_busy_slots,
-    get_other_offering_booking_requests,
+    get_booking_requests_index,
+    get_offering_busy_slots_index,
+    get_offering_schedules_index,
 )
 from waldur_mastermind.marketplace import processors
 
-from .utils import TimePeriod, is_interval_in_schedules
+from .utils import TimePeriod
 
 
 class BookingCreateProcessor(processors.BaseOrderProcessor):
@@ -67,13 +68,11 @@ class BookingCreateProcessor(processors.BaseOrderProcessor):
 
         # Check that the schedule is available for the offering.
         offering = self.order.offering
-        offering_schedules = offering.attributes.get("schedules", [])
+        offering_schedules = get_offering_schedules_index(offering)
 
         for period in schedules:
-            if not is_interval_in_schedules(
-                TimePeriod(period["start"], period["end"]),
-                [TimePeriod(i["start"], i["end"]) for i in offering_schedules],
-            ):
+            interval = TimePeriod(period["start"], period["end"])
+            if not offering_schedules.contains(interval.start, interval.end):
                 raise ValidationError(
                     _(
                         "Time period from %s to %s is not available for selected offering."
@@ -82,22 +81,20 @@ class BookingCreateProcessor(processors.BaseOrderProcessor):
                 )
 
         # Check that there are no other bookings.
-        bookings = get_offering_bookings_and_busy_slots(offering)
+        bookings = get_offering_busy_slots_index(offering)
         for period in schedules:
-            if is_interval_in_schedules(
-                TimePeriod(period["start"], period["end"]), bookings
-            ):
+            interval = TimePeriod(period["start"], period["end"])
+            if bookings.overlaps(interval.start, interval.end):
                 raise ValidationError(
                     _("Time period from %s to %s is not available.")
                     % (period["start"], period["end"])
                 )
 
         # Check that there are no other booking requests.
-        booking_requests = get_other_offering_booking_requests(self.order)
+        booking_requests = get_booking_requests_index(self.order)
         for period in schedules:
-            if is_interval_in_schedules(
-                TimePeriod(period["start"], period["end"]), booking_requests
-            ):
+            interval = TimePeriod(period["start"], period["end"])
+            if booking_requests.overlaps(interval.start, interval.end):
                 raise ValidationError(
                     _(
                         "Time period from %s to %s is not available. Other booking request exists."
@@ -12,11 +12,12 @@ from . import PLUGIN_NAME, calendar, utils
     name="waldur_mastermind.booking.send_notifications_about_upcoming_bookings"
 )
 def send_notifications_about_upcoming_bookings():
-    for info in utils.get_info_about_upcoming_bookings():
-        user = info["user"]
-        if not user.email or not user.notifications_enabled:
-            return
-        core_utils.broadcast_mail("booking", "notification", info, [user.email])
+    contexts = [
+        (info["user"].email, info)
+        for info in utils.get_info_about_upcoming_bookings()
+        if info["user"].email and info["user"].notifications_enabled
+    ]
+    core_utils.broadcast_personal_mail("booking", "notification", contexts)
 
 
 @shared_task(name="waldur_mastermind.booking.sync_bookings_to_google_calendar")
@@ -13,28 +13,33 @@ from .. import PLUGIN_NAME, tasks
 
 class NotificationsTest(test.APITransactionTestCase):
     def setUp(self):
-        fixture = structure_fixtures.ProjectFixture()
-        offering = marketplace_factories.OfferingFactory(type=PLUGIN_NAME)
-
-        self.order = marketplace_factories.OrderFactory(
-            offering=offering,
-            attributes={
-                "schedules": [
-                    {
-                        "start": "2019-01-03T00:00:00.000000Z",
-                        "end": "2019-01-05T23:59:59.000000Z",
-                    },
-                ],
-                "name": "booking",
-            },
+        self.fixture = structure_fixtures.ProjectFixture()
+        self.offering = marketplace_factories.OfferingFactory(type=PLUGIN_NAME)
+
+        self.order = self.create_booking(
+            "booking",
+            [
+                {
+                    "start": "2019-01-03T00:00:00.000000Z",
+                    "end": "2019-01-05T23:59:59.000000Z",
+                },
+            ],
+        )
+        self.resource = self.order.resource
+
+    def create_booking(self, name, schedules, **kwargs):
+        order = marketplace_factories.OrderFactory(
+            offering=self.offering,
+            attributes={"schedules": schedules, "name": name},
             state=marketplace_models.Order.States.EXECUTING,
+            **kwargs,
         )
 
-        marketplace_utils.process_order(self.order, fixture.staff)
+        marketplace_utils.process_order(order, self.fixture.staff)
 
-        self.resource = self.order.resource
-        self.resource.state = marketplace_models.Resource.States.OK
-        self.resource.save()
+        order.resource.state = marketplace_models.Resource.States.OK
+        order.resource.save()
+        return order
 
     @freeze_time("2019-01-02")
     def test_send_notification_message_one_day_before_event(self):
@@ -50,3 +55,56 @@ class NotificationsTest(test.APITransactionTestCase):
     def test_not_send_notification_message_more_one_day_before_event(self):
         tasks.send_notifications_about_upcoming_bookings()
         self.assertEqual(len(mail.outbox), 0)
+
+    @freeze_time("2019-01-09")
+    def test_notification_is_sent_for_any_slot_of_booking(self):
+        structure_factories.NotificationFactory(key="booking.notification")
+        self.create_booking(
+            "multi-slot booking",
+            [
+                {
+                    "start": "2019-01-03T10:00:00.000000Z",
+                    "end": "2019-01-03T12:00:00.000000Z",
+                },
+                {
+                    "start": "2019-01-10T10:00:00.000000Z",
+                    "end": "2019-01-10T12:00:00.000000Z",
+                },
+            ],
+        )
+        tasks.send_notifications_about_upcoming_bookings()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertTrue("multi-slot booking" in mail.outbox[0].body)
+
+    @freeze_time("2019-01-02")
+    def test_user_receives_single_digest_about_all_bookings(self):
+        structure_factories.NotificationFactory(key="booking.notification")
+        self.create_booking(
+            "second booking",
+            [
+                {
+                    "start": "2019-01-03T10:00:00.000000Z",
+                    "end": "2019-01-03T12:00:00.000000Z",
+                },
+            ],
+            created_by=self.order.created_by,
+        )
+        other_user = structure_factories.UserFactory(notifications_enabled=False)
+        self.create_booking(
+            "third booking",
+            [
+                {
+                    "start": "2019-01-03T10:00:00.000000Z",
+                    "end": "2019-01-03T12:00:00.000000Z",
+                },
+            ],
+            created_by=other_user,
+        )
+
+        tasks.send_notifications_about_upcoming_bookings()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.order.created_by.email])
+        self.assertTrue("booking" in mail.outbox[0].body)
+        self.assertTrue("second booking" in mail.outbox[0].body)
+        self.assertFalse("third booking" in mail.outbox[0].body)
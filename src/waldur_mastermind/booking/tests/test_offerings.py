@@ -1,12 +1,16 @@
+import datetime
 import re
 from unittest import mock
 
 from ddt import data, ddt
 from freezegun import freeze_time
+from googleapiclient.errors import HttpError
 from rest_framework import status, test
 
+import httplib2
 from waldur_core.structure.tests import fixtures as structure_fixtures
 from waldur_mastermind.booking import models
+from waldur_mastermind.google.backend import GoogleCalendar
 from waldur_mastermind.google.tests import factories as google_factories
 from waldur_mastermind.marketplace import models as marketplace_models
 from waldur_mastermind.marketplace.tests import factories as marketplace_factories
@@ -198,3 +202,225 @@ class BookingOfferingActionsTest(test.APITransactionTestCase):
         self.assertEqual(
             response.data["google_calendar_link"], self.google_calendar.http_link
         )
+
+
+class FakeRequest:
+    def __init__(self, service, method, **kwargs):
+        self.service = service
+        self.method = method
+        self.kwargs = kwargs
+
+    def execute(self):
+        return self.service.handle(self)
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batches.append([request_id for request_id, _ in self.requests])
+        for request_id, request in self.requests:
+            try:
+                response = request.execute()
+            except HttpError as e:
+                self.callback(request_id, None, e)
+            else:
+                self.callback(request_id, response, None)
+
+
+class FakeCalendarService:
+    """
+    In-memory replacement of Google Calendar API client.
+    Events which were deleted are kept hidden, so that their IDs could not be reused by insert.
+    """
+
+    def __init__(self):
+        self.events_by_id = {}
+        self.hidden_ids = set()
+        self.batches = []
+        self.calendar_requests = 0
+
+    def events(self):
+        return self
+
+    def calendars(self):
+        return self
+
+    def list(self, **kwargs):
+        return FakeRequest(self, "list", **kwargs)
+
+    def insert(self, **kwargs):
+        return FakeRequest(self, "insert", **kwargs)
+
+    def update(self, **kwargs):
+        return FakeRequest(self, "update", **kwargs)
+
+    def delete(self, **kwargs):
+        return FakeRequest(self, "delete", **kwargs)
+
+    def get(self, **kwargs):
+        return FakeRequest(self, "get", **kwargs)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def handle(self, request):
+        if request.method == "list":
+            return {"items": list(self.events_by_id.values())}
+        if request.method == "get":
+            self.calendar_requests += 1
+            return {"timeZone": "Europe/Tallinn"}
+        if request.method == "insert":
+            event_id = request.kwargs["body"]["id"]
+            if event_id in self.events_by_id or event_id in self.hidden_ids:
+                raise HttpError(httplib2.Response({"status": "409"}), b"")
+            self.events_by_id[event_id] = request.kwargs["body"]
+        elif request.method == "update":
+            event_id = request.kwargs["eventId"]
+            if event_id not in self.events_by_id and event_id not in self.hidden_ids:
+                raise HttpError(httplib2.Response({"status": "404"}), b"")
+            self.hidden_ids.discard(event_id)
+            self.events_by_id[event_id] = dict(request.kwargs["body"], id=event_id)
+        elif request.method == "delete":
+            event_id = request.kwargs["eventId"]
+            del self.events_by_id[event_id]
+            self.hidden_ids.add(event_id)
+
+    def add_busy_event(self, event_id, start, end):
+        self.events_by_id[event_id] = {
+            "id": event_id,
+            "start": {"dateTime": start},
+            "end": {"dateTime": end},
+        }
+
+
+@freeze_time("2020-02-20")
+class SyncBookingsTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = structure_fixtures.CustomerFixture()
+        self.offering = marketplace_factories.OfferingFactory(
+            customer=self.fixture.customer,
+            type=PLUGIN_NAME,
+            state=marketplace_models.Offering.States.ACTIVE,
+        )
+        google_factories.GoogleCalendarFactory(offering=self.offering)
+        service_provider = marketplace_factories.ServiceProviderFactory(
+            customer=self.offering.customer
+        )
+        google_factories.GoogleCredentialsFactory(
+            service_provider=service_provider,
+            calendar_token="calendar_token",
+            calendar_refresh_token="calendar_refresh_token",
+        )
+        self.resource = marketplace_factories.ResourceFactory(
+            offering=self.offering,
+            state=marketplace_models.Resource.States.OK,
+        )
+        self.slots = [
+            models.BookingSlot.objects.create(
+                resource=self.resource,
+                start=f"2020-03-{day:02}T02:00:00+03:00",
+                end=f"2020-03-{day:02}T05:00:00+03:00",
+            )
+            for day in range(1, 6)
+        ]
+
+        self.service = FakeCalendarService()
+        patcher = mock.patch(
+            "waldur_mastermind.google.backend.build", return_value=self.service
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sync(self):
+        calendar.SyncBookings(self.offering).sync_events()
+
+    def test_all_changes_are_sent_in_one_batch(self):
+        self.sync()
+        self.assertEqual(len(self.service.batches), 1)
+        self.assertEqual(len(self.service.events_by_id), len(self.slots))
+
+        self.slots[0].delete()
+        self.slots[1].start = "2020-03-02T03:00:00+03:00"
+        self.slots[1].save()
+        self.service.batches = []
+        self.sync()
+
+        self.assertEqual(len(self.service.batches), 1)
+        self.assertEqual(
+            sorted(request_id.split(":")[0] for request_id in self.service.batches[0]),
+            ["delete", "update"],
+        )
+
+    def test_requests_are_split_into_batches(self):
+        with mock.patch.object(GoogleCalendar, "batch_size", 2):
+            self.sync()
+        self.assertEqual([len(batch) for batch in self.service.batches], [2, 2, 1])
+
+    def test_unchanged_calendar_is_not_updated(self):
+        self.sync()
+        self.service.batches = []
+        self.sync()
+        self.assertEqual(self.service.batches, [])
+
+    def test_deleted_event_is_restored_by_update(self):
+        self.sync()
+        slot = self.slots[0]
+        slot.delete()
+        self.sync()
+
+        models.BookingSlot.objects.create(
+            resource=self.resource,
+            start=slot.start,
+            end=slot.end,
+            backend_id=slot.backend_id,
+        )
+        self.sync()
+        self.assertEqual(len(self.service.events_by_id), len(self.slots))
+
+    def test_calendar_time_zone_is_fetched_once(self):
+        for i in range(3):
+            self.service.add_busy_event(
+                f"busy{i}", f"2020-04-0{i + 1}T10:00:00", f"2020-04-0{i + 1}T12:00:00"
+            )
+        self.sync()
+        self.assertEqual(self.service.calendar_requests, 1)
+        self.assertEqual(
+            models.BusySlot.objects.filter(offering=self.offering).count(), 3
+        )
+
+    def test_only_changed_busy_slots_are_replaced(self):
+        self.service.add_busy_event(
+            "busy1", "2020-04-01T10:00:00", "2020-04-01T12:00:00"
+        )
+        self.service.add_busy_event(
+            "busy2", "2020-04-02T10:00:00", "2020-04-02T12:00:00"
+        )
+        self.sync()
+        unchanged = models.BusySlot.objects.get(backend_id="busy1")
+        changed = models.BusySlot.objects.get(backend_id="busy2")
+
+        self.service.add_busy_event(
+            "busy2", "2020-04-02T11:00:00", "2020-04-02T12:00:00"
+        )
+        self.service.add_busy_event(
+            "busy3", "2020-04-03T10:00:00", "2020-04-03T12:00:00"
+        )
+        self.sync()
+
+        slots = models.BusySlot.objects.filter(offering=self.offering)
+        self.assertEqual(
+            sorted(slots.values_list("backend_id", flat=True)),
+            ["busy1", "busy2", "busy3"],
+        )
+        self.assertEqual(slots.get(backend_id="busy1").id, unchanged.id)
+        self.assertEqual(
+            slots.get(backend_id="busy2").start - changed.start,
+            datetime.timedelta(hours=1),
+        )
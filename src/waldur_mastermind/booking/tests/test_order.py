@@ -254,6 +254,35 @@ class OrderCreateTest(test.APITransactionTestCase):
             ),
         )
 
+    def test_do_not_create_order_if_schedule_overlaps_with_existing_booking(self):
+        resource = marketplace_factories.ResourceFactory(
+            offering=self.offering,
+            state=marketplace_models.Resource.States.OK,
+        )
+        booking_models.BookingSlot.objects.create(
+            resource=resource,
+            start="2019-01-02T10:00:00.000000Z",
+            end="2019-01-02T12:00:00.000000Z",
+        )
+
+        add_payload = {
+            "offering": marketplace_factories.OfferingFactory.get_public_url(
+                self.offering
+            ),
+            "attributes": {
+                "schedules": [
+                    {
+                        "start": "2019-01-02T00:00:00.000000Z",
+                        "end": "2019-01-02T23:59:59.000000Z",
+                    },
+                ]
+            },
+        }
+        response = self.create_order(
+            self.user, offering=self.offering, add_payload=add_payload
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_past_slots_are_not_available(self):
         add_payload = {
             "offering": marketplace_factories.OfferingFactory.get_public_url(
@@ -0,0 +1,122 @@
+import datetime
+import random
+import unittest
+
+from dateutil.parser import parse as parse_datetime
+from django.core.cache import cache
+from freezegun import freeze_time
+from rest_framework import test
+
+from waldur_mastermind.booking import PLUGIN_NAME, models, utils
+from waldur_mastermind.marketplace import models as marketplace_models
+from waldur_mastermind.marketplace.tests import factories as marketplace_factories
+
+
+def contains(periods, start, end):
+    return any(s <= start and end <= e for s, e in periods)
+
+
+def overlaps(periods, start, end):
+    return any(s < end and start < e for s, e in periods)
+
+
+class IntervalIndexTest(unittest.TestCase):
+    def generate_periods(self, rnd, count):
+        periods = []
+        for _ in range(count):
+            start = rnd.randint(0, 1000)
+            periods.append((start, start + rnd.randint(0, 100)))
+        return periods
+
+    def test_index_matches_brute_force(self):
+        rnd = random.Random(42)
+        for count in (0, 1, 2, 10, 100):
+            periods = self.generate_periods(rnd, count)
+            index = utils.IntervalIndex(periods)
+            for start, end in self.generate_periods(rnd, 200):
+                self.assertEqual(
+                    index.contains(start, end), contains(periods, start, end)
+                )
+                self.assertEqual(
+                    index.overlaps(start, end), overlaps(periods, start, end)
+                )
+
+    def test_adjacent_periods_do_not_overlap(self):
+        index = utils.IntervalIndex([(10, 20)])
+        self.assertFalse(index.overlaps(0, 10))
+        self.assertFalse(index.overlaps(20, 30))
+        self.assertTrue(index.overlaps(19, 30))
+
+    def test_index_supports_datetimes(self):
+        start = parse_datetime("2019-01-02T00:00:00Z")
+        index = utils.IntervalIndex([(start, start + datetime.timedelta(hours=2))])
+        self.assertTrue(
+            index.contains(start, start + datetime.timedelta(hours=1)),
+        )
+        self.assertFalse(
+            index.overlaps(
+                start + datetime.timedelta(hours=2),
+                start + datetime.timedelta(hours=3),
+            ),
+        )
+
+
+@freeze_time("2018-12-01")
+class BusySlotsIndexTest(test.APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.offering = marketplace_factories.OfferingFactory(type=PLUGIN_NAME)
+        self.resource = marketplace_factories.ResourceFactory(
+            offering=self.offering,
+            state=marketplace_models.Resource.States.OK,
+        )
+        self.start = parse_datetime("2019-01-02T10:00:00Z")
+        self.end = parse_datetime("2019-01-02T12:00:00Z")
+
+    def test_index_is_invalidated_when_booking_slot_is_created(self):
+        self.assertFalse(
+            utils.get_offering_busy_slots_index(self.offering).overlaps(
+                self.start, self.end
+            )
+        )
+        models.BookingSlot.objects.create(
+            resource=self.resource, start=self.start, end=self.end
+        )
+        self.assertTrue(
+            utils.get_offering_busy_slots_index(self.offering).overlaps(
+                self.start, self.end
+            )
+        )
+
+    def test_index_is_invalidated_when_busy_slot_is_deleted(self):
+        slot = models.BusySlot.objects.create(
+            offering=self.offering, start=self.start, end=self.end
+        )
+        self.assertEqual(len(utils.get_offering_busy_slots_index(self.offering)), 1)
+        slot.delete()
+        self.assertEqual(len(utils.get_offering_busy_slots_index(self.offering)), 0)
+
+    def test_index_is_invalidated_when_resource_is_terminated(self):
+        models.BookingSlot.objects.create(
+            resource=self.resource, start=self.start, end=self.end
+        )
+        self.assertEqual(len(utils.get_offering_busy_slots_index(self.offering)), 1)
+        self.resource.state = marketplace_models.Resource.States.TERMINATED
+        self.resource.save()
+        self.assertEqual(len(utils.get_offering_busy_slots_index(self.offering)), 0)
+
+    def test_index_is_built_by_single_query(self):
+        for resource in marketplace_factories.ResourceFactory.create_batch(
+            3, offering=self.offering, state=marketplace_models.Resource.States.OK
+        ):
+            models.BookingSlot.objects.create(
+                resource=resource, start=self.start, end=self.end
+            )
+        models.BusySlot.objects.create(
+            offering=self.offering, start=self.start, end=self.end
+        )
+        with self.assertNumQueries(1):
+            index = utils.get_offering_busy_slots_index(self.offering)
+        self.assertEqual(len(index), 4)
+        with self.assertNumQueries(0):
+            utils.get_offering_busy_slots_index(self.offering)
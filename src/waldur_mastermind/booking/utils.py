@@ -1,10 +1,15 @@
+import bisect
 import copy
 import datetime
+import hashlib
+import itertools
 import logging
 import re
 from collections.abc import Sequence
 
 from dateutil.parser import parse as parse_datetime
+from django.core.cache import cache
+from django.db.models import Count, Max
 from django.utils import timezone
 
 from waldur_mastermind.booking import models as models
@@ -14,6 +19,15 @@ from . import PLUGIN_NAME
 
 logger = logging.getLogger(__name__)
 
+BOOKING_INDEX_CACHE_TIMEOUT = 60 * 60
+
+BOOKING_REQUEST_STATES = (
+    marketplace_models.Order.States.PENDING_CONSUMER,
+    marketplace_models.Order.States.PENDING_PROVIDER,
+    marketplace_models.Order.States.EXECUTING,
+    marketplace_models.Order.States.DONE,
+)
+
 
 class TimePeriod:
     def __init__(
@@ -62,6 +76,119 @@ def is_interval_in_schedules(interval, schedules):
     return False
 
 
+class IntervalIndex:
+    """
+    Index of time periods sorted by start with running maximum of end,
+    so that both containment and overlap queries take O(log n).
+    """
+
+    def __init__(self, periods):
+        periods = sorted(periods, key=lambda period: (period[0], period[1]))
+        self.starts = [start for start, _ in periods]
+        self.max_ends = list(itertools.accumulate((end for _, end in periods), max))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def contains(self, start, end):
+        """Check if there is a period which fully contains given interval."""
+        # Periods to the left of the position start not later than given interval.
+        position = bisect.bisect_right(self.starts, start)
+        return position > 0 and self.max_ends[position - 1] >= end
+
+    def overlaps(self, start, end):
+        """Check if there is a period which overlaps with given interval."""
+        # Periods to the left of the position start before given interval ends.
+        position = bisect.bisect_left(self.starts, end)
+        return position > 0 and self.max_ends[position - 1] > start
+
+
+def get_offering_schedules_index(offering):
+    return IntervalIndex(
+        (period.start, period.end)
+        for period in (
+            TimePeriod(schedule["start"], schedule["end"])
+            for schedule in offering.attributes.get("schedules", [])
+        )
+    )
+
+
+def get_busy_slots_cache_key(offering_id):
+    return f"booking_busy_slots_index_{offering_id}"
+
+
+def get_booking_requests_cache_key(offering_id, fingerprint):
+    digest = hashlib.sha1(repr(fingerprint).encode("utf-8")).hexdigest()
+    return f"booking_requests_index_{offering_id}_{digest}"
+
+
+def get_offering_busy_slots_index(offering):
+    """
+    Return index of periods booked by active resources of the offering
+    and periods marked as busy in the offering calendar.
+    It is built by single query and cached until booking or busy slots are changed.
+    """
+    cache_key = get_busy_slots_cache_key(offering.id)
+    index = cache.get(cache_key)
+    if index is not None:
+        return index
+
+    States = marketplace_models.Resource.States
+    booking_slots = models.BookingSlot.objects.filter(
+        resource__offering=offering, resource__state__in=(States.OK, States.CREATING)
+    ).values_list("start", "end")
+    busy_slots = models.BusySlot.objects.filter(offering=offering).values_list(
+        "start", "end"
+    )
+    index = IntervalIndex(booking_slots.union(busy_slots, all=True))
+    cache.set(cache_key, index, BOOKING_INDEX_CACHE_TIMEOUT)
+    return index
+
+
+def delete_offering_busy_slots_index(offering_id):
+    cache.delete(get_busy_slots_cache_key(offering_id))
+
+
+def get_booking_requests(offering, exclude_order=None):
+    queryset = marketplace_models.Order.objects.filter(
+        offering=offering, state__in=BOOKING_REQUEST_STATES
+    )
+    if exclude_order is not None:
+        queryset = queryset.exclude(id=exclude_order.id)
+    return queryset
+
+
+def get_booking_requests_index(order):
+    """
+    Return index of periods requested by other orders for the same offering.
+    Index is cached under the key which includes number of orders and time
+    of their latest modification, so that it is rebuilt when orders are changed.
+    """
+    if order.id:
+        # Orders which have been already saved are excluded from index, so it is not shared.
+        return IntervalIndex(get_booking_requests_periods(order))
+
+    requests = get_booking_requests(order.offering)
+    fingerprint = tuple(
+        requests.aggregate(
+            count=Count("id"), max_id=Max("id"), modified=Max("modified")
+        ).values()
+    )
+    cache_key = get_booking_requests_cache_key(order.offering_id, fingerprint)
+    index = cache.get(cache_key)
+    if index is None:
+        index = IntervalIndex(get_booking_requests_periods(order))
+        cache.set(cache_key, index, BOOKING_INDEX_CACHE_TIMEOUT)
+    return index
+
+
+def get_booking_requests_periods(order):
+    return [
+        (period.start, period.end)
+        for period in get_other_offering_booking_requests(order)
+    ]
+
+
 def get_offering_bookings(offering):
     """
     OK means that booking request has been accepted.
@@ -81,34 +208,40 @@ def get_offering_bookings(offering):
     else:
         location = None
 
-    for resource in resources:
-        order = resources.first().creation_order
-        attendees = []
+    first_resource = resources.first()
+    if not first_resource:
+        return bookings
 
-        if order:
-            email = order.created_by.email or None
-            full_name = order.created_by.full_name or None
-            if email:
-                attendees = [{"displayName": full_name, "email": email}]
+    order = first_resource.creation_order
+    attendees = []
 
-        schedule = models.BookingSlot.objects.filter(resource=resource).order_by(
-            "start"
+    if order:
+        email = order.created_by.email or None
+        full_name = order.created_by.full_name or None
+        if email:
+            attendees = [{"displayName": full_name, "email": email}]
+
+    slots = (
+        models.BookingSlot.objects.filter(
+            resource__offering=offering,
+            resource__state__in=(States.OK, States.CREATING),
         )
+        .select_related("resource")
+        .order_by("resource__created", "resource_id", "start")
+    )
 
-        if schedule:
-            for period in schedule:
-                if period:
-                    bookings.append(
-                        TimePeriod(
-                            period.start,
-                            period.end,
-                            period.backend_id,
-                            attendees=attendees,
-                            location=location,
-                            order=order,
-                            name=period.resource.name,
-                        )
-                    )
+    for period in slots:
+        bookings.append(
+            TimePeriod(
+                period.start,
+                period.end,
+                period.backend_id,
+                attendees=attendees,
+                location=location,
+                order=order,
+                name=period.resource.name,
+            )
+        )
 
     return bookings
 
@@ -129,19 +262,8 @@ def get_offering_bookings_and_busy_slots(offering):
 
 
 def get_other_offering_booking_requests(order):
-    States = marketplace_models.Order.States
-    schedules = (
-        marketplace_models.Order.objects.filter(
-            offering=order.offering,
-            state__in=(
-                States.PENDING_CONSUMER,
-                States.PENDING_PROVIDER,
-                States.EXECUTING,
-                States.DONE,
-            ),
-        )
-        .exclude(id=order.id)
-        .values_list("attributes__schedules", flat=True)
+    schedules = get_booking_requests(order.offering, exclude_order=order).values_list(
+        "attributes__schedules", flat=True
     )
     return [
         TimePeriod(period["start"], period["end"], period.get("id"))
@@ -153,39 +275,49 @@ def get_other_offering_booking_requests(order):
 
 
 def get_info_about_upcoming_bookings():
-    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
-    upcoming_bookings = marketplace_models.Resource.objects.filter(
-        offering__type=PLUGIN_NAME,
-        state=marketplace_models.Resource.States.OK,
-        attributes__schedules__0__start__icontains="%s-%02d-%02dT"
-        % (tomorrow.year, tomorrow.month, tomorrow.day),
+    """
+    Return resources booked for tomorrow grouped by user who has ordered them.
+    Bookings are looked up by start of booking slots, so that every slot
+    of the booking is taken into account.
+    """
+    tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+    start = timezone.make_aware(datetime.datetime.combine(tomorrow, datetime.time.min))
+    slots = models.BookingSlot.objects.filter(
+        start__gte=start,
+        start__lt=start + datetime.timedelta(days=1),
+        resource__offering__type=PLUGIN_NAME,
+        resource__state=marketplace_models.Resource.States.OK,
+    )
+    resources = marketplace_models.Resource.objects.filter(
+        id__in=slots.values("resource_id")
+    ).order_by("name", "id")
+    orders = (
+        marketplace_models.Order.objects.filter(
+            resource__in=resources, type=marketplace_models.Order.Types.CREATE
+        )
+        .select_related("created_by")
+        .order_by("resource_id", "created", "id")
     )
 
-    result = []
+    users = {}
+    for order in orders:
+        # First order of the resource is its creation order.
+        users.setdefault(order.resource_id, order.created_by)
 
-    for resource in upcoming_bookings:
-        order = resource.creation_order
-        if order:
-            rows = list(
-                filter(lambda x: x["user"] == resource.project.customer, result)
-            )
-            if rows:
-                rows[0]["resources"].append(resource)
-            else:
-                result.append(
-                    {
-                        "user": order.created_by,
-                        "resources": [resource],
-                    }
-                )
-        else:
+    result = {}
+    for resource in resources:
+        user = users.get(resource.id)
+        if not user:
             logger.warning(
                 "Skipping notification because marketplace resource hasn't got a order. "
                 "Resource ID: %s",
                 resource.id,
             )
+            continue
+        result.setdefault(user.id, {"user": user, "resources": []})
+        result[user.id]["resources"].append(resource)
 
-    return result
+    return list(result.values())
 
 
 def change_attributes_for_view(attrs):
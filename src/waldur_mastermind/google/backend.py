@@ -3,6 +3,7 @@ import functools
 
 import pytz
 from django.conf import settings
+from django.utils.functional import cached_property
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
@@ -81,8 +82,12 @@ class GoogleCalendar:
     API docs: https://developers.google.com/calendar/v3/reference/
     """
 
+    # Google Calendar API accepts up to 50 requests in a single batch.
+    batch_size = 50
+
     def __init__(self, tokens):
         self.tokens = tokens
+        self.time_zones = {}
 
     @property
     def credentials(self):
@@ -96,7 +101,7 @@ class GoogleCalendar:
             refresh_token=self.tokens.calendar_refresh_token,
         )
 
-    @property
+    @cached_property
     def service(self):
         return build(
             "calendar", "v3", credentials=self.credentials, cache_discovery=False
@@ -111,6 +116,80 @@ class GoogleCalendar:
             .get("items", [])
         )
 
+    def get_event_body(
+        self, summary, start, end, time_zone="GMT", location=None, attendees=None
+    ):
+        return {
+            "summary": summary,
+            "start": {"dateTime": start.isoformat(), "timeZone": time_zone},
+            "end": {"dateTime": end.isoformat(), "timeZone": time_zone},
+            "location": location,
+            "attendees": attendees or [],
+        }
+
+    def get_insert_event_request(
+        self,
+        summary,
+        event_id,
+        start,
+        end,
+        time_zone="GMT",
+        calendar_id="primary",
+        location=None,
+        attendees=None,
+    ):
+        event_body = self.get_event_body(
+            summary, start, end, time_zone, location, attendees
+        )
+        event_body["id"] = event_id
+        return self.service.events().insert(calendarId=calendar_id, body=event_body)
+
+    def get_update_event_request(
+        self,
+        summary,
+        event_id,
+        start,
+        end,
+        time_zone="GMT",
+        calendar_id="primary",
+        location=None,
+        attendees=None,
+    ):
+        event_body = self.get_event_body(
+            summary, start, end, time_zone, location, attendees
+        )
+        event_body["status"] = "confirmed"
+        return self.service.events().update(
+            calendarId=calendar_id, eventId=event_id, body=event_body
+        )
+
+    def get_delete_event_request(self, event_id, calendar_id="primary"):
+        return self.service.events().delete(calendarId=calendar_id, eventId=event_id)
+
+    @reraise_exceptions
+    def execute_batch(self, requests):
+        """
+        Execute requests using batch API, so that one HTTP call is made
+        for every batch_size requests.
+
+        :param requests: dictionary mapping unique request ID to request.
+        :return: dictionary mapping request ID to error for failed requests.
+        """
+        errors = {}
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = exception
+
+        items = list(requests.items())
+        for offset in range(0, len(items), self.batch_size):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for request_id, request in items[offset : offset + self.batch_size]:
+                batch.add(request, request_id=request_id)
+            batch.execute()
+
+        return errors
+
     @reraise_exceptions
     def create_event(
         self,
@@ -142,19 +221,13 @@ class GoogleCalendar:
         except HttpError:
             pass
 
-        event_body = {
-            "summary": summary,
-            "id": event_id,
-            "start": {"dateTime": start.isoformat(), "timeZone": time_zone},
-            "end": {"dateTime": end.isoformat(), "timeZone": time_zone},
-            "location": location,
-            "attendees": attendees or [],
-        }
-        self.service.events().insert(calendarId=calendar_id, body=event_body).execute()
+        self.get_insert_event_request(
+            summary, event_id, start, end, time_zone, calendar_id, location, attendees
+        ).execute()
 
     @reraise_exceptions
     def delete_event(self, event_id, calendar_id="primary"):
-        self.service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+        self.get_delete_event_request(event_id, calendar_id).execute()
 
     @reraise_exceptions
     def update_event(
@@ -168,16 +241,8 @@ class GoogleCalendar:
         location=None,
         attendees=None,
     ):
-        event_body = {
-            "summary": summary,
-            "start": {"dateTime": start.isoformat(), "timeZone": time_zone},
-            "end": {"dateTime": end.isoformat(), "timeZone": time_zone},
-            "status": "confirmed",
-            "location": location,
-            "attendees": attendees or [],
-        }
-        self.service.events().update(
-            calendarId=calendar_id, eventId=event_id, body=event_body
+        self.get_update_event_request(
+            summary, event_id, start, end, time_zone, calendar_id, location, attendees
         ).execute()
 
     @reraise_exceptions
@@ -220,7 +285,8 @@ class GoogleCalendar:
     def get_calendar(self, calendar_id):
         return self.service.calendars().get(calendarId=calendar_id).execute()
 
-    @reraise_exceptions
     def get_calendar_time_zone(self, calendar_id):
-        calendar = self.get_calendar(calendar_id)
-        return pytz.timezone(calendar["timeZone"])
+        if calendar_id not in self.time_zones:
+            calendar = self.get_calendar(calendar_id)
+            self.time_zones[calendar_id] = pytz.timezone(calendar["timeZone"])
+        return self.time_zones[calendar_id]
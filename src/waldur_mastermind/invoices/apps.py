@@ -11,6 +11,7 @@ class InvoiceConfig(AppConfig):
         from waldur_core.structure import signals as structure_signals
 
         from . import handlers, models
+        from . import signals as invoice_signals
 
         signals.pre_save.connect(
             handlers.set_tax_percent_on_invoice_creation,
@@ -42,12 +43,36 @@ class InvoiceConfig(AppConfig):
             dispatch_uid="waldur_mastermind.invoices.update_cache_when_invoice_item_is_updated_%s",
         )
 
+        invoice_signals.invoice_items_bulk_changed.connect(
+            handlers.update_cache_when_invoice_items_are_changed,
+            sender=models.InvoiceItem,
+            dispatch_uid="waldur_mastermind.invoices.update_cache_when_invoice_items_are_changed",
+        )
+
         signals.post_delete.connect(
             handlers.update_cache_when_invoice_item_is_deleted,
             sender=models.InvoiceItem,
             dispatch_uid="waldur_mastermind.invoices.update_cache_when_invoice_item_is_deleted",
         )
 
+        signals.post_save.connect(
+            handlers.delete_invoice_html_cache_when_invoice_item_is_changed,
+            sender=models.InvoiceItem,
+            dispatch_uid="waldur_mastermind.invoices.delete_invoice_html_cache_when_invoice_item_is_updated",
+        )
+
+        signals.post_delete.connect(
+            handlers.delete_invoice_html_cache_when_invoice_item_is_changed,
+            sender=models.InvoiceItem,
+            dispatch_uid="waldur_mastermind.invoices.delete_invoice_html_cache_when_invoice_item_is_deleted",
+        )
+
+        invoice_signals.invoice_items_bulk_changed.connect(
+            handlers.delete_invoice_html_cache_when_invoice_items_are_changed,
+            sender=models.InvoiceItem,
+            dispatch_uid="waldur_mastermind.invoices.delete_invoice_html_cache_when_invoice_items_are_changed",
+        )
+
         signals.post_save.connect(
             handlers.update_invoice_item_on_project_name_update,
             sender=structure_models.Project,
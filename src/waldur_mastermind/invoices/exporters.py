@@ -0,0 +1,106 @@
+import io
+from csv import DictWriter
+
+from django.conf import settings
+from django.db.models import Count, Prefetch
+
+from waldur_core.core import utils as core_utils
+
+from . import models, serializers, utils
+
+
+class Echo:
+    """
+    File-like object which returns written value instead of buffering it.
+    It allows to yield CSV rows one by one.
+    """
+
+    def write(self, value):
+        return value
+
+
+class InvoiceReportExporter:
+    """
+    Export invoice items as CSV in the format configured in INVOICE_REPORTING settings.
+    Invoices are loaded in chunks together with their items, so that streamed
+    report does not keep all invoices in memory.
+    """
+
+    chunk_size = 100
+
+    def __init__(self, invoices):
+        if isinstance(invoices, models.Invoice):
+            invoices = [invoices]
+        if isinstance(invoices, list):
+            invoices = models.Invoice.objects.filter(
+                id__in=[invoice.id for invoice in invoices]
+            )
+        self.invoices = invoices
+
+        reporting = settings.WALDUR_INVOICES["INVOICE_REPORTING"]
+        if reporting.get("USE_SAF"):
+            self.serializer_class = serializers.SAFReportSerializer
+            self.items_ordering = ("project_name", "name")
+        elif reporting.get("USE_SAP"):
+            self.serializer_class = serializers.SAPReportSerializer
+            self.items_ordering = ("project_name", "name")
+        else:
+            self.serializer_class = serializers.InvoiceItemReportSerializer
+            self.items_ordering = ("id",)
+        self.csv_params = reporting["CSV_PARAMS"]
+        self.fields = self.serializer_class.Meta.fields
+
+    def get_invoices(self):
+        items = (
+            models.InvoiceItem.objects.select_related("project", "resource__offering")
+            .prefetch_related("resource__offering__plans")
+            .order_by(*self.items_ordering)
+        )
+        return (
+            self.invoices.select_related("customer")
+            .prefetch_related(Prefetch("items", queryset=items))
+            .order_by("id")
+        )
+
+    def iter_rows(self):
+        for invoice in self.get_invoices().iterator(chunk_size=self.chunk_size):
+            # Invoice price is computed from prefetched items.
+            items = utils.filter_invoice_items(invoice.items.all())
+            yield from self.serializer_class(items, many=True).data
+
+    def write(self, stream):
+        writer = DictWriter(stream, fieldnames=self.fields, **self.csv_params)
+        writer.writeheader()
+        for row in self.iter_rows():
+            writer.writerow(row)
+
+    def iter_lines(self):
+        writer = DictWriter(Echo(), fieldnames=self.fields, **self.csv_params)
+        yield writer.writeheader()
+        for row in self.iter_rows():
+            yield writer.writerow(row)
+
+    def to_string(self):
+        # Email attachment is built in memory as a whole.
+        stream = io.StringIO(newline="")
+        self.write(stream)
+        return stream.getvalue()
+
+
+def get_report_invoices(date):
+    invoices = models.Invoice.objects.filter(
+        year=date.year, month=date.month, customer__archived=False
+    )
+
+    # Report should include only organizations that had accounting running during the invoice period.
+    if settings.WALDUR_CORE["ENABLE_ACCOUNTING_START_DATE"]:
+        invoices = invoices.filter(
+            customer__accounting_start_date__lte=core_utils.month_end(date)
+        )
+
+    # Report should not include customers with 0 invoice items.
+    return invoices.annotate(items_count=Count("items")).filter(items_count__gt=0)
+
+
+def get_report_filename(date):
+    return "3M%02d%dWaldur.txt" % (date.month, date.year)
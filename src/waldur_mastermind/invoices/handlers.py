@@ -13,7 +13,7 @@ from waldur_core.core import utils as core_utils
 from waldur_mastermind.invoices import signals as cost_signals
 from waldur_mastermind.marketplace import models as marketplace_models
 
-from . import log, models, registrators
+from . import log, models, registrators, utils
 
 logger = logging.getLogger(__name__)
 
@@ -130,6 +130,10 @@ def update_cache_when_invoice_item_is_updated(
         transaction.on_commit(lambda: invoice_item.invoice.update_cache())
 
 
+def update_cache_when_invoice_items_are_changed(sender, invoice, **kwargs):
+    transaction.on_commit(lambda: invoice.update_cache())
+
+
 def update_cache_when_invoice_item_is_deleted(sender, instance, **kwargs):
     def update_invoice():
         try:
@@ -141,6 +145,18 @@ def update_cache_when_invoice_item_is_deleted(sender, instance, **kwargs):
     transaction.on_commit(update_invoice)
 
 
+def delete_invoice_html_cache_when_invoice_item_is_changed(sender, instance, **kwargs):
+    try:
+        utils.delete_invoice_html_cache(instance.invoice)
+    except ObjectDoesNotExist:
+        # It is okay to skip cache invalidation if invoice has been already removed
+        pass
+
+
+def delete_invoice_html_cache_when_invoice_items_are_changed(sender, invoice, **kwargs):
+    utils.delete_invoice_html_cache(invoice)
+
+
 def projects_customer_has_been_changed(
     sender, project, old_customer, new_customer, created=False, **kwargs
 ):
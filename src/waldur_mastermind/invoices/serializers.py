@@ -761,10 +761,13 @@ core_signals.pre_serializer_fields.connect(
 )
 
 
-class FinancialReportEmailSerializer(serializers.Serializer):
-    emails = serializers.ListField(child=serializers.EmailField())
+class FinancialReportSerializer(serializers.Serializer):
     year = serializers.IntegerField()
-    month = serializers.IntegerField()
+    month = serializers.IntegerField(min_value=1, max_value=12)
+
+
+class FinancialReportEmailSerializer(FinancialReportSerializer):
+    emails = serializers.ListField(child=serializers.EmailField())
 
     def validate_emails(self, value):
         if len(value) < 1:
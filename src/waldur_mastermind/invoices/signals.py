@@ -2,3 +2,7 @@ import django.dispatch
 
 # providing_args=['invoice', 'issuer_details']
 invoice_created = django.dispatch.Signal()
+
+# providing_args=['invoice', 'items']
+# Sent instead of post_save and post_delete when invoice items are changed in bulk.
+invoice_items_bulk_changed = django.dispatch.Signal()
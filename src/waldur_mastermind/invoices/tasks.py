@@ -1,7 +1,5 @@
 import datetime
 import logging
-from csv import DictWriter
-from io import StringIO
 
 from celery import shared_task
 from constance import config
@@ -14,8 +12,9 @@ from waldur_core.core import utils as core_utils
 from waldur_core.structure import models as structure_models
 from waldur_mastermind.invoices.utils import get_previous_month
 from waldur_mastermind.marketplace.tasks import copy_future_price_to_current_price
+from waldur_mastermind.promotions import utils as promotions_utils
 
-from . import log, models, registrators, serializers, utils
+from . import exporters, log, models, registrators, utils
 
 logger = logging.getLogger(__name__)
 
@@ -42,16 +41,18 @@ def create_monthly_invoices():
     if settings.WALDUR_CORE["ENABLE_ACCOUNTING_START_DATE"]:
         customers = customers.filter(accounting_start_date__lt=timezone.now())
 
-    for customer in customers.iterator():
-        try:
-            registrators.RegistrationManager.get_or_create_invoice(
-                customer, core_utils.month_start(date)
-            )
-        except Exception:
-            # Continue processing even if some customers could not be processed
-            logger.exception(
-                "Unable to create monthly invoice for customer %s", customer
-            )
+    # Discounts of all resources are resolved using single index during invoicing run
+    with promotions_utils.discount_index():
+        for customer in customers.iterator():
+            try:
+                registrators.RegistrationManager.get_or_create_invoice(
+                    customer, core_utils.month_start(date)
+                )
+            except Exception:
+                # Continue processing even if some customers could not be processed
+                logger.exception(
+                    "Unable to create monthly invoice for customer %s", customer
+                )
 
     if settings.WALDUR_INVOICES["INVOICE_REPORTING"]["ENABLE"]:
         send_invoice_report.delay()
@@ -118,19 +119,8 @@ def send_invoice_report(
             "year": date.year,
         },
     ).strip()
-    filename = "3M%02d%dWaldur.txt" % (date.month, date.year)
-    invoices = models.Invoice.objects.filter(
-        year=date.year, month=date.month, customer__archived=False
-    )
-
-    # Report should include only organizations that had accounting running during the invoice period.
-    if settings.WALDUR_CORE["ENABLE_ACCOUNTING_START_DATE"]:
-        invoices = invoices.filter(
-            customer__accounting_start_date__lte=core_utils.month_end(date)
-        )
-
-    # Report should not include customers with 0 invoice items.
-    invoices = [invoice for invoice in invoices if invoice.items.count() > 0]
+    filename = exporters.get_report_filename(date)
+    invoices = exporters.get_report_invoices(date)
     text_message = format_invoice_csv(invoices)
 
     # Please note that email body could be empty if there are no valid invoices
@@ -150,49 +140,7 @@ def send_invoice_report(
 
 
 def format_invoice_csv(invoices):
-    if not isinstance(invoices, list):
-        invoices = [invoices]
-
-    csv_params = settings.WALDUR_INVOICES["INVOICE_REPORTING"]["CSV_PARAMS"]
-
-    if settings.WALDUR_INVOICES["INVOICE_REPORTING"].get("USE_SAF"):
-        fields = serializers.SAFReportSerializer.Meta.fields
-        stream = StringIO()
-        writer = DictWriter(stream, fieldnames=fields, **csv_params)
-        writer.writeheader()
-
-        for invoice in invoices:
-            items = utils.filter_invoice_items(
-                invoice.items.order_by("project_name", "name")
-            )
-            serializer = serializers.SAFReportSerializer(items, many=True)
-            writer.writerows(serializer.data)
-        return stream.getvalue()
-    elif settings.WALDUR_INVOICES["INVOICE_REPORTING"].get("USE_SAP"):
-        fields = serializers.SAPReportSerializer.Meta.fields
-        stream = StringIO()
-        writer = DictWriter(stream, fieldnames=fields, **csv_params)
-        writer.writeheader()
-
-        for invoice in invoices:
-            items = utils.filter_invoice_items(
-                invoice.items.order_by("project_name", "name")
-            )
-            serializer = serializers.SAPReportSerializer(items, many=True)
-            writer.writerows(serializer.data)
-        return stream.getvalue()
-
-    fields = serializers.InvoiceItemReportSerializer.Meta.fields
-    stream = StringIO()
-    writer = DictWriter(stream, fieldnames=fields, **csv_params)
-    writer.writeheader()
-
-    for invoice in invoices:
-        items = utils.filter_invoice_items(invoice.items.all())
-        serializer = serializers.InvoiceItemReportSerializer(items, many=True)
-        writer.writerows(serializer.data)
-
-    return stream.getvalue()
+    return exporters.InvoiceReportExporter(invoices).to_string()
 
 
 @shared_task(name="invoices.update_invoices_total_cost")
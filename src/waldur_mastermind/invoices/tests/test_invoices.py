@@ -1,8 +1,10 @@
 import datetime
 from decimal import Decimal
+from unittest import mock
 
 from ddt import data, ddt
 from django.core import mail
+from django.core.cache import cache
 from django.test import override_settings
 from django.utils.translation import gettext_lazy as _
 from freezegun import freeze_time
@@ -14,7 +16,7 @@ from waldur_core.permissions.fixtures import CustomerRole
 from waldur_core.structure.tests import factories as structure_factories
 from waldur_core.structure.tests import fixtures as structure_fixtures
 from waldur_mastermind.common.mixins import UnitPriceMixin
-from waldur_mastermind.invoices import models, tasks
+from waldur_mastermind.invoices import models, tasks, utils
 from waldur_mastermind.invoices.tests import factories, fixtures
 from waldur_mastermind.marketplace import models as marketplace_models
 from waldur_mastermind.marketplace.tests import factories as marketplace_factories
@@ -481,3 +483,42 @@ class UpdateBackendIdTest(test.APITransactionTestCase):
         self.client.force_authenticate(getattr(self.fixture, user))
         response = self.client.post(self.url, {"backend_id": "backend_id"})
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class InvoiceHTMLCacheTest(test.APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.fixture = fixtures.InvoiceFixture()
+        self.invoice = self.fixture.invoice
+        self.item = self.fixture.invoice_item
+        self.invoice.state = models.Invoice.States.CREATED
+        self.invoice.save()
+
+    @mock.patch("waldur_mastermind.invoices.utils.render_to_string")
+    def test_html_of_created_invoice_is_rendered_once(self, render_to_string):
+        render_to_string.return_value = "invoice"
+        self.assertEqual(utils.create_invoice_html(self.invoice), "invoice")
+        self.assertEqual(utils.create_invoice_html(self.invoice), "invoice")
+        self.assertEqual(render_to_string.call_count, 1)
+
+    @mock.patch("waldur_mastermind.invoices.utils.render_to_string")
+    def test_html_of_pending_invoice_is_not_cached(self, render_to_string):
+        self.invoice.state = models.Invoice.States.PENDING
+        self.invoice.save()
+        utils.create_invoice_html(self.invoice)
+        utils.create_invoice_html(self.invoice)
+        self.assertEqual(render_to_string.call_count, 2)
+
+    def test_cached_html_is_invalidated_when_item_is_changed(self):
+        utils.create_invoice_html(self.invoice)
+        self.item.name = "Updated item name"
+        self.item.save()
+        self.assertIn("Updated item name", utils.create_invoice_html(self.invoice))
+
+    def test_cached_html_is_not_used_when_content_is_changed(self):
+        utils.create_invoice_html(self.invoice)
+        # Bulk update does not emit signals, so content hash is used instead.
+        models.InvoiceItem.objects.filter(id=self.item.id).update(
+            name="Updated item name"
+        )
+        self.assertIn("Updated item name", utils.create_invoice_html(self.invoice))
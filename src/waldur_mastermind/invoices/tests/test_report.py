@@ -1,12 +1,18 @@
 import datetime
 from unittest import mock
 
+from django.db import connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
 
 from waldur_core.core.tests.helpers import override_waldur_core_settings
-from waldur_mastermind.invoices import models, tasks
+from waldur_core.structure.tests import factories as structure_factories
+from waldur_mastermind.invoices import exporters, models, tasks
 from waldur_mastermind.invoices import utils as invoices_utils
 from waldur_mastermind.invoices.tasks import format_invoice_csv
 from waldur_mastermind.invoices.tests import factories, fixtures, utils
@@ -256,3 +262,88 @@ class MonthlyReportTaskTest(TransactionTestCase):
         ][0]
         self.assertEqual(customer_2_context["end_date_alarm"], False)
         self.assertEqual(customer_2_context["payments_alarm"], None)
+
+
+@freeze_time("2017-11-01")
+@utils.override_invoices_settings(INVOICE_REPORTING=INVOICE_REPORTING)
+class InvoiceReportExporterTest(BaseReportFormatterTest):
+    def setUp(self):
+        super().setUp()
+        self.invoice.year = 2017
+        self.invoice.month = 10
+        self.invoice.save()
+
+    def create_invoice(self):
+        fixture = fixtures.InvoiceFixture()
+        fixture.invoice.year = 2017
+        fixture.invoice.month = 10
+        fixture.invoice.save()
+        fixture.invoice_item
+        return fixture.invoice
+
+    def count_queries(self):
+        exporter = exporters.InvoiceReportExporter(
+            exporters.get_report_invoices(datetime.date(2017, 10, 1))
+        )
+        with CaptureQueriesContext(connection) as context:
+            lines = list(exporter.iter_lines())
+        return len(lines), len(context.captured_queries)
+
+    def test_number_of_queries_does_not_depend_on_number_of_invoices(self):
+        lines_count, queries_count = self.count_queries()
+        self.assertEqual(lines_count, 2)
+
+        self.create_invoice()
+        self.create_invoice()
+
+        lines_count, new_queries_count = self.count_queries()
+        self.assertEqual(lines_count, 4)
+        self.assertEqual(queries_count, new_queries_count)
+
+    def test_invoices_are_loaded_in_chunks(self):
+        self.create_invoice()
+        self.create_invoice()
+        exporter = exporters.InvoiceReportExporter(
+            exporters.get_report_invoices(datetime.date(2017, 10, 1))
+        )
+        exporter.chunk_size = 1
+
+        lines = exporter.iter_lines()
+        with CaptureQueriesContext(connection) as context:
+            # Header and first row are produced before the rest of invoices are loaded.
+            next(lines)
+            next(lines)
+        first_chunk_queries = len(context.captured_queries)
+
+        with CaptureQueriesContext(connection) as context:
+            rest = list(lines)
+        self.assertEqual(len(rest), 2)
+        self.assertGreater(len(context.captured_queries), first_chunk_queries)
+
+    def test_streamed_report_matches_report_sent_by_email(self):
+        self.create_invoice()
+        invoices = exporters.get_report_invoices(datetime.date(2017, 10, 1))
+        self.assertEqual(
+            "".join(exporters.InvoiceReportExporter(invoices).iter_lines()),
+            format_invoice_csv(invoices),
+        )
+
+    def test_staff_can_download_report(self):
+        staff = structure_factories.UserFactory(is_staff=True)
+        client = APIClient()
+        client.force_authenticate(staff)
+        response = client.get(
+            reverse("download-financial-report"), {"year": 2017, "month": 10}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("OFFERING-001", lines[1])
+
+    def test_other_users_can_not_download_report(self):
+        client = APIClient()
+        client.force_authenticate(self.fixture.owner)
+        response = client.get(
+            reverse("download-financial-report"), {"year": 2017, "month": 10}
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -34,4 +34,9 @@ urlpatterns = [
         views.send_financial_report_by_mail,
         name="send-financial-report-by-mail",
     ),
+    re_path(
+        r"^api/invoice/financial-report/",
+        views.download_financial_report,
+        name="download-financial-report",
+    ),
 ]
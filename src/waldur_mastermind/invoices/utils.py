@@ -1,15 +1,19 @@
 import base64
 import datetime
+import functools
+import hashlib
 import logging
+import os
 import re
 from calendar import monthrange
 from decimal import Decimal
 
 from constance import config
 from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Sum
 from django.template.loader import render_to_string
-from django.utils import timezone
+from django.utils import timezone, translation
 
 from waldur_core.core import utils as core_utils
 from waldur_mastermind.common.mixins import UnitPriceMixin
@@ -98,23 +102,108 @@ def filter_invoice_items(items):
     ]  # skip empty, but leave in credit and debit
 
 
+INVOICE_HTML_CACHE_TIMEOUT = 31 * 24 * 60 * 60
+
+
+@functools.lru_cache(maxsize=8)
+def encode_logo(logo_path, mtime):
+    # Modification time is part of the cache key so that replaced logo is encoded again.
+    with open(logo_path, "rb") as image_file:
+        return base64.b64encode(image_file.read()).decode("utf-8")
+
+
+def get_deployment_logo():
+    logo_path = config.SITE_LOGO
+    if not logo_path:
+        return None
+    return encode_logo(logo_path, os.path.getmtime(logo_path))
+
+
+def get_invoice_html_cache_key(invoice):
+    return f"invoice_html_{invoice.uuid.hex}"
+
+
+def get_invoice_html_digest(invoice, items):
+    """
+    Compute hash of all data rendered in invoice HTML,
+    so that cached HTML is not used when any of them is changed.
+    """
+    customer = invoice.customer
+    logo_path = config.SITE_LOGO
+    content = (
+        invoice.id,
+        invoice.state,
+        invoice.month,
+        invoice.year,
+        invoice.invoice_date,
+        invoice.tax_percent,
+        customer.name,
+        customer.email,
+        customer.address,
+        customer.postal,
+        customer.country,
+        customer.phone_number,
+        customer.bank_name,
+        customer.bank_account,
+        customer.vat_code,
+        settings.WALDUR_INVOICES["ISSUER_DETAILS"],
+        settings.WALDUR_INVOICES["PAYMENT_INTERVAL"],
+        config.CURRENCY_NAME,
+        logo_path,
+        logo_path and os.path.getmtime(logo_path),
+        translation.get_language(),
+        [
+            (
+                item.id,
+                item.name,
+                item.project_name,
+                item.quantity,
+                item.unit,
+                item.unit_price,
+                item.start,
+                item.end,
+            )
+            for item in items
+        ],
+    )
+    return hashlib.sha256(repr(content).encode("utf-8")).hexdigest()
+
+
 def create_invoice_html(invoice):
+    """
+    Render invoice HTML. Rendered HTML of created and paid invoices is cached,
+    because these invoices are not expected to change.
+    """
     all_items = filter_invoice_items(invoice.items.all())
-    logo_path = config.SITE_LOGO
-    if logo_path:
-        with open(logo_path, "rb") as image_file:
-            deployment_logo = base64.b64encode(image_file.read()).decode("utf-8")
-    else:
-        deployment_logo = None
+    is_immutable = invoice.state in (
+        models.Invoice.States.CREATED,
+        models.Invoice.States.PAID,
+    )
+
+    if is_immutable:
+        cache_key = get_invoice_html_cache_key(invoice)
+        digest = get_invoice_html_digest(invoice, all_items)
+        cached = cache.get(cache_key)
+        if cached and cached[0] == digest:
+            return cached[1]
 
     context = dict(
         invoice=invoice,
         issuer_details=settings.WALDUR_INVOICES["ISSUER_DETAILS"],
         currency=config.CURRENCY_NAME,
-        deployment_logo=deployment_logo,
+        deployment_logo=get_deployment_logo(),
         items=all_items,
     )
-    return render_to_string("invoices/invoice.html", context)
+    html = render_to_string("invoices/invoice.html", context)
+
+    if is_immutable:
+        cache.set(cache_key, (digest, html), INVOICE_HTML_CACHE_TIMEOUT)
+
+    return html
+
+
+def delete_invoice_html_cache(invoice):
+    cache.delete(get_invoice_html_cache_key(invoice))
 
 
 def get_price_per_day(price, unit):
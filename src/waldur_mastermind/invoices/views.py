@@ -5,6 +5,7 @@ import uuid
 from dateutil.relativedelta import relativedelta
 from django.db import transaction
 from django.db.models import F, Sum
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import exceptions, status
@@ -20,7 +21,7 @@ from waldur_core.structure.permissions import IsStaffOrSupportUser
 from waldur_mastermind.common.utils import quantize_price
 from waldur_mastermind.invoices.models import InvoiceItem
 
-from . import filters, log, models, serializers, tasks, utils
+from . import exporters, filters, log, models, serializers, tasks, utils
 
 
 class InvoiceViewSet(core_views.ReadOnlyActionsViewSet):
@@ -576,6 +577,22 @@ def send_financial_report_by_mail(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["GET"])
+@permission_classes((IsStaffOrSupportUser,))
+def download_financial_report(request):
+    serializer = serializers.FinancialReportSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    date = datetime.date(
+        serializer.validated_data["year"], serializer.validated_data["month"], 1
+    )
+    exporter = exporters.InvoiceReportExporter(exporters.get_report_invoices(date))
+    response = StreamingHttpResponse(exporter.iter_lines(), content_type="text/csv")
+    response["Content-Disposition"] = (
+        f'attachment; filename="{exporters.get_report_filename(date)}"'
+    )
+    return response
+
+
 class CustomerCreditViewSet(core_views.ActionsViewSet):
     lookup_field = "uuid"
     filter_backends = (
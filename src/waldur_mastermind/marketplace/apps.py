@@ -153,6 +153,12 @@ class MarketplaceConfig(AppConfig):
             dispatch_uid="waldur_mastermind.plan_component_has_been_updated",
         )
 
+        marketplace_signals.plan_component_prices_bulk_updated.connect(
+            handlers.plan_component_prices_have_been_bulk_updated,
+            sender=models.PlanComponent,
+            dispatch_uid="waldur_mastermind.plan_component_prices_have_been_bulk_updated",
+        )
+
         signals.post_save.connect(
             handlers.offering_component_has_been_created_or_updated,
             sender=models.OfferingComponent,
@@ -680,6 +680,24 @@ def plan_component_has_been_updated(sender, instance, created=False, **kwargs):
         )
 
 
+def plan_component_prices_have_been_bulk_updated(sender, components, **kwargs):
+    event_logger.marketplace_plan_component.process_many(
+        "info",
+        [
+            (
+                f"Current price of component {component.component.type} in plan {component.plan.name} has been updated.",
+                {
+                    "plan_component": component,
+                    "old_value": component.tracker.previous("price"),
+                    "new_value": component.price,
+                },
+            )
+            for component in components
+        ],
+        event_type="marketplace_plan_component_current_price_updated",
+    )
+
+
 def offering_component_has_been_created_or_updated(
     sender, instance, created=False, **kwargs
 ):
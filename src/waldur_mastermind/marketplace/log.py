@@ -295,6 +295,17 @@ def log_order_approved(order):
     )
 
 
+def log_orders_approved(orders):
+    event_logger.marketplace_order.process_many(
+        "info",
+        [
+            ("Marketplace order has been approved.", {"order": order})
+            for order in orders
+        ],
+        event_type="marketplace_order_approved",
+    )
+
+
 def log_order_rejected(order):
     event_logger.marketplace_order.info(
         "Marketplace order has been rejected.",
@@ -0,0 +1,49 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from waldur_core.core import utils as core_utils
+from waldur_mastermind.marketplace import tasks
+
+
+class Command(BaseCommand):
+    help = """
+    Calculate reported and fixed usage of category components
+    for all customers and projects for a specified year and month.
+    By default current month is used.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, help="Year, e.g. 2024")
+        parser.add_argument("--month", type=int, help="Month number, e.g. 1")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        year = options.get("year") or now.year
+        month = options.get("month") or now.month
+        if not 1 <= month <= 12:
+            self.stdout.write(self.style.ERROR("Month number is not valid."))
+            return
+
+        date = datetime.date(year=year, month=month, day=1)
+        start = core_utils.month_start(date)
+        end = core_utils.month_end(date)
+
+        started = time.perf_counter()
+        usages = tasks.aggregate_category_component_usage(start, end)
+        aggregated = time.perf_counter()
+        created, updated = tasks.save_category_component_usage(start, usages)
+        saved = time.perf_counter()
+
+        self.stdout.write(
+            f"Aggregated {len(usages)} usage records for {year}-{month:02} "
+            f"in {aggregated - started:.2f} seconds."
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} and updated {updated} records "
+                f"in {saved - aggregated:.2f} seconds."
+            )
+        )
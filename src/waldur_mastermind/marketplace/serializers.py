@@ -26,6 +26,7 @@ from waldur_core.core.fields import NaturalChoiceField
 from waldur_core.core.models import User, get_ssh_key_fingerprints
 from waldur_core.core.serializers import GenericRelatedField
 from waldur_core.core.validators import validate_ssh_public_key
+from waldur_core.media.serializers import ImagePresetURLField, MediaListSerializer
 from waldur_core.permissions.enums import PermissionEnum
 from waldur_core.permissions.models import UserRole
 from waldur_core.permissions.utils import count_users, get_permissions, has_permission
@@ -303,6 +304,7 @@ class CategorySerializer(
 
     class Meta:
         model = models.Category
+        list_serializer_class = MediaListSerializer
         fields = (
             "url",
             "uuid",
@@ -636,8 +638,11 @@ class NestedOfferingFileSerializer(serializers.ModelSerializer):
 class ScreenshotSerializer(
     core_serializers.AugmentedSerializerMixin, serializers.HyperlinkedModelSerializer
 ):
+    image_thumbnail_url = ImagePresetURLField(source="image", preset="thumbnail")
+
     class Meta:
         model = models.Screenshot
+        list_serializer_class = MediaListSerializer
         fields = (
             "url",
             "uuid",
@@ -645,6 +650,7 @@ class ScreenshotSerializer(
             "created",
             "description",
             "image",
+            "image_thumbnail_url",
             "thumbnail",
             "offering",
             "customer_uuid",
@@ -1057,9 +1063,11 @@ class ProviderOfferingDetailsSerializer(
     total_cost_estimated = serializers.ReadOnlyField()
     endpoints = NestedEndpointSerializer(many=True, read_only=True)
     roles = NestedRoleSerializer(many=True, read_only=True)
+    image_thumbnail_url = ImagePresetURLField(source="image", preset="thumbnail")
 
     class Meta:
         model = models.Offering
+        list_serializer_class = MediaListSerializer
         fields = (
             "url",
             "uuid",
@@ -1117,6 +1125,7 @@ class ProviderOfferingDetailsSerializer(
             "backend_id",
             "organization_groups",
             "image",
+            "image_thumbnail_url",
             "total_customers",
             "total_cost",
             "total_cost_estimated",
@@ -11,3 +11,6 @@ resource_creation_succeeded = Signal()
 
 # providing_args=['instance']
 resource_deletion_succeeded = Signal()
+
+# providing_args=['components']
+plan_component_prices_bulk_updated = Signal()
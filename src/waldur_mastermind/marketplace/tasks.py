@@ -11,13 +11,14 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
-from django.db.models import F, Q, Sum
+from django.db.models import Case, F, Q, Sum, Value, When
 from django.utils import timezone
 from rest_framework import status
 
 from waldur_core.core import models as core_models
 from waldur_core.core import utils as core_utils
 from waldur_core.logging import models as logging_models
+from waldur_core.permissions import models as permissions_models
 from waldur_core.permissions.enums import RoleEnum
 from waldur_core.structure import models as structure_models
 from waldur_core.structure.log import event_logger
@@ -31,7 +32,7 @@ from waldur_mastermind.marketplace.utils import (
 )
 from waldur_mastermind.support.backend import get_active_backend
 
-from . import exceptions, models, utils
+from . import exceptions, models, signals, utils
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +55,14 @@ def process_order(serialized_order, serialized_user):
     utils.process_order(order, user)
 
 
+@shared_task
+def process_orders(serialized_orders, serialized_user):
+    user = core_utils.deserialize_instance(serialized_user)
+    for serialized_order in serialized_orders:
+        order = core_utils.deserialize_instance(serialized_order)
+        utils.process_order(order, user)
+
+
 @shared_task
 def create_screenshot_thumbnail(uuid):
     screenshot = models.Screenshot.objects.get(uuid=uuid)
@@ -122,6 +131,12 @@ def notify_provider_about_pending_order(order_uuid):
     )
 
 
+@shared_task
+def notify_provider_about_pending_orders(order_uuids):
+    for order_uuid in order_uuids:
+        notify_provider_about_pending_order(order_uuid)
+
+
 @shared_task
 def notify_about_resource_change(event_type, context, resource_uuid):
     resource = models.Resource.objects.get(uuid=resource_uuid)
@@ -129,87 +144,125 @@ def notify_about_resource_change(event_type, context, resource_uuid):
     core_utils.broadcast_mail("marketplace", event_type, context, emails)
 
 
-def filter_aggregate_by_scope(queryset, scope):
-    scope_path = None
-
-    if isinstance(scope, structure_models.Project):
-        scope_path = "resource__project"
-
-    if isinstance(scope, structure_models.Customer):
-        scope_path = "resource__project__customer"
-
-    if scope_path:
-        queryset = queryset.filter(**{scope_path: scope})
-
-    return queryset
-
-
-def aggregate_reported_usage(start, end, scope):
-    queryset = models.ComponentUsage.objects.filter(
-        date__date__gte=start, date__date__lte=end
-    ).exclude(component__parent=None)
-
-    queryset = filter_aggregate_by_scope(queryset, scope)
-
-    queryset = queryset.values("component__parent_id").annotate(total=Sum("usage"))
-
-    return {row["component__parent_id"]: row["total"] for row in queryset}
+def aggregate_reported_usage(start, end):
+    return (
+        models.ComponentUsage.objects.filter(date__date__gte=start, date__date__lte=end)
+        .exclude(component__parent=None)
+        .values_list(
+            "resource__project_id",
+            "resource__project__customer_id",
+            "component__parent_id",
+        )
+        .annotate(total=Sum("usage"))
+    )
 
 
-def aggregate_fixed_usage(start, end, scope):
-    queryset = models.ResourcePlanPeriod.objects.filter(
-        # Resource has been active during billing period
-        Q(start__gte=start, end__lte=end)
-        | Q(end__isnull=True)  # Resource is still active
-        | Q(
-            end__gte=start, end__lte=end
-        )  # Resource has been launched in previous billing period and stopped in current
+def aggregate_fixed_usage(start, end):
+    return (
+        models.ResourcePlanPeriod.objects.filter(
+            # Resource has been active during billing period
+            Q(start__gte=start, end__lte=end)
+            | Q(end__isnull=True)  # Resource is still active
+            | Q(
+                end__gte=start, end__lte=end
+            )  # Resource has been launched in previous billing period and stopped in current
+        )
+        .values_list(
+            "resource__project_id",
+            "resource__project__customer_id",
+            "plan__components__component__parent_id",
+        )
+        .annotate(total=Sum("plan__components__amount"))
     )
-    queryset = filter_aggregate_by_scope(queryset, scope)
 
-    queryset = queryset.values("plan__components__component__parent_id").annotate(
-        total=Sum("plan__components__amount")
-    )
 
-    return {
-        row["plan__components__component__parent_id"]: row["total"] for row in queryset
+def aggregate_category_component_usage(start, end):
+    """
+    Compute reported and fixed usage of category components for all customers
+    and projects using one grouped query per usage kind.
+    Returns dict mapping (content_type_id, object_id, component_id) to usage values.
+    """
+    customer_type = ContentType.objects.get_for_model(structure_models.Customer)
+    project_type = ContentType.objects.get_for_model(structure_models.Project)
+    # Removed projects are skipped but their usage is still counted for customer.
+    project_ids = set(
+        structure_models.Project.available_objects.values_list("id", flat=True)
+    )
+    result = collections.defaultdict(dict)
+
+    for field, rows in (
+        ("reported_usage", aggregate_reported_usage(start, end)),
+        ("fixed_usage", aggregate_fixed_usage(start, end)),
+    ):
+        for project_id, customer_id, component_id, total in rows:
+            # It needs to cover a case when a key is None because OfferingComponent.parent can be None.
+            if component_id is None or total is None:
+                continue
+            keys = [(customer_type.id, customer_id, component_id)]
+            if project_id in project_ids:
+                keys.append((project_type.id, project_id, component_id))
+            for key in keys:
+                result[key][field] = result[key].get(field, 0) + total
+
+    return result
+
+
+def save_category_component_usage(date, usages, batch_size=1000):
+    existing_usages = {
+        (usage.content_type_id, usage.object_id, usage.component_id): usage
+        for usage in models.CategoryComponentUsage.objects.filter(date=date)
     }
-
-
-def calculate_usage_for_scope(start, end, scope):
-    reported_usage = aggregate_reported_usage(start, end, scope)
-    fixed_usage = aggregate_fixed_usage(start, end, scope)
-    # It needs to cover a case when a key is None because OfferingComponent.parent can be None.
-    fixed_usage.pop(None, None)
-    components = set(reported_usage.keys()) | set(fixed_usage.keys())
-    content_type = ContentType.objects.get_for_model(scope)
-
-    for component_id in components:
-        models.CategoryComponentUsage.objects.update_or_create(
-            content_type=content_type,
-            object_id=scope.id,
-            component_id=component_id,
-            date=start,
-            defaults={
-                "reported_usage": reported_usage.get(component_id),
-                "fixed_usage": fixed_usage.get(component_id),
-            },
+    new_usages = []
+    changed_usages = []
+
+    for key, values in usages.items():
+        content_type_id, object_id, component_id = key
+        reported_usage = values.get("reported_usage")
+        fixed_usage = values.get("fixed_usage")
+        reported_usage = (
+            reported_usage if reported_usage is None else int(reported_usage)
+        )
+        fixed_usage = fixed_usage if fixed_usage is None else int(fixed_usage)
+
+        usage = existing_usages.get(key)
+        if not usage:
+            new_usages.append(
+                models.CategoryComponentUsage(
+                    content_type_id=content_type_id,
+                    object_id=object_id,
+                    component_id=component_id,
+                    date=date,
+                    reported_usage=reported_usage,
+                    fixed_usage=fixed_usage,
+                )
+            )
+        elif (usage.reported_usage, usage.fixed_usage) != (reported_usage, fixed_usage):
+            usage.reported_usage = reported_usage
+            usage.fixed_usage = fixed_usage
+            changed_usages.append(usage)
+
+    with transaction.atomic():
+        models.CategoryComponentUsage.objects.bulk_create(
+            new_usages, batch_size=batch_size
+        )
+        models.CategoryComponentUsage.objects.bulk_update(
+            changed_usages, ["reported_usage", "fixed_usage"], batch_size=batch_size
         )
 
+    return len(new_usages), len(changed_usages)
+
 
 @shared_task(name="waldur_mastermind.marketplace.calculate_usage_for_current_month")
 def calculate_usage_for_current_month():
     start = invoice_utils.get_current_month_start()
     end = invoice_utils.get_current_month_end()
-    scopes = []
-
-    for customer in structure_models.Customer.objects.all():
-        scopes.append(customer)
-        for project in customer.projects.all():
-            scopes.append(project)
-
-    for scope in scopes:
-        calculate_usage_for_scope(start, end, scope)
+    usages = aggregate_category_component_usage(start, end)
+    created, updated = save_category_component_usage(start, usages)
+    logger.info(
+        "Category component usage has been calculated. Created: %s, updated: %s.",
+        created,
+        updated,
+    )
 
 
 @shared_task
@@ -268,33 +321,57 @@ def notify_about_stale_resource():
     today = datetime.datetime.today()
     prev_1 = today - relativedelta(months=1)
     prev_2 = today - relativedelta(months=2)
-    items = invoices_models.InvoiceItem.objects.filter(
-        Q(
-            invoice__month=today.month,
-            invoice__year=today.year,
+    # Price of invoice item is rounded up, so it is not zero
+    # if and only if both unit price and quantity are not zero.
+    billed_resources = (
+        invoices_models.InvoiceItem.objects.filter(
+            Q(
+                invoice__month=today.month,
+                invoice__year=today.year,
+            )
+            | Q(invoice__month=prev_1.month, invoice__year=prev_1.year)
+            | Q(invoice__month=prev_2.month, invoice__year=prev_2.year),
+            resource__isnull=False,
         )
-        | Q(invoice__month=prev_1.month, invoice__year=prev_1.year)
-        | Q(invoice__month=prev_2.month, invoice__year=prev_2.year)
+        .exclude(unit_price=0)
+        .exclude(quantity=0)
+        .values("resource_id")
     )
-    actual_resources_ids = []
-
-    for item in items:
-        if item.price:
-            actual_resources_ids.append(item.resource.id)
 
     resources = (
-        models.Resource.objects.exclude(id__in=actual_resources_ids)
+        models.Resource.objects.exclude(id__in=billed_resources)
         .exclude(
             Q(state=models.Resource.States.TERMINATED)
             | Q(state=models.Resource.States.TERMINATING)
             | Q(state=models.Resource.States.CREATING)
         )
         .exclude(offering__billable=False)
+        .select_related("project")
     )
+    resources = list(resources)
+    if not resources:
+        return
+
+    customer_mails = collections.defaultdict(set)
+    for customer_id, email in (
+        permissions_models.UserRole.objects.filter(
+            is_active=True,
+            content_type=ContentType.objects.get_for_model(structure_models.Customer),
+            object_id__in={resource.project.customer_id for resource in resources},
+            role__name=RoleEnum.CUSTOMER_OWNER,
+        )
+        .exclude(user__email="")
+        .exclude(user__notifications_enabled=False)
+        .values_list("object_id", "user__email")
+    ):
+        customer_mails[customer_id].add(email)
+
     user_resources = collections.defaultdict(list)
 
     for resource in resources:
-        mails = resource.project.customer.get_owner_mails()
+        mails = customer_mails.get(resource.project.customer_id)
+        if not mails:
+            continue
         resource_url = core_utils.format_homeport_link(
             "resource-details/{resource_uuid}/",
             project_uuid=resource.project.uuid.hex,
@@ -370,80 +447,135 @@ def notify_about_resource_termination(resource_uuid, user_uuid, is_staff_action=
         )
 
 
+def get_notified_user_roles(*scope_filters):
+    """
+    Return active roles of users which have email and have not disabled notifications.
+    Each filter is a Q object matching roles in particular scopes.
+    """
+    query = Q()
+    for scope_filter in scope_filters:
+        query |= scope_filter
+    return (
+        permissions_models.UserRole.objects.filter(query, is_active=True)
+        .exclude(user__email="")
+        .exclude(user__notifications_enabled=False)
+        .select_related("user")
+    )
+
+
+def send_ending_digest(event_type, key, user_items):
+    """
+    Send one email per user listing all ending objects.
+    For compatibility with single-object templates, first item is exposed in context too.
+    """
+    contexts = {}
+    for user, items in user_items.items():
+        items = sorted(items, key=lambda item: (item["delta"], item[key].name))
+        contexts[user.email] = {
+            "user": user,
+            key + "s": items,
+            **items[0],
+        }
+    core_utils.broadcast_personal_mail("marketplace", event_type, contexts)
+
+
 @shared_task(name="waldur_mastermind.marketplace.notification_about_project_ending")
 def notification_about_project_ending():
-    date_1 = timezone.datetime.today().date() + datetime.timedelta(days=1)
-    date_7 = timezone.datetime.today().date() + datetime.timedelta(days=7)
-    expired_projects = structure_models.Project.available_objects.exclude(
-        end_date__isnull=True
-    ).filter(Q(end_date=date_1) | Q(end_date=date_7))
+    today = timezone.datetime.today().date()
+    date_1 = today + datetime.timedelta(days=1)
+    date_7 = today + datetime.timedelta(days=7)
+    expired_projects = list(
+        structure_models.Project.available_objects.exclude(
+            end_date__isnull=True
+        ).filter(Q(end_date=date_1) | Q(end_date=date_7))
+    )
+    if not expired_projects:
+        return
 
+    customer_projects = collections.defaultdict(list)
     for project in expired_projects:
-        managers = (
-            project.get_users(structure_models.ProjectRole.MANAGER)
-            .exclude(email="")
-            .exclude(notifications_enabled=False)
-        )
-        owners = (
-            project.customer.get_users(RoleEnum.CUSTOMER_OWNER)
-            .exclude(email="")
-            .exclude(notifications_enabled=False)
-        )
-        users = set(managers) | set(owners)
+        customer_projects[project.customer_id].append(project)
+    projects_map = {project.id: project for project in expired_projects}
 
-        project_url = core_utils.format_homeport_link(
-            "projects/{project_uuid}/",
-            project_uuid=project.uuid.hex,
-        )
+    project_type = ContentType.objects.get_for_model(structure_models.Project)
+    customer_type = ContentType.objects.get_for_model(structure_models.Customer)
+    roles = get_notified_user_roles(
+        Q(
+            content_type=project_type,
+            object_id__in=projects_map.keys(),
+            role__name=RoleEnum.PROJECT_MANAGER,
+        ),
+        Q(
+            content_type=customer_type,
+            object_id__in=customer_projects.keys(),
+            role__name=RoleEnum.CUSTOMER_OWNER,
+        ),
+    )
 
-        for user in users:
-            context = {
-                "project_url": project_url,
+    user_projects = collections.defaultdict(dict)
+    for role in roles:
+        if role.content_type_id == project_type.id:
+            projects = [projects_map[role.object_id]]
+        else:
+            projects = customer_projects[role.object_id]
+        for project in projects:
+            user_projects[role.user][project.id] = {
+                "project_url": core_utils.format_homeport_link(
+                    "projects/{project_uuid}/",
+                    project_uuid=project.uuid.hex,
+                ),
                 "project": project,
-                "user": user,
-                "delta": (project.end_date - timezone.datetime.today().date()).days,
+                "delta": (project.end_date - today).days,
             }
-            core_utils.broadcast_mail(
-                "marketplace",
-                "notification_about_project_ending",
-                context,
-                [user.email],
-            )
+
+    send_ending_digest(
+        "notification_about_project_ending",
+        "project",
+        {user: items.values() for user, items in user_projects.items()},
+    )
 
 
 @shared_task(name="waldur_mastermind.marketplace.notification_about_resource_ending")
 def notification_about_resource_ending():
-    date_1 = timezone.datetime.today().date() + datetime.timedelta(days=1)
-    date_7 = timezone.datetime.today().date() + datetime.timedelta(days=7)
-    expired_resources = marketplace_models.Resource.objects.exclude(
-        end_date__isnull=True
-    ).filter(Q(end_date=date_1) | Q(end_date=date_7))
+    today = timezone.datetime.today().date()
+    date_1 = today + datetime.timedelta(days=1)
+    date_7 = today + datetime.timedelta(days=7)
+    expired_resources = list(
+        marketplace_models.Resource.objects.exclude(end_date__isnull=True).filter(
+            Q(end_date=date_1) | Q(end_date=date_7)
+        )
+    )
+    if not expired_resources:
+        return
 
+    project_resources = collections.defaultdict(list)
     for resource in expired_resources:
-        users = (
-            resource.project.get_users()
-            .exclude(email="")
-            .exclude(notifications_enabled=False)
-        )
+        project_resources[resource.project_id].append(resource)
 
-        resource_url = core_utils.format_homeport_link(
-            "resource-details/{resource_uuid}/",
-            resource_uuid=resource.uuid.hex,
+    roles = get_notified_user_roles(
+        Q(
+            content_type=ContentType.objects.get_for_model(structure_models.Project),
+            object_id__in=project_resources.keys(),
         )
+    )
 
-        for user in users:
-            context = {
-                "resource_url": resource_url,
+    user_resources = collections.defaultdict(dict)
+    for role in roles:
+        for resource in project_resources[role.object_id]:
+            user_resources[role.user][resource.id] = {
+                "resource_url": core_utils.format_homeport_link(
+                    "resource-details/{resource_uuid}/",
+                    resource_uuid=resource.uuid.hex,
+                ),
                 "resource": resource,
-                "user": user,
-                "delta": (resource.end_date - timezone.datetime.today().date()).days,
+                "delta": (resource.end_date - today).days,
             }
-            core_utils.broadcast_mail(
-                "marketplace",
-                "notification_about_resource_ending",
-                context,
-                [user.email],
-            )
+
+    send_ending_digest(
+        "notification_about_resource_ending",
+        "resource",
+        {user: items.values() for user, items in user_resources.items()},
+    )
 
 
 @shared_task(name="waldur_mastermind.marketplace.send_metrics")
@@ -502,33 +634,119 @@ def send_metrics():
 
 
 def copy_future_price_to_current_price():
-    for component in models.PlanComponent.objects.exclude(
-        future_price=F("price")
-    ).exclude(future_price__isnull=True):
-        component.price = component.future_price
-        component.save(update_fields=["price"])
+    components = list(
+        models.PlanComponent.objects.exclude(future_price=F("price"))
+        .exclude(future_price__isnull=True)
+        .select_related("component", "plan__offering__customer")
+    )
+    if not components:
+        return
+
+    with transaction.atomic():
+        models.PlanComponent.objects.filter(
+            id__in=[component.id for component in components]
+        ).update(price=F("future_price"))
+        for component in components:
+            component.price = component.future_price
+        signals.plan_component_prices_bulk_updated.send(
+            sender=models.PlanComponent, components=components
+        )
 
 
 @shared_task(name="waldur_mastermind.marketplace.process_pending_project_orders")
 def process_pending_project_orders():
-    active_project_ids = structure_models.Project.objects.filter(
-        start_date__lte=timezone.now()
-    ).values_list("id", flat=True)
-    orders = models.Order.objects.filter(
-        state=models.Order.States.PENDING_PROJECT, project__in=active_project_ids
+    from waldur_mastermind.marketplace import log
+    from waldur_mastermind.marketplace_remote import (
+        tasks as marketplace_remote_tasks,
     )
-    for order in orders:
-        # Setting the state to PENDING_PROVIDER because direct transition
-        # from PENDING_PROJECT to EXECUTING is not supported
-        order.state = models.Order.States.PENDING_PROVIDER
-        order.save(update_fields=["state"])
-        if utils.order_should_not_be_reviewed_by_provider(order):
-            order.set_state_executing()
-            order.save(update_fields=["state"])
+
+    States = models.Order.States
+    with transaction.atomic():
+        orders = list(
+            models.Order.objects.filter(
+                state=States.PENDING_PROJECT,
+                project__start_date__lte=timezone.now(),
+            )
+            .select_related(
+                "offering__customer",
+                "created_by",
+                "consumer_reviewed_by",
+                "project__customer",
+                "resource",
+            )
+            .select_for_update(of=("self",))
+        )
+        if not orders:
+            return
+
+        executing_orders = []
+        pending_orders = []
+        for order in orders:
+            if utils.order_should_not_be_reviewed_by_provider(order):
+                executing_orders.append(order)
+            else:
+                pending_orders.append(order)
+
+        # Orders which do not need provider review are moved directly to executing state,
+        # because the intermediate pending provider state does not have side effects.
+        # Modification time is updated explicitly as save() would do it, because
+        # timeouts of executing orders are counted from it.
+        now = timezone.now()
+        models.Order.objects.filter(
+            id__in=[order.id for order in orders], state=States.PENDING_PROJECT
+        ).update(
+            state=Case(
+                When(
+                    id__in=[order.id for order in executing_orders],
+                    then=Value(States.EXECUTING),
+                ),
+                default=Value(States.PENDING_PROVIDER),
+            ),
+            modified=now,
+        )
+        for order in executing_orders:
+            order.state = States.EXECUTING
+            order.modified = now
+        for order in pending_orders:
+            order.state = States.PENDING_PROVIDER
+            order.modified = now
+        log.log_orders_approved(executing_orders)
+
+        # Bulk update does not send post_save signal, so callbacks
+        # of state change are triggered explicitly.
+        for order in orders:
+            if order.callback_url:
+                serialized_order = core_utils.serialize_instance(order)
+                transaction.on_commit(
+                    lambda serialized_order=serialized_order: (
+                        marketplace_remote_tasks.trigger_order_callback.delay(
+                            serialized_order
+                        )
+                    )
+                )
+
+        # One task is dispatched for orders of the same offering and user.
+        groups = collections.defaultdict(list)
+        for order in executing_orders:
+            groups[(order.offering_id, order.created_by_id)].append(order)
+        for group in groups.values():
+            serialized_orders = [
+                core_utils.serialize_instance(order) for order in group
+            ]
+            serialized_user = core_utils.serialize_instance(group[0].created_by)
             transaction.on_commit(
-                lambda: process_order_on_commit.delay(order, order.created_by)
+                lambda serialized_orders=serialized_orders,
+                serialized_user=serialized_user: (
+                    process_orders.delay(serialized_orders, serialized_user)
+                )
             )
-        else:
+
+        pending_groups = collections.defaultdict(list)
+        for order in pending_orders:
+            pending_groups[order.offering_id].append(order.uuid.hex)
+        for order_uuids in pending_groups.values():
             transaction.on_commit(
-                lambda: notify_provider_about_pending_order.delay(order.uuid)
+                lambda order_uuids=order_uuids: (
+                    notify_provider_about_pending_orders.delay(order_uuids)
+                )
             )
@@ -2,11 +2,15 @@ import datetime
 from unittest.mock import patch
 
 from django.core import mail
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from freezegun import freeze_time
 from rest_framework import test
 
 from waldur_core.core import utils as core_utils
+from waldur_core.logging import models as logging_models
 from waldur_core.permissions.fixtures import ProjectRole
 from waldur_core.structure.tests import factories as structure_factories
 from waldur_core.structure.tests import fixtures as structure_fixtures
@@ -52,6 +56,20 @@ class CalculateUsageForCurrentMonthTest(test.APITransactionTestCase):
         tasks.calculate_usage_for_current_month()
         self.assertEqual(models.CategoryComponentUsage.objects.count(), 0)
 
+    def test_existing_usage_is_updated(self):
+        tasks.calculate_usage_for_current_month()
+        models.ComponentUsage.objects.update(usage=20)
+        tasks.calculate_usage_for_current_month()
+        self.assertEqual(models.CategoryComponentUsage.objects.count(), 2)
+        self.assertEqual(
+            set(
+                models.CategoryComponentUsage.objects.values_list(
+                    "reported_usage", flat=True
+                )
+            ),
+            {20},
+        )
+
 
 class NotificationTest(test.APITransactionTestCase):
     def test_notify_about_resource_change(self):
@@ -212,6 +230,47 @@ class ProjectEndDate(test.APITransactionTestCase):
                 {self.fixture.manager.email, self.fixture.owner.email},
             )
 
+    def test_owner_receives_one_email_for_all_ending_projects(self):
+        other_project = structure_factories.ProjectFactory(
+            customer=self.fixture.customer, end_date=self.fixture.project.end_date
+        )
+
+        with freeze_time("2019-12-25"):
+            event_type = "notification_about_project_ending"
+            structure_factories.NotificationFactory(key=f"marketplace.{event_type}")
+            tasks.notification_about_project_ending()
+
+            self.assertEqual(len(mail.outbox), 2)
+            owner_mail = [
+                message
+                for message in mail.outbox
+                if message.to == [self.fixture.owner.email]
+            ][0]
+            self.assertEqual(owner_mail.subject, "2 projects will be deleted.")
+            self.assertTrue(self.fixture.project.uuid.hex in owner_mail.body)
+            self.assertTrue(other_project.uuid.hex in owner_mail.body)
+
+    def test_number_of_queries_does_not_depend_on_number_of_projects(self):
+        structure_factories.NotificationFactory(
+            key="marketplace.notification_about_project_ending"
+        )
+
+        with freeze_time("2019-12-25"):
+            with CaptureQueriesContext(connection) as context:
+                tasks.notification_about_project_ending()
+            expected_queries = len(context.captured_queries)
+
+            for _ in range(5):
+                project = structure_factories.ProjectFactory(
+                    customer=self.fixture.customer,
+                    end_date=self.fixture.project.end_date,
+                )
+                project.add_user(self.fixture.manager, ProjectRole.MANAGER)
+
+            with CaptureQueriesContext(connection) as context:
+                tasks.notification_about_project_ending()
+            self.assertEqual(len(context.captured_queries), expected_queries)
+
     @freeze_time("2020-01-02")
     def test_expired_project_is_deleted_if_there_are_no_active_resources(self):
         self.fixture.resource.set_state_terminated()
@@ -294,6 +353,34 @@ class NotificationAboutStaleResourceTest(test.APITransactionTestCase):
         tasks.notify_about_stale_resource()
         self.assertEqual(len(mail.outbox), 0)
 
+    def test_number_of_queries_does_not_depend_on_number_of_invoice_items(self):
+        structure_factories.NotificationFactory(
+            key="marketplace.notification_about_stale_resources"
+        )
+        item = invoices_factories.InvoiceItemFactory(
+            resource=self.resource, unit_price=0, quantity=10
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            tasks.notify_about_stale_resource()
+        expected_queries = len(context.captured_queries)
+
+        invoices_models.InvoiceItem.objects.bulk_create(
+            invoices_models.InvoiceItem(
+                invoice=item.invoice,
+                project=item.project,
+                resource=self.resource,
+                unit_price=0,
+                quantity=10,
+            )
+            for _ in range(100)
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            tasks.notify_about_stale_resource()
+        self.assertEqual(len(context.captured_queries), expected_queries)
+        self.assertEqual(len(mail.outbox), 2)
+
 
 class ResourceEndDate(test.APITransactionTestCase):
     def setUp(self):
@@ -367,3 +454,182 @@ class ResourceEndDate(test.APITransactionTestCase):
             subject = "Resource %s will be deleted." % self.resource.name
             self.assertEqual(mail.outbox[0].subject, subject)
             self.assertTrue(self.resource.uuid.hex in mail.outbox[0].body)
+
+    def test_user_receives_one_email_for_all_ending_resources(self):
+        self.fixtures.manager
+        other_resource = factories.ResourceFactory(
+            project=self.fixtures.project, end_date=self.resource.end_date
+        )
+
+        with freeze_time("2019-12-25"):
+            event_type = "notification_about_resource_ending"
+            structure_factories.NotificationFactory(key=f"marketplace.{event_type}")
+            tasks.notification_about_resource_ending()
+
+            self.assertEqual(len(mail.outbox), 1)
+            self.assertEqual(mail.outbox[0].subject, "2 resources will be deleted.")
+            self.assertTrue(self.resource.uuid.hex in mail.outbox[0].body)
+            self.assertTrue(other_resource.uuid.hex in mail.outbox[0].body)
+
+
+class CopyFuturePriceToCurrentPriceTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.changed_components = [
+            factories.PlanComponentFactory(price=10, future_price=price)
+            for price in (5, 15, 0)
+        ]
+        self.unchanged_component = factories.PlanComponentFactory(
+            price=10, future_price=10
+        )
+        self.component_without_future_price = factories.PlanComponentFactory(
+            price=10, future_price=None
+        )
+        self.event_type = "marketplace_plan_component_current_price_updated"
+
+    def copy_prices_per_row(self):
+        for component in models.PlanComponent.objects.exclude(
+            future_price=F("price")
+        ).exclude(future_price__isnull=True):
+            component.price = component.future_price
+            component.save(update_fields=["price"])
+
+    def get_results(self):
+        prices = dict(models.PlanComponent.objects.values_list("id", "price"))
+        events = sorted(
+            (event.message, event.context["old_value"], event.context["new_value"])
+            for event in logging_models.Event.objects.filter(event_type=self.event_type)
+        )
+        feeds = logging_models.Feed.objects.filter(
+            event__event_type=self.event_type
+        ).count()
+        return prices, events, feeds
+
+    def test_bulk_update_matches_per_row_update(self):
+        self.copy_prices_per_row()
+        expected = self.get_results()
+
+        models.PlanComponent.objects.update(price=10)
+        logging_models.Event.objects.filter(event_type=self.event_type).delete()
+
+        tasks.copy_future_price_to_current_price()
+        self.assertEqual(self.get_results(), expected)
+        self.assertEqual(len(expected[1]), len(self.changed_components))
+
+
+class ProcessPendingProjectOrdersTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.MarketplaceFixture()
+        self.project = self.fixture.project
+        self.project.start_date = timezone.now().date()
+        self.project.save()
+        self.user = structure_factories.UserFactory()
+
+    def create_order(self, offering, project=None):
+        return factories.OrderFactory(
+            project=project or self.project,
+            offering=offering,
+            created_by=self.user,
+            state=models.Order.States.PENDING_PROJECT,
+        )
+
+    @patch("waldur_mastermind.marketplace.tasks.notify_provider_about_pending_orders")
+    @patch("waldur_mastermind.marketplace.tasks.process_orders")
+    def test_orders_are_processed_in_groups(self, process_orders_mock, notify_mock):
+        offering = factories.OfferingFactory(type="Test.Type")
+        other_offering = factories.OfferingFactory(type="Test.Type")
+        basic_offering = factories.OfferingFactory()
+        executing_orders = [
+            self.create_order(offering),
+            self.create_order(offering),
+            self.create_order(other_offering),
+        ]
+        pending_orders = [
+            self.create_order(basic_offering),
+            self.create_order(basic_offering),
+        ]
+
+        tasks.process_pending_project_orders()
+
+        for order in executing_orders:
+            order.refresh_from_db()
+            self.assertEqual(order.state, models.Order.States.EXECUTING)
+        for order in pending_orders:
+            order.refresh_from_db()
+            self.assertEqual(order.state, models.Order.States.PENDING_PROVIDER)
+
+        self.assertEqual(process_orders_mock.delay.call_count, 2)
+        self.assertEqual(
+            sorted(
+                len(call.args[0]) for call in process_orders_mock.delay.call_args_list
+            ),
+            [1, 2],
+        )
+        notify_mock.delay.assert_called_once()
+        self.assertEqual(
+            sorted(notify_mock.delay.call_args.args[0]),
+            sorted(order.uuid.hex for order in pending_orders),
+        )
+        self.assertEqual(
+            logging_models.Event.objects.filter(
+                event_type="marketplace_order_approved"
+            ).count(),
+            3,
+        )
+
+    @patch("waldur_mastermind.marketplace_remote.tasks.trigger_order_callback")
+    @patch("waldur_mastermind.marketplace.tasks.notify_provider_about_pending_orders")
+    @patch("waldur_mastermind.marketplace.tasks.process_orders")
+    def test_callback_is_triggered_for_orders_with_callback_url(
+        self, process_orders_mock, notify_mock, callback_mock
+    ):
+        offering = factories.OfferingFactory(type="Test.Type")
+        order = self.create_order(offering)
+        order.callback_url = "https://example.com/callback/"
+        order.save()
+        self.create_order(offering)
+
+        tasks.process_pending_project_orders()
+
+        callback_mock.delay.assert_called_once_with(
+            core_utils.serialize_instance(order)
+        )
+
+    @patch("waldur_mastermind.marketplace.tasks.notify_provider_about_pending_orders")
+    @patch("waldur_mastermind.marketplace.tasks.process_orders")
+    def test_modification_time_of_approved_orders_is_updated(
+        self, process_orders_mock, notify_mock
+    ):
+        self.project.start_date = datetime.date(2024, 1, 1)
+        self.project.save()
+        with freeze_time("2024-01-01"):
+            executing_order = self.create_order(
+                factories.OfferingFactory(type="Test.Type")
+            )
+            pending_order = self.create_order(factories.OfferingFactory())
+
+        with freeze_time("2024-02-01"):
+            tasks.process_pending_project_orders()
+
+        for order in (executing_order, pending_order):
+            order.refresh_from_db()
+            self.assertEqual(
+                order.modified,
+                datetime.datetime(2024, 2, 1, tzinfo=datetime.UTC),
+            )
+
+    @patch("waldur_mastermind.marketplace.tasks.process_orders")
+    def test_orders_of_projects_which_have_not_started_are_skipped(
+        self, process_orders_mock
+    ):
+        project = structure_factories.ProjectFactory(
+            start_date=timezone.now().date() + datetime.timedelta(days=1)
+        )
+        order = self.create_order(
+            factories.OfferingFactory(type="Test.Type"), project=project
+        )
+
+        tasks.process_pending_project_orders()
+
+        order.refresh_from_db()
+        self.assertEqual(order.state, models.Order.States.PENDING_PROJECT)
+        self.assertEqual(process_orders_mock.delay.call_count, 0)
@@ -85,8 +85,10 @@ def get_order_processor(order):
         return plugins.manager.get_processor(offering.type, "delete_resource_processor")
 
 
-def process_order(order: models.Order, user):
-    processor = get_order_processor(order)
+def process_order(order: models.Order, user, processor=None):
+    if not processor:
+        processor_class = get_order_processor(order)
+        processor = processor_class and processor_class(order)
     if not processor:
         order.error_message = (
             "Skipping order processing because processor is not found."
@@ -98,7 +100,7 @@ def process_order(order: models.Order, user):
         return
 
     try:
-        processor(order).process_order(user)
+        processor.process_order(user)
     except Exception as e:
         # Here it is necessary to catch all exceptions.
         # If this is not done, then the order will remain in the executed status.
@@ -1,12 +1,14 @@
 import collections
 import logging
 from datetime import datetime, timedelta
+from decimal import Decimal
 
 import requests
 from celery.app import shared_task
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import signals
 from django.utils import dateparse, timezone
 from rest_framework import exceptions as rf_exceptions
 from waldur_client import WaldurClient, WaldurClientException
@@ -22,13 +24,13 @@ from waldur_core.core.utils import (
 from waldur_core.structure import models as structure_models
 from waldur_core.structure.exceptions import ServiceBackendError
 from waldur_core.structure.tasks import BackgroundListPullTask, BackgroundPullTask
-from waldur_mastermind.common.utils import parse_datetime
+from waldur_mastermind.common.utils import parse_date, parse_datetime
 from waldur_mastermind.invoices import models as invoice_models
+from waldur_mastermind.invoices import signals as invoice_signals
 from waldur_mastermind.invoices.registrators import RegistrationManager
 from waldur_mastermind.invoices.utils import get_previous_month
 from waldur_mastermind.marketplace import models
 from waldur_mastermind.marketplace.callbacks import sync_order_state
-from waldur_mastermind.marketplace.utils import get_plan_period
 from waldur_mastermind.marketplace_remote import models as remote_models
 from waldur_mastermind.marketplace_remote.constants import (
     OFFERING_COMPONENT_FIELDS,
@@ -354,25 +356,36 @@ def pull_offering_resources(serialized_offering):
         ResourcePullTask().delay(serialize_instance(resource))
 
 
+def sync_order(local_order, remote_order):
+    if remote_order["state"] != local_order.get_state_display():
+        new_state = OrderInvertStates[remote_order["state"]]
+        sync_order_state(local_order, new_state)
+
+    local_resource = local_order.resource
+
+    backend_id = remote_order.get("marketplace_resource_uuid")
+    if backend_id and local_resource.backend_id != backend_id:
+        local_resource.backend_id = backend_id
+        local_resource.save(update_fields=["backend_id"])
+
+    pull_fields(("error_message",), local_order, remote_order)
+
+
+def get_pending_orders():
+    return (
+        models.Order.objects.filter(offering__type=PLUGIN_NAME)
+        .exclude(state__in=models.Order.States.TERMINAL_STATES)
+        .exclude(backend_id="")
+    )
+
+
 class OrderPullTask(BackgroundPullTask):
     def pull(self, local_order):
         if not local_order.backend_id:
             return
         client = get_client_for_offering(local_order.offering)
         remote_order = client.get_order(local_order.backend_id)
-
-        if remote_order["state"] != local_order.get_state_display():
-            new_state = OrderInvertStates[remote_order["state"]]
-            sync_order_state(local_order, new_state)
-
-        local_resource = local_order.resource
-
-        backend_id = remote_order.get("marketplace_resource_uuid")
-        if backend_id and local_resource.backend_id != backend_id:
-            local_resource.backend_id = backend_id
-            local_resource.save(update_fields=["backend_id"])
-
-        pull_fields(("error_message",), local_order, remote_order)
+        sync_order(local_order, remote_order)
 
     def set_instance_erred(self, instance: models.Order, error_message):
         """Mark order as erred and save error message"""
@@ -389,15 +402,66 @@ class OrderStatePullTask(OrderPullTask):
             self.retry()
 
 
+class OfferingBatchPullTask(BackgroundPullTask):
+    """
+    Pull remote data for all resources of the offering at once.
+    Single client is used and remote objects are fetched using
+    offering-level list queries instead of per-resource requests.
+    """
+
+    def on_pull_fail(self, instance, error):
+        logger.error(
+            f"Failed to pull data for offering {instance} (PK: {instance.pk}). Error: {error}",
+            exc_info=True,
+        )
+
+    def on_pull_success(self, instance):
+        pass
+
+
+class OfferingOrdersPullTask(OfferingBatchPullTask):
+    def pull(self, local_offering: models.Offering):
+        local_orders = list(
+            get_pending_orders()
+            .filter(offering=local_offering)
+            .select_related("resource")
+        )
+        if not local_orders:
+            return
+        client = get_client_for_offering(local_offering)
+        # Remote order is created after the local one, so local creation time
+        # with a safety margin for clock skew is used as a lower bound.
+        created_after = min(order.created for order in local_orders) - timedelta(days=1)
+        remote_orders = client.list_orders(
+            {
+                "offering_uuid": local_offering.backend_id,
+                "created": created_after.isoformat(),
+            }
+        )
+        remote_orders_map = {order["uuid"]: order for order in remote_orders}
+        for local_order in local_orders:
+            # Failure of a single order should not prevent others from being pulled.
+            try:
+                remote_order = remote_orders_map.get(local_order.backend_id)
+                if not remote_order:
+                    remote_order = client.get_order(local_order.backend_id)
+                sync_order(local_order, remote_order)
+            except Exception as e:
+                logger.exception(
+                    "Failed to pull order %s (PK: %s).", local_order, local_order.pk
+                )
+                local_order.set_state_erred()
+                local_order.error_message = str(e)
+                local_order.save(update_fields=["state", "error_message"])
+
+
 class OrderListPullTask(BackgroundListPullTask):
     name = "waldur_mastermind.marketplace_remote.pull_orders"
-    pull_task = OrderPullTask
+    pull_task = OfferingOrdersPullTask
 
     def get_pulled_objects(self):
-        return (
-            models.Order.objects.filter(offering__type=PLUGIN_NAME)
-            .exclude(state__in=models.Order.States.TERMINAL_STATES)
-            .exclude(backend_id="")
+        return models.Offering.objects.filter(
+            pk__in=get_pending_orders().values("offering_id")
         )
 
 
@@ -465,13 +529,159 @@ class ErredOrderListPullTask(BackgroundListPullTask):
 @shared_task
 def pull_offering_orders(serialized_offering):
     offering = deserialize_instance(serialized_offering)
-    orders = (
-        models.Order.objects.filter(offering=offering)
-        .exclude(state__in=models.Order.States.TERMINAL_STATES)
-        .exclude(backend_id="")
+    OfferingOrdersPullTask().pull(offering)
+
+
+COMPONENT_USAGE_PULLED_FIELDS = (
+    "usage",
+    "description",
+    "created",
+    "date",
+    "recurring",
+    "backend_id",
+)
+
+
+def get_usage_start_date(local_resource, from_creation_date=False):
+    """Usage is pulled either from 4 month ago or since resource creation date."""
+    if from_creation_date:
+        return month_start(local_resource.created)
+    return month_start(datetime.today() - relativedelta(months=4))
+
+
+def get_plan_period_from_list(plan_periods, date):
+    """
+    In-memory counterpart of marketplace.utils.get_plan_period
+    which works with prefetched plan periods of the resource.
+    """
+    matching_periods = [
+        plan_period
+        for plan_period in plan_periods
+        if (plan_period.start is None or plan_period.start <= date)
+        and (plan_period.end is None or plan_period.end > date)
+    ]
+    if not matching_periods:
+        return None
+    # Database sorts NULL values last in ascending order
+    return max(
+        matching_periods,
+        key=lambda plan_period: (plan_period.start is None, plan_period.start or date),
+    )
+
+
+def sync_component_usages(local_offering, remote_usages_map):
+    """
+    Create or update local component usages using remote usages grouped by local resource.
+    Offering components, plan periods and existing usages are fetched once
+    and changes are applied using bulk queries.
+    """
+    resources = list(remote_usages_map.keys())
+    if not resources:
+        return
+
+    components_map = {
+        component.type: component
+        for component in models.OfferingComponent.objects.filter(
+            offering=local_offering
+        )
+    }
+    plan_periods_map = collections.defaultdict(list)
+    for plan_period in models.ResourcePlanPeriod.objects.filter(resource__in=resources):
+        plan_periods_map[plan_period.resource_id].append(plan_period)
+
+    pulled_usages = {}
+    for local_resource, remote_usages in remote_usages_map.items():
+        for remote_usage in remote_usages:
+            offering_component = components_map.get(remote_usage["type"])
+            if not offering_component:
+                continue
+            usage_date = parse_datetime(remote_usage["date"])
+            if usage_date < local_resource.created:
+                logger.info(
+                    f"Invalid component usage date detected for resource {local_resource.id}"
+                )
+                continue
+            plan_period = get_plan_period_from_list(
+                plan_periods_map[local_resource.id], usage_date
+            )
+            key = (
+                local_resource.id,
+                offering_component.id,
+                plan_period and plan_period.id,
+                parse_date(remote_usage["billing_period"]),
+            )
+            # If remote usages are duplicated, the last one wins
+            pulled_usages[key] = {
+                "usage": Decimal(str(remote_usage["usage"])),
+                "description": remote_usage["description"],
+                "created": dateparse.parse_datetime(remote_usage["created"]),
+                "date": usage_date,
+                "recurring": remote_usage["recurring"],
+                "backend_id": remote_usage["uuid"],
+            }
+
+    if not pulled_usages:
+        return
+
+    local_usages_map = {
+        (
+            usage.resource_id,
+            usage.component_id,
+            usage.plan_period_id,
+            usage.billing_period,
+        ): usage
+        for usage in models.ComponentUsage.objects.filter(
+            resource__in=resources,
+            billing_period__in={key[3] for key in pulled_usages.keys()},
+        )
+    }
+
+    new_usages = []
+    changed_usages = []
+    for key, values in pulled_usages.items():
+        local_usage = local_usages_map.get(key)
+        if not local_usage:
+            resource_id, component_id, plan_period_id, billing_period = key
+            new_usages.append(
+                models.ComponentUsage(
+                    resource_id=resource_id,
+                    component_id=component_id,
+                    plan_period_id=plan_period_id,
+                    billing_period=billing_period,
+                    **values,
+                )
+            )
+            continue
+        changed = False
+        for field, value in values.items():
+            if getattr(local_usage, field) != value:
+                setattr(local_usage, field, value)
+                changed = True
+        if changed:
+            changed_usages.append(local_usage)
+
+    models.ComponentUsage.objects.bulk_create(new_usages)
+    models.ComponentUsage.objects.bulk_update(
+        changed_usages, COMPONENT_USAGE_PULLED_FIELDS
+    )
+
+    # Bulk queries do not emit signals, but invoice items and policies
+    # depend on post_save handlers of component usages.
+    for usage in new_usages:
+        signals.post_save.send(
+            sender=models.ComponentUsage, instance=usage, created=True
+        )
+    for usage in changed_usages:
+        signals.post_save.send(
+            sender=models.ComponentUsage, instance=usage, created=False
+        )
+
+    logger.info(
+        "Component usages for offering %s have been pulled: %s created, %s updated.",
+        local_offering,
+        len(new_usages),
+        len(changed_usages),
     )
-    for order in orders:
-        OrderPullTask().delay(serialize_instance(order))
 
 
 class UsagePullTask(BackgroundPullTask):
@@ -485,15 +695,8 @@ class UsagePullTask(BackgroundPullTask):
             self.on_pull_success(instance)
 
     def pull(self, local_resource: models.Resource, from_creation_date=False):
-        """Pull resource usage either from 4 month ago or since resource creation date."""
         client = get_client_for_offering(local_resource.offering)
-
-        today = datetime.today()
-        if from_creation_date:
-            start_date = month_start(local_resource.created)
-        else:
-            start_date = month_start(today - relativedelta(months=4))
-
+        start_date = get_usage_start_date(local_resource, from_creation_date)
         start_date_str = start_date.strftime("%Y-%m-%d")
 
         logger.info(
@@ -504,54 +707,170 @@ class UsagePullTask(BackgroundPullTask):
             local_resource.backend_id,
             date_after=start_date_str,
         )
+        sync_component_usages(local_resource.offering, {local_resource: remote_usages})
 
-        for remote_usage in remote_usages:
-            try:
-                offering_component = models.OfferingComponent.objects.get(
-                    offering=local_resource.offering, type=remote_usage["type"]
-                )
-            except ObjectDoesNotExist:
-                continue
-            usage_date = parse_datetime(remote_usage["date"])
-            if usage_date < local_resource.created:
-                logger.info(
-                    f"Invalid component usage date detected for resource {local_resource.id}"
-                )
-                continue
-            defaults = {
-                "usage": remote_usage["usage"],
-                "description": remote_usage["description"],
-                "created": remote_usage["created"],
-                "date": usage_date,
-                "recurring": remote_usage["recurring"],
-                "backend_id": remote_usage["uuid"],
-            }
-            plan_period = get_plan_period(local_resource, usage_date)
-            models.ComponentUsage.objects.update_or_create(
-                resource=local_resource,
-                component=offering_component,
-                plan_period=plan_period,
-                billing_period=remote_usage["billing_period"],
-                defaults=defaults,
+
+class OfferingUsagePullTask(OfferingBatchPullTask):
+    def run(self, serialized_instance, **kwargs):
+        instance = deserialize_instance(serialized_instance)
+        self.pull(instance, **kwargs)
+
+    def pull(self, local_offering: models.Offering, from_creation_date=False):
+        local_resources = list(
+            models.Resource.objects.exclude(backend_id="").filter(
+                offering=local_offering
             )
+        )
+        if not local_resources:
+            return
+        client = get_client_for_offering(local_offering)
+        start_date = min(
+            get_usage_start_date(local_resource, from_creation_date)
+            for local_resource in local_resources
+        )
+        start_date_str = start_date.strftime("%Y-%m-%d")
+
+        logger.info(
+            "Pulling usages of offering %s resources from %s",
+            local_offering,
+            start_date_str,
+        )
+
+        remote_usages = utils.list_offering_component_usages(
+            client, local_offering, start_date_str
+        )
+        local_resources_map = {
+            local_resource.backend_id: local_resource
+            for local_resource in local_resources
+        }
+        remote_usages_map = collections.defaultdict(list)
+        for remote_usage in remote_usages:
+            local_resource = local_resources_map.get(remote_usage["resource_uuid"])
+            if local_resource:
+                remote_usages_map[local_resource].append(remote_usage)
+        sync_component_usages(local_offering, remote_usages_map)
 
 
 class UsageListPullTask(BackgroundListPullTask):
     name = "waldur_mastermind.marketplace_remote.pull_usage"
-    pull_task = UsagePullTask
+    pull_task = OfferingUsagePullTask
 
     def get_pulled_objects(self):
-        return models.Resource.objects.exclude(backend_id="").filter(
-            offering__type=PLUGIN_NAME
+        return models.Offering.objects.filter(
+            type=PLUGIN_NAME,
+            pk__in=models.Resource.objects.exclude(backend_id="").values("offering_id"),
         )
 
 
 @shared_task
 def pull_offering_usage(serialized_offering):
     offering = deserialize_instance(serialized_offering)
-    resources = models.Resource.objects.exclude(backend_id="").filter(offering=offering)
-    for resource in resources:
-        UsagePullTask().delay(serialize_instance(resource), from_creation_date=True)
+    OfferingUsagePullTask().pull(offering, from_creation_date=True)
+
+
+INVOICE_ITEM_PULLED_FIELDS = (
+    "start",
+    "end",
+    "measured_unit",
+    "details",
+    "quantity",
+    "article_code",
+    "unit_price",
+    "unit",
+)
+
+
+def get_invoice_item_pulled_values(remote_item):
+    return {
+        "start": dateparse.parse_datetime(remote_item["start"]),
+        "end": dateparse.parse_datetime(remote_item["end"]),
+        "measured_unit": remote_item["measured_unit"],
+        "details": remote_item["details"],
+        "quantity": Decimal(str(remote_item["quantity"])),
+        "article_code": remote_item["article_code"],
+        "unit_price": Decimal(str(remote_item["unit_price"])),
+        "unit": remote_item["unit"],
+    }
+
+
+def sync_invoice_items(local_invoice, remote_items_map):
+    """
+    Mirror remote invoice items of the resources into the local invoice.
+    Items are matched by backend UUID and changes are applied using bulk queries,
+    so that invoice cache, price estimates and policies are updated once per invoice.
+
+    :param remote_items_map: remote invoice items grouped by local resource
+    """
+    local_items = local_invoice.items.filter(resource__in=remote_items_map.keys())
+    local_items.filter(backend_uuid=None).delete()
+    local_items_map = {
+        item.backend_uuid.hex: item
+        for item in local_items.select_related("resource__project__customer")
+    }
+
+    remote_items = {}
+    for local_resource, resource_remote_items in remote_items_map.items():
+        for remote_item in resource_remote_items:
+            remote_items[remote_item["uuid"]] = (local_resource, remote_item)
+
+    stale_items = [
+        item for item_id, item in local_items_map.items() if item_id not in remote_items
+    ]
+    new_items = []
+    changed_items = []
+
+    for item_id, (local_resource, remote_item) in remote_items.items():
+        values = get_invoice_item_pulled_values(remote_item)
+        local_item = local_items_map.get(item_id)
+        if not local_item:
+            project = local_resource.project
+            new_items.append(
+                invoice_models.InvoiceItem(
+                    backend_uuid=item_id,
+                    resource=local_resource,
+                    invoice=local_invoice,
+                    name=remote_item["name"],
+                    project=project,
+                    project_name=project.name,
+                    project_uuid=project.uuid.hex,
+                    **values,
+                )
+            )
+            continue
+        changed = False
+        for field, value in values.items():
+            if getattr(local_item, field) != value:
+                setattr(local_item, field, value)
+                changed = True
+        if changed:
+            changed_items.append(local_item)
+
+    if not (stale_items or new_items or changed_items):
+        return
+
+    with transaction.atomic():
+        if stale_items:
+            invoice_models.InvoiceItem.objects.filter(
+                pk__in=[item.pk for item in stale_items]
+            ).delete()
+        invoice_models.InvoiceItem.objects.bulk_create(new_items)
+        invoice_models.InvoiceItem.objects.bulk_update(
+            changed_items, INVOICE_ITEM_PULLED_FIELDS
+        )
+
+    invoice_signals.invoice_items_bulk_changed.send(
+        sender=invoice_models.InvoiceItem,
+        invoice=local_invoice,
+        items=new_items + changed_items + stale_items,
+    )
+
+    logger.info(
+        "Invoice items of invoice %s have been pulled: %s created, %s updated, %s deleted.",
+        local_invoice,
+        len(new_items),
+        len(changed_items),
+        len(stale_items),
+    )
 
 
 class ResourceInvoicePullTask(BackgroundPullTask):
@@ -561,7 +880,6 @@ class ResourceInvoicePullTask(BackgroundPullTask):
 
     def pull_date(self, date, local_resource):
         client = get_client_for_offering(local_resource.offering)
-        local_customer = local_resource.project.customer
         try:
             remote_invoice_items = client.list_invoice_items(
                 {
@@ -575,87 +893,124 @@ class ResourceInvoicePullTask(BackgroundPullTask):
                 f"Unable to get remote invoice items for resource [id={local_resource.backend_id}]: {e}"
             )
             return
-
         local_invoice, _ = RegistrationManager.get_or_create_invoice(
-            local_customer, date
+            local_resource.project.customer, date
         )
-        local_invoice_items = local_invoice.items.filter(resource=local_resource)
-        local_invoice_items.filter(backend_uuid=None).delete()
-
-        local_item_ids = {item.backend_uuid.hex for item in local_invoice_items}
-        remote_item_ids = {item["uuid"] for item in remote_invoice_items}
+        sync_invoice_items(local_invoice, {local_resource: remote_invoice_items})
 
-        new_item_ids = remote_item_ids - local_item_ids
-        stale_item_ids = local_item_ids - remote_item_ids
-        existing_item_ids = local_item_ids & remote_item_ids
 
-        if len(stale_item_ids) > 0:
-            invoice_models.InvoiceItem.objects.filter(name__in=stale_item_ids).delete()
-            logger.info(
-                f"The following invoice items for resource [uuid={local_resource.uuid}] have been deleted: {stale_item_ids}"
-            )
+def get_invoiced_resources():
+    return (
+        models.Resource.objects.filter(offering__type=PLUGIN_NAME)
+        .exclude(state=models.Resource.States.TERMINATED)
+        .exclude(backend_id="")
+    )
 
-        new_invoice_items = [
-            item for item in remote_invoice_items if item["uuid"] in new_item_ids
-        ]
-        for item in new_invoice_items:
-            invoice_models.InvoiceItem.objects.create(
-                backend_uuid=item["uuid"],
-                resource=local_resource,
-                invoice=local_invoice,
-                start=dateparse.parse_datetime(item["start"]),
-                end=dateparse.parse_datetime(item["end"]),
-                name=item["name"],
-                project=local_resource.project,
-                unit=item["unit"],
-                measured_unit=item["measured_unit"],
-                article_code=item["article_code"],
-                unit_price=item["unit_price"],
-                details=item["details"],
-                quantity=item["quantity"],
-            )
 
-        existing_invoice_items = [
-            item for item in remote_invoice_items if item["uuid"] in existing_item_ids
-        ]
-        for item in existing_invoice_items:
-            local_item = local_invoice_items.get(
-                backend_uuid=item["uuid"],
-            )
-            local_item.start = dateparse.parse_datetime(item["start"])
-            local_item.end = dateparse.parse_datetime(item["end"])
-            local_item.measured_unit = item["measured_unit"]
-            local_item.details = item["details"]
-            local_item.quantity = item["quantity"]
-            local_item.article_code = item["article_code"]
-            local_item.unit_price = item["unit_price"]
-            local_item.unit = item["unit"]
-            local_item.save(
-                update_fields=[
-                    "start",
-                    "end",
-                    "measured_unit",
-                    "details",
-                    "quantity",
-                    "article_code",
-                    "unit_price",
-                    "unit",
-                ]
-            )
+class OfferingInvoicePullTask(OfferingBatchPullTask):
+    def pull(self, local_offering: models.Offering):
+        local_resources = list(
+            get_invoiced_resources()
+            .filter(offering=local_offering)
+            .select_related("project__customer")
+        )
+        if not local_resources:
+            return
+        client = get_client_for_offering(local_offering)
+        # Remote resources of the offering belong to projects of the remote customer
+        remote_customer_uuid = local_offering.secret_options.get("customer_uuid")
+        for date in (get_previous_month(), timezone.now()):
+            try:
+                remote_invoice_items = client.list_invoice_items(
+                    {
+                        "customer_uuid": remote_customer_uuid,
+                        "year": date.year,
+                        "month": date.month,
+                    }
+                )
+            except WaldurClientException as e:
+                logger.info(
+                    f"Unable to get remote invoice items for offering [uuid={local_offering.uuid}]: {e}"
+                )
+                continue
+            remote_items_map = collections.defaultdict(list)
+            for item in remote_invoice_items:
+                remote_items_map[item["resource_uuid"]].append(item)
+
+            customer_resources_map = collections.defaultdict(dict)
+            for local_resource in local_resources:
+                customer_resources_map[local_resource.project.customer][
+                    local_resource
+                ] = remote_items_map.get(local_resource.backend_id, [])
+
+            for local_customer, resource_items_map in customer_resources_map.items():
+                local_invoice, _ = RegistrationManager.get_or_create_invoice(
+                    local_customer, date
+                )
+                sync_invoice_items(local_invoice, resource_items_map)
 
 
 class ResourceInvoiceListPullTask(BackgroundListPullTask):
     name = "waldur_mastermind.marketplace_remote.pull_invoices"
-    pull_task = ResourceInvoicePullTask
+    pull_task = OfferingInvoicePullTask
 
     def get_pulled_objects(self):
-        return (
-            models.Resource.objects.filter(offering__type=PLUGIN_NAME)
-            .exclude(state=models.Resource.States.TERMINATED)
-            .exclude(backend_id="")
+        return models.Offering.objects.filter(
+            pk__in=get_invoiced_resources().values("offering_id")
         )
 
 
+def sync_resource_robot_accounts(local_resource, remote_accounts, local_accounts):
+    local_accounts_map = {item.backend_id: item for item in local_accounts}
+
+    local_ids = set(local_accounts_map.keys())
+    remote_ids = {item["uuid"] for item in remote_accounts}
+
+    new_ids = remote_ids - local_ids
+    stale_ids = local_ids - remote_ids
+    existing_ids = local_ids & remote_ids
+
+    if stale_ids:
+        models.RobotAccount.objects.filter(
+            resource=local_resource, backend_id__in=stale_ids
+        ).delete()
+        logger.info(
+            f"The following robot accounts for resource [uuid={local_resource.uuid}] have been deleted: {stale_ids}"
+        )
+
+    # Robot accounts are created and updated one by one
+    # because each change is recorded as an event.
+    new_accounts = [
+        account for account in remote_accounts if account["uuid"] in new_ids
+    ]
+    for account in new_accounts:
+        models.RobotAccount.objects.create(
+            resource=local_resource,
+            backend_id=account["uuid"],
+            type=account["type"],
+            username=account["username"],
+            keys=account["keys"],
+        )
+
+    existing_accounts = [
+        account for account in remote_accounts if account["uuid"] in existing_ids
+    ]
+    for account in existing_accounts:
+        local_account = local_accounts_map[account["uuid"]]
+        modified = set()
+        if local_account.type != account["type"]:
+            local_account.type = account["type"]
+            modified.add("type")
+        if local_account.username != account["username"]:
+            local_account.username = account["username"]
+            modified.add("username")
+        if local_account.keys != account["keys"]:
+            local_account.keys = account["keys"]
+            modified.add("keys")
+        if modified:
+            local_account.save(update_fields=modified)
+
+
 class ResourceRobotAccountPullTask(BackgroundPullTask):
     def pull(self, local_resource: models.Resource):
         client = get_client_for_offering(local_resource.offering)
@@ -663,87 +1018,56 @@ class ResourceRobotAccountPullTask(BackgroundPullTask):
             {"resource_uuid": local_resource.backend_id}
         )
         local_accounts = models.RobotAccount.objects.filter(resource=local_resource)
+        sync_resource_robot_accounts(local_resource, remote_accounts, local_accounts)
 
-        local_ids = {item.backend_id for item in local_accounts}
-        remote_ids = {item["uuid"] for item in remote_accounts}
 
-        new_ids = remote_ids - local_ids
-        stale_ids = local_ids - remote_ids
-        existing_ids = local_ids & remote_ids
-
-        if stale_ids:
-            local_accounts.filter(backend_id__in=stale_ids).delete()
-            logger.info(
-                f"The following robot accounts for resource [uuid={local_resource.uuid}] have been deleted: {stale_ids}"
-            )
+class OfferingRobotAccountPullTask(OfferingBatchPullTask):
+    def pull(self, local_offering: models.Offering):
+        local_resources = list(get_invoiced_resources().filter(offering=local_offering))
+        if not local_resources:
+            return
+        client = get_client_for_offering(local_offering)
+        remote_accounts = client.list_robot_account(
+            {"customer_uuid": local_offering.secret_options.get("customer_uuid")}
+        )
+        remote_accounts_map = collections.defaultdict(list)
+        for account in remote_accounts:
+            remote_accounts_map[account["resource_uuid"]].append(account)
 
-        new_accounts = [
-            account for account in remote_accounts if account["uuid"] in new_ids
-        ]
-        for account in new_accounts:
-            models.RobotAccount.objects.create(
-                resource=local_resource,
-                backend_id=account["uuid"],
-                type=account["type"],
-                username=account["username"],
-                keys=account["keys"],
-            )
+        local_accounts_map = collections.defaultdict(list)
+        for local_account in models.RobotAccount.objects.filter(
+            resource__in=local_resources
+        ):
+            local_accounts_map[local_account.resource_id].append(local_account)
 
-        existing_accounts = [
-            account for account in remote_accounts if account["uuid"] in existing_ids
-        ]
-        for account in existing_accounts:
-            local_account = local_accounts.get(
-                backend_id=account["uuid"],
+        for local_resource in local_resources:
+            sync_resource_robot_accounts(
+                local_resource,
+                remote_accounts_map.get(local_resource.backend_id, []),
+                local_accounts_map.get(local_resource.id, []),
             )
-            modified = set()
-            if local_account.type != account["type"]:
-                local_account.type = account["type"]
-                modified.add("type")
-            if local_account.username != account["username"]:
-                local_account.username = account["username"]
-                modified.add("username")
-            if local_account.keys != account["keys"]:
-                local_account.keys = account["keys"]
-                modified.add("keys")
-            if modified:
-                local_account.save(update_fields=modified)
 
 
 class ResourceRobotAccountListPullTask(BackgroundListPullTask):
     name = "waldur_mastermind.marketplace_remote.pull_robot_accounts"
-    pull_task = ResourceRobotAccountPullTask
+    pull_task = OfferingRobotAccountPullTask
 
     def get_pulled_objects(self):
-        return (
-            models.Resource.objects.filter(offering__type=PLUGIN_NAME)
-            .exclude(state=models.Resource.States.TERMINATED)
-            .exclude(backend_id="")
+        return models.Offering.objects.filter(
+            pk__in=get_invoiced_resources().values("offering_id")
         )
 
 
 @shared_task
 def pull_offering_robot_accounts(serialized_offering):
     offering = deserialize_instance(serialized_offering)
-    resources = (
-        models.Resource.objects.filter(offering=offering)
-        .exclude(state=models.Resource.States.TERMINATED)
-        .exclude(backend_id="")
-    )
-    for resource in resources:
-        ResourceRobotAccountPullTask().delay(serialize_instance(resource))
+    OfferingRobotAccountPullTask().pull(offering)
 
 
 @shared_task
 def pull_offering_invoices(serialized_offering):
     offering = deserialize_instance(serialized_offering)
-    resources = (
-        models.Resource.objects.filter(offering=offering)
-        .exclude(state=models.Resource.States.TERMINATED)
-        .exclude(backend_id="")
-    )
-    for resource in resources:
-        ResourceInvoicePullTask().delay(serialize_instance(resource))
+    OfferingInvoicePullTask().pull(offering)
 
 
 @shared_task(
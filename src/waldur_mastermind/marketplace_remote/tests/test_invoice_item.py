@@ -152,3 +152,53 @@ class InvoiceItemPullTest(test.APITransactionTestCase):
         item.refresh_from_db()
         self.assertEqual(new_quantity, item.quantity)
         self.assertEqual(new_month_end, item.end)
+
+    def test_stale_invoice_item_is_deleted_by_backend_uuid(self):
+        item_data = self.get_common_data()
+        self.client_mock().list_invoice_items.return_value = []
+        invoice = InvoiceFactory(customer=self.customer)
+        stale_uuid = uuid.uuid4().hex
+        InvoiceItemFactory(
+            invoice=invoice,
+            resource=self.resource,
+            **item_data,
+            backend_uuid=stale_uuid,
+        )
+        # Item of another resource which happens to have name equal to UUID is not affected
+        other_item = InvoiceItemFactory(invoice=invoice, name=stale_uuid)
+
+        ResourceInvoicePullTask().run(serialize_instance(self.resource))
+
+        self.assertFalse(
+            InvoiceItem.objects.filter(
+                resource=self.resource, backend_uuid=stale_uuid
+            ).exists()
+        )
+        self.assertTrue(InvoiceItem.objects.filter(pk=other_item.pk).exists())
+
+    def test_unchanged_invoice_item_is_not_saved(self):
+        item_data = self.get_common_data()
+        self.client_mock().list_invoice_items.return_value = [
+            {"resource_uuid": self.resource.backend_id, **item_data}
+        ]
+        ResourceInvoicePullTask().run(serialize_instance(self.resource))
+
+        with mock.patch(
+            "waldur_mastermind.invoices.signals.invoice_items_bulk_changed.send"
+        ) as send:
+            ResourceInvoicePullTask().run(serialize_instance(self.resource))
+            send.assert_not_called()
+
+    @mock.patch("waldur_mastermind.billing.handlers.update_estimates")
+    def test_price_estimates_are_updated_once_per_invoice(self, update_estimates):
+        self.client_mock().list_invoice_items.return_value = [
+            {"resource_uuid": self.resource.backend_id, **self.get_common_data()},
+            {"resource_uuid": self.resource.backend_id, **self.get_common_data()},
+            {"resource_uuid": self.resource.backend_id, **self.get_common_data()},
+        ]
+
+        with freeze_time("2021-08-17"):
+            ResourceInvoicePullTask().pull_date(timezone.now(), self.resource)
+
+        self.assertEqual(3, InvoiceItem.objects.filter(resource=self.resource).count())
+        update_estimates.assert_called_once()
@@ -6,6 +6,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.test import override_settings
 from django.utils import timezone
 from rest_framework import test
+from waldur_client import WaldurClientException
 
 from waldur_auth_social.models import ProviderChoices
 from waldur_core.core.utils import format_text, serialize_instance
@@ -541,3 +542,51 @@ class NotificationAboutProjectUpdatesTest(test.APITransactionTestCase):
         NotificationFactory(key=f"marketplace_remote.{event_type}")
         tasks.notify_about_project_details_update(serialized_project)
         self.assertEqual(len(mail.outbox), 2)
+
+
+class OfferingOrdersPullTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.patcher = mock.patch(
+            "waldur_mastermind.marketplace_remote.utils.WaldurClient"
+        )
+        self.client = self.patcher.start()()
+
+        self.offering = factories.OfferingFactory(
+            type=PLUGIN_NAME,
+            backend_id=uuid.uuid4().hex,
+            secret_options={
+                "api_url": "https://example.com/",
+                "token": uuid.uuid4().hex,
+            },
+        )
+        self.synced_order, self.failed_order = (
+            factories.OrderFactory(
+                offering=self.offering,
+                backend_id=uuid.uuid4().hex,
+                state=models.Order.States.EXECUTING,
+            )
+            for _ in range(2)
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        mock.patch.stopall()
+
+    def test_failed_order_is_marked_as_erred_and_other_orders_are_synced(self):
+        self.client.list_orders.return_value = [
+            {
+                "uuid": self.synced_order.backend_id,
+                "state": "done",
+                "error_message": "",
+            }
+        ]
+        self.client.get_order.side_effect = WaldurClientException("Not found.")
+
+        tasks.OfferingOrdersPullTask().pull(self.offering)
+
+        self.synced_order.refresh_from_db()
+        self.failed_order.refresh_from_db()
+        self.assertEqual(self.synced_order.state, models.Order.States.DONE)
+        self.assertEqual(self.failed_order.state, models.Order.States.ERRED)
+        self.assertEqual(self.failed_order.error_message, "Not found.")
+        self.client.get_order.assert_called_once_with(self.failed_order.backend_id)
@@ -0,0 +1,144 @@
+import uuid
+from unittest import mock
+
+from django.utils import timezone
+from freezegun import freeze_time
+from rest_framework import test
+
+from waldur_core.core.utils import month_start, serialize_instance
+from waldur_core.structure.tests.fixtures import ProjectFixture
+from waldur_mastermind.marketplace.models import ComponentUsage
+from waldur_mastermind.marketplace.tests.factories import (
+    OfferingComponentFactory,
+    OfferingFactory,
+    ResourceFactory,
+    ResourcePlanPeriodFactory,
+)
+from waldur_mastermind.marketplace_remote import PLUGIN_NAME
+from waldur_mastermind.marketplace_remote.tasks import (
+    OfferingUsagePullTask,
+    UsageListPullTask,
+)
+
+
+@freeze_time("2023-08-17")
+class OfferingUsagePullTest(test.APITransactionTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        patcher = mock.patch("waldur_mastermind.marketplace_remote.utils.WaldurClient")
+        self.client_mock = patcher.start()
+        self.client_mock().api_url = "https://remote-waldur.com/api/"
+        self.client_mock().headers = {}
+        requests_patcher = mock.patch(
+            "waldur_mastermind.marketplace_remote.utils.requests.get"
+        )
+        self.requests_mock = requests_patcher.start()
+        self.fixture = ProjectFixture()
+        self.offering = OfferingFactory(
+            type=PLUGIN_NAME,
+            backend_id="remote-offering-uuid",
+            secret_options={
+                "api_url": "https://remote-waldur.com/",
+                "token": "valid_token",
+                "customer_uuid": "customer-uuid",
+            },
+        )
+        self.component = OfferingComponentFactory(offering=self.offering, type="cpu")
+        self.resources = [
+            ResourceFactory(
+                project=self.fixture.project,
+                offering=self.offering,
+                backend_id=uuid.uuid4().hex,
+                created=month_start(timezone.now()),
+            )
+            for _ in range(3)
+        ]
+        for resource in self.resources:
+            ResourcePlanPeriodFactory(
+                resource=resource, plan=resource.plan, start=resource.created
+            )
+
+    def tearDown(self):
+        super().tearDown()
+        mock.patch.stopall()
+
+    def get_remote_usage(self, resource, usage=10):
+        now = timezone.now()
+        return {
+            "uuid": uuid.uuid4().hex,
+            "resource_uuid": resource.backend_id,
+            "type": "cpu",
+            "usage": usage,
+            "description": "",
+            "created": now.isoformat(),
+            "date": now.isoformat(),
+            "recurring": False,
+            "billing_period": month_start(now).date().isoformat(),
+        }
+
+    def get_response(self, remote_usages, next_url=None):
+        response = mock.Mock(status_code=200, links={})
+        response.json.return_value = remote_usages
+        if next_url:
+            response.links = {"next": {"url": next_url}}
+        return response
+
+    def pull(self, remote_usages):
+        self.requests_mock.return_value = self.get_response(remote_usages)
+        OfferingUsagePullTask().run(serialize_instance(self.offering))
+
+    def test_usages_of_all_resources_are_pulled_with_single_request(self):
+        self.pull([self.get_remote_usage(resource) for resource in self.resources])
+
+        self.assertEqual(
+            ComponentUsage.objects.filter(resource__in=self.resources).count(), 3
+        )
+        self.assertEqual(self.requests_mock.call_count, 1)
+        self.assertEqual(
+            self.requests_mock.call_args.kwargs["params"]["offering_uuid"],
+            "remote-offering-uuid",
+        )
+        self.client_mock().list_component_usages.assert_not_called()
+
+    def test_usages_are_pulled_from_all_pages(self):
+        next_url = "https://remote-waldur.com/api/marketplace-component-usages/?page=2"
+        self.requests_mock.side_effect = [
+            self.get_response(
+                [self.get_remote_usage(self.resources[0])], next_url=next_url
+            ),
+            self.get_response([self.get_remote_usage(self.resources[1])]),
+        ]
+        OfferingUsagePullTask().run(serialize_instance(self.offering))
+
+        self.assertEqual(self.requests_mock.call_count, 2)
+        self.assertEqual(self.requests_mock.call_args.args[0], next_url)
+        self.assertEqual(
+            ComponentUsage.objects.filter(resource__in=self.resources).count(), 2
+        )
+
+    def test_existing_usage_is_updated(self):
+        self.pull([self.get_remote_usage(self.resources[0], usage=10)])
+        self.pull([self.get_remote_usage(self.resources[0], usage=20)])
+
+        usage = ComponentUsage.objects.get(resource=self.resources[0])
+        self.assertEqual(usage.usage, 20)
+
+    def test_usages_of_unknown_resources_and_components_are_skipped(self):
+        unknown_resource = ResourceFactory(backend_id=uuid.uuid4().hex)
+        invalid_usage = self.get_remote_usage(self.resources[0])
+        invalid_usage["type"] = "ram"
+
+        self.pull([self.get_remote_usage(unknown_resource), invalid_usage])
+
+        self.assertFalse(ComponentUsage.objects.exists())
+
+    def test_usage_is_attached_to_plan_period(self):
+        self.pull([self.get_remote_usage(self.resources[0])])
+
+        usage = ComponentUsage.objects.get(resource=self.resources[0])
+        self.assertEqual(usage.plan_period.resource, self.resources[0])
+
+    def test_list_task_is_scheduled_per_offering(self):
+        self.assertEqual(
+            list(UsageListPullTask().get_pulled_objects()), [self.offering]
+        )
@@ -1,13 +1,21 @@
 import io
 import logging
 from collections import defaultdict
+from urllib.parse import urljoin
 
 import requests
 from django.db.models import Q
 from django.utils import dateparse
 from django.utils.dateparse import parse_datetime
+from rest_framework import status
 from rest_framework.exceptions import ValidationError
-from waldur_client import WaldurClient, WaldurClientException
+from waldur_client import (
+    Endpoints,
+    WaldurClient,
+    WaldurClientException,
+    requests_timeout,
+    verify_ssl,
+)
 
 from waldur_auth_social.models import ProviderChoices
 from waldur_core.core.utils import get_system_robot
@@ -27,6 +35,8 @@ from . import PLUGIN_NAME
 
 logger = logging.getLogger(__name__)
 
+USAGES_PAGE_SIZE = 200
+
 INVALID_RESOURCE_STATES = (
     marketplace_models.Resource.States.CREATING,
     marketplace_models.Resource.States.TERMINATED,
@@ -40,6 +50,36 @@ def get_client_for_offering(offering):
     return WaldurClient(api_url, token)
 
 
+def list_offering_component_usages(client, offering, date_after):
+    # WaldurClient.list_component_usages allows to filter by single resource only,
+    # so pages of usages filtered by offering are fetched explicitly.
+    url = urljoin(client.api_url, f"{Endpoints.MarketplaceComponentUsage}/")
+    params = {
+        "offering_uuid": offering.backend_id,
+        "date_after": date_after,
+        "page_size": USAGES_PAGE_SIZE,
+    }
+    usages = []
+    while url:
+        try:
+            response = requests.get(
+                url,
+                params=params,
+                headers=client.headers,
+                timeout=requests_timeout,
+                verify=verify_ssl,
+            )
+        except requests.RequestException as e:
+            raise WaldurClientException(str(e))
+        if response.status_code != status.HTTP_200_OK:
+            raise WaldurClientException(response.text)
+        usages.extend(response.json())
+        # Link to the next page already contains query parameters.
+        url = response.links.get("next", {}).get("url")
+        params = None
+    return usages
+
+
 def get_project_backend_id(project):
     return f"{project.customer.uuid}_{project.uuid}"
 
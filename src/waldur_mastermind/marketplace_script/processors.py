@@ -42,6 +42,11 @@ class CreateProcessor(
 ):
     hook_type = "create"
 
+    def process_order(self, user):
+        if self.submit_script(user):
+            return
+        super().process_order(user)
+
     def send_request(self, user):
         output = super().send_request(user)
         if output:
@@ -80,6 +85,13 @@ class UpdateProcessor(
 ):
     hook_type = "update"
 
+    def process_order(self, user):
+        if self.submit_script(user):
+            self.order.resource.set_state_updating()
+            self.order.resource.save(update_fields=["state"])
+            return
+        super().process_order(user)
+
     def send_request(self, user):
         self.order.resource.set_state_updating()
         self.order.resource.save(update_fields=["state"])
@@ -96,6 +108,13 @@ class DeleteProcessor(
 ):
     hook_type = "terminate"
 
+    def process_order(self, user):
+        if self.submit_script(user):
+            self.order.resource.set_state_terminating()
+            self.order.resource.save(update_fields=["state"])
+            return
+        super().process_order(user)
+
     def send_request(self, user, resource):
         resource.set_state_terminating()
         resource.save(update_fields=["state"])
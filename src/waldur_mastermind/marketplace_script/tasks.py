@@ -6,16 +6,22 @@ from datetime import timedelta
 from celery import shared_task
 from django.conf import settings
 from django.utils import timezone
+from kubernetes.client.rest import ApiException
 
+from waldur_core.core import utils as core_utils
 from waldur_core.core.utils import get_fake_context, get_system_robot
 from waldur_core.structure import models as structure_models
 from waldur_mastermind.marketplace import models
 from waldur_mastermind.marketplace import serializers as marketplace_serializer
+from waldur_mastermind.marketplace import utils as marketplace_utils
 from waldur_mastermind.marketplace_script import PLUGIN_NAME, serializers, utils
 from waldur_mastermind.marketplace_script import models as marketplace_script_models
 
 logger = logging.getLogger(__name__)
 
+# Number of consecutive failed checks of Kubernetes job state after which order is erred.
+MAX_K8S_POLL_FAILURES = 5
+
 
 @shared_task(name="waldur_marketplace_script.pull_resources")
 def pull_resources():
@@ -122,6 +128,65 @@ def dry_run_executor(dry_run_id):
         structure_models.Project.objects.filter(id=dry_run.order.project.id).delete()
 
 
+@shared_task(name="waldur_marketplace_script.poll_k8s_job")
+def poll_k8s_job(order_uuid, serialized_user, failures=0):
+    """
+    Check state of Kubernetes job started for order processing.
+    If job is still running or its state could not be checked because of
+    transient error, check is rescheduled, otherwise job output is collected
+    and order processing is resumed.
+    """
+    order = models.Order.objects.filter(
+        uuid=order_uuid, state=models.Order.States.EXECUTING
+    ).first()
+    if not order:
+        logger.info(
+            "Order %s is not executing anymore, skipping job polling.", order_uuid
+        )
+        return
+
+    job_name, _, _ = utils.get_k8s_object_names(order_uuid)
+    try:
+        batch_api, api = utils.get_k8s_apis()
+        job_succeeded = utils.read_k8s_job_status(batch_api, job_name)
+    except Exception as e:
+        job_is_missing = isinstance(e, ApiException) and e.status == 404
+        if not job_is_missing and failures + 1 < MAX_K8S_POLL_FAILURES:
+            logger.warning(
+                "Unable to check state of Kubernetes job %s, retrying: %s",
+                job_name,
+                e,
+            )
+            schedule_k8s_job_poll(order_uuid, serialized_user, failures + 1)
+            return
+        logger.exception("Unable to check state of Kubernetes job %s.", job_name)
+        utils.delete_k8s_objects(order_uuid)
+        job_succeeded, output = False, str(e)
+    else:
+        if job_succeeded is None:
+            schedule_k8s_job_poll(order_uuid, serialized_user)
+            return
+        try:
+            # Job and ConfigMap are deleted even if output is not fetched.
+            output = utils.finish_script_in_k8s(batch_api, api, order_uuid)
+        except Exception as e:
+            logger.exception("Unable to fetch result of Kubernetes job %s.", job_name)
+            job_succeeded, output = False, str(e)
+
+    processor_class = marketplace_utils.get_order_processor(order)
+    processor = processor_class(order)
+    processor.job_result = (job_succeeded, output)
+    user = core_utils.deserialize_instance(serialized_user)
+    marketplace_utils.process_order(order, user, processor=processor)
+
+
+def schedule_k8s_job_poll(order_uuid, serialized_user, failures=0):
+    poll_k8s_job.apply_async(
+        args=(order_uuid, serialized_user, failures),
+        countdown=settings.WALDUR_MARKETPLACE_SCRIPT["K8S_JOB_POLL_INTERVAL"],
+    )
+
+
 @shared_task(name="waldur_marketplace_script.remove_old_dry_runs")
 def remove_old_dry_runs():
     marketplace_script_models.DryRun.objects.filter(
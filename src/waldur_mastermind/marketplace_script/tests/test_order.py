@@ -1,10 +1,15 @@
 from unittest import mock
 
+from django.conf import settings
+from django.test import override_settings
+from kubernetes.client.rest import ApiException
 from rest_framework import test
 
+from waldur_core.core import utils as core_utils
 from waldur_mastermind.marketplace import models as marketplace_models
 from waldur_mastermind.marketplace import utils as marketplace_utils
 from waldur_mastermind.marketplace.tests import factories as marketplace_factories
+from waldur_mastermind.marketplace_script import tasks
 
 from . import fixtures
 
@@ -45,3 +50,161 @@ class OrderProcessedTest(test.APITransactionTestCase):
             ],
             '{"cpu": 10}',
         )
+
+
+@override_settings(
+    WALDUR_MARKETPLACE_SCRIPT={
+        **settings.WALDUR_MARKETPLACE_SCRIPT,
+        "SCRIPT_RUN_MODE": "k8s",
+    }
+)
+@mock.patch("waldur_mastermind.marketplace_script.tasks.utils.get_k8s_apis")
+class KubernetesOrderProcessedTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.ScriptFixture()
+        self.fixture.offering.secret_options = {
+            "language": "python",
+            "create": 'print("test creation")',
+        }
+        self.fixture.offering.save()
+        self.order = marketplace_factories.OrderFactory(
+            project=self.fixture.project,
+            created_by=self.fixture.owner,
+            offering=self.fixture.offering,
+            attributes={"name": "name"},
+            state=marketplace_models.Order.States.EXECUTING,
+        )
+        self.order.resource.state = marketplace_models.Resource.States.CREATING
+        self.order.resource.save()
+
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.poll_k8s_job")
+    @mock.patch("waldur_mastermind.marketplace_script.utils.start_script_in_k8s")
+    def test_order_processing_does_not_wait_for_job_completion(
+        self, start_script, poll_task, get_apis
+    ):
+        get_apis.return_value = (mock.Mock(), mock.Mock())
+        marketplace_utils.process_order(self.order, self.fixture.staff)
+
+        start_script.assert_called_once()
+        poll_task.apply_async.assert_called_once()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, marketplace_models.Order.States.EXECUTING)
+
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.utils.finish_script_in_k8s")
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.utils.read_k8s_job_status")
+    def test_order_processing_is_resumed_when_job_succeeds(
+        self, read_status, finish_script, get_apis
+    ):
+        get_apis.return_value = (mock.Mock(), mock.Mock())
+        read_status.return_value = True
+        finish_script.return_value = "test creation\nbackend_id"
+
+        tasks.poll_k8s_job(
+            self.order.uuid.hex, core_utils.serialize_instance(self.fixture.staff)
+        )
+
+        self.order.refresh_from_db()
+        self.order.resource.refresh_from_db()
+        self.assertEqual(self.order.state, marketplace_models.Order.States.DONE)
+        self.assertEqual(self.order.output, "test creation\nbackend_id")
+        self.assertEqual(self.order.resource.backend_id, "backend_id")
+
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.utils.finish_script_in_k8s")
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.utils.read_k8s_job_status")
+    def test_order_is_erred_when_job_fails(self, read_status, finish_script, get_apis):
+        get_apis.return_value = (mock.Mock(), mock.Mock())
+        read_status.return_value = False
+        finish_script.return_value = "Traceback"
+
+        tasks.poll_k8s_job(
+            self.order.uuid.hex, core_utils.serialize_instance(self.fixture.staff)
+        )
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, marketplace_models.Order.States.ERRED)
+        self.assertEqual(self.order.error_message, "Traceback")
+
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.poll_k8s_job.apply_async")
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.utils.read_k8s_job_status")
+    def test_polling_is_rescheduled_while_job_is_running(
+        self, read_status, apply_async, get_apis
+    ):
+        get_apis.return_value = (mock.Mock(), mock.Mock())
+        read_status.return_value = None
+
+        tasks.poll_k8s_job(
+            self.order.uuid.hex, core_utils.serialize_instance(self.fixture.staff)
+        )
+
+        apply_async.assert_called_once()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, marketplace_models.Order.States.EXECUTING)
+
+    def poll(self, failures=0):
+        tasks.poll_k8s_job(
+            self.order.uuid.hex,
+            core_utils.serialize_instance(self.fixture.staff),
+            failures,
+        )
+
+    def assert_k8s_objects_are_deleted(self, batch_api, api):
+        batch_api.delete_namespaced_job.assert_called_once()
+        api.delete_namespaced_config_map.assert_called_once()
+
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.poll_k8s_job.apply_async")
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.utils.read_k8s_job_status")
+    def test_polling_is_retried_on_transient_error(
+        self, read_status, apply_async, get_apis
+    ):
+        get_apis.return_value = (mock.Mock(), mock.Mock())
+        read_status.side_effect = ApiException(status=503)
+
+        self.poll(failures=1)
+
+        self.assertEqual(apply_async.call_args.kwargs["args"][2], 2)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, marketplace_models.Order.States.EXECUTING)
+
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.poll_k8s_job.apply_async")
+    def test_polling_is_retried_if_kubernetes_is_unreachable(
+        self, apply_async, get_apis
+    ):
+        get_apis.side_effect = Exception("Max retries exceeded")
+
+        self.poll()
+
+        apply_async.assert_called_once()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, marketplace_models.Order.States.EXECUTING)
+
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.poll_k8s_job.apply_async")
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.utils.read_k8s_job_status")
+    def test_order_is_erred_when_job_is_missing(
+        self, read_status, apply_async, get_apis
+    ):
+        batch_api, api = mock.Mock(), mock.Mock()
+        get_apis.return_value = (batch_api, api)
+        read_status.side_effect = ApiException(status=404)
+
+        self.poll()
+
+        apply_async.assert_not_called()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, marketplace_models.Order.States.ERRED)
+        self.assert_k8s_objects_are_deleted(batch_api, api)
+
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.poll_k8s_job.apply_async")
+    @mock.patch("waldur_mastermind.marketplace_script.tasks.utils.read_k8s_job_status")
+    def test_order_is_erred_when_retries_are_exhausted(
+        self, read_status, apply_async, get_apis
+    ):
+        batch_api, api = mock.Mock(), mock.Mock()
+        get_apis.return_value = (batch_api, api)
+        read_status.side_effect = ApiException(status=500)
+
+        self.poll(failures=tasks.MAX_K8S_POLL_FAILURES - 1)
+
+        apply_async.assert_not_called()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, marketplace_models.Order.States.ERRED)
+        self.assert_k8s_objects_are_deleted(batch_api, api)
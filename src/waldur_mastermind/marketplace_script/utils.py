@@ -2,15 +2,17 @@ import json
 import logging
 import tempfile
 from enum import Enum
-from time import sleep
 
 import docker
 import kubernetes as k8s
 from django.conf import settings
+from django.db import transaction
 from docker.errors import ContainerError, DockerException
 from kubernetes.client.rest import ApiException
 from rest_framework import serializers as rf_serializers
 
+from waldur_core.core import utils as core_utils
+
 from . import serializers
 from .exceptions import JobFailedException
 
@@ -147,20 +149,54 @@ def delete_config_map_from_k8s(api: k8s.client.CoreV1Api, config_map_name):
     )
 
 
+def get_k8s_apis():
+    """
+    This function expects that Kubernetes config file located in path
+    from settings.WALDUR_MARKETPLACE_SCRIPT['K8S_CONFIG_PATH'] value
+    """
+    k8s.config.load_kube_config(
+        config_file=settings.WALDUR_MARKETPLACE_SCRIPT["K8S_CONFIG_PATH"]
+    )
+    return k8s.client.BatchV1Api(), k8s.client.CoreV1Api()
+
+
+def get_k8s_object_names(order_uuid):
+    return "job-%s" % order_uuid, "script-%s" % order_uuid, "volume-%s" % order_uuid
+
+
+def get_k8s_job_status(job_object):
+    if job_object.status.succeeded is not None:
+        return True
+    if job_object.status.failed is not None:
+        return False
+    # Job is still running
+    return None
+
+
+def read_k8s_job_status(batch_api: k8s.client.BatchV1Api, job_name):
+    api_response = batch_api.read_namespaced_job_status(
+        name=job_name,
+        namespace=NAMESPACE,
+    )
+    return get_k8s_job_status(api_response)
+
+
 def wait_for_k8s_job_completion(batch_api: k8s.client.BatchV1Api, job_name):
-    job_succeeded = None
-    while True:
-        api_response = batch_api.read_namespaced_job_status(
-            name=job_name,
-            namespace=NAMESPACE,
-        )
-        if api_response.status.succeeded is not None:
-            job_succeeded = True
-            break
-        if api_response.status.failed is not None:
-            job_succeeded = False
+    job_succeeded = False
+    watch = k8s.watch.Watch()
+    # Job is marked as failed by Kubernetes when active deadline is exceeded,
+    # so extra minute is enough to receive the final event.
+    for event in watch.stream(
+        batch_api.list_namespaced_job,
+        namespace=NAMESPACE,
+        field_selector="metadata.name=%s" % job_name,
+        timeout_seconds=settings.WALDUR_MARKETPLACE_SCRIPT["K8S_JOB_TIMEOUT"] + 60,
+    ):
+        status = get_k8s_job_status(event["object"])
+        if status is not None:
+            job_succeeded = status
+            watch.stop()
             break
-        sleep(10)
     logger.info(
         "Job %s in namespace %s completed with status %s",
         job_name,
@@ -179,59 +215,87 @@ def get_k8s_job_result(api: k8s.client.CoreV1Api, job_name):
     return log
 
 
-def execute_script_in_k8s(image, command, src, dry_run=False, **kwargs):
-    """
-    This function expects that Kubernetes config file located in path
-    from settings.WALDUR_MARKETPLACE_SCRIPT['K8S_CONFIG_PATH'] value
-    """
-    env = kwargs["environment"]
-    job_name = "job-%s" % env["ORDER_UUID"]
-    config_map_name = "script-%s" % env["ORDER_UUID"]
-    volume_name = "volume-%s" % env["ORDER_UUID"]
-
-    k8s.config.load_kube_config(
-        config_file=settings.WALDUR_MARKETPLACE_SCRIPT["K8S_CONFIG_PATH"]
+def start_script_in_k8s(batch_api, api, image, command, src, environment):
+    job_name, config_map_name, volume_name = get_k8s_object_names(
+        environment["ORDER_UUID"]
     )
-    batch_v1_api = k8s.client.BatchV1Api()
-    api_v1 = k8s.client.CoreV1Api()
-
     config_map_object = construct_k8s_config_map(config_map_name, src)
-
     job_object = construct_k8s_job(
-        job_name, image, command, volume_name, config_map_name, env
+        job_name, image, command, volume_name, config_map_name, environment
     )
 
-    create_config_map_in_k8s(api_v1, config_map_object)
-    create_job_in_k8s(batch_v1_api, job_object)
+    create_config_map_in_k8s(api, config_map_object)
+    create_job_in_k8s(batch_api, job_object)
+    return job_name
 
-    job_succeeded = wait_for_k8s_job_completion(batch_v1_api, job_name)
-    pod_log = get_k8s_job_result(api_v1, job_name)
 
-    delete_job_from_k8s(batch_v1_api, job_name)
-    delete_config_map_from_k8s(api_v1, config_map_name)
+def finish_script_in_k8s(batch_api, api, order_uuid):
+    job_name, config_map_name, _ = get_k8s_object_names(order_uuid)
+    try:
+        return get_k8s_job_result(api, job_name)
+    finally:
+        delete_job_from_k8s(batch_api, job_name)
+        delete_config_map_from_k8s(api, config_map_name)
+
+
+def delete_k8s_objects(order_uuid):
+    """
+    Delete job and config map of order if script has not been finished normally.
+    Errors are logged only, because objects may be already missing.
+    """
+    job_name, config_map_name, _ = get_k8s_object_names(order_uuid)
+    try:
+        batch_api, api = get_k8s_apis()
+    except Exception:
+        logger.exception("Unable to delete Kubernetes objects of job %s.", job_name)
+        return
+    try:
+        delete_job_from_k8s(batch_api, job_name)
+    except Exception:
+        logger.exception("Unable to delete Kubernetes job %s.", job_name)
+    try:
+        delete_config_map_from_k8s(api, config_map_name)
+    except Exception:
+        logger.exception("Unable to delete Kubernetes ConfigMap %s.", config_map_name)
+
+
+def execute_script_in_k8s(image, command, src, dry_run=False, **kwargs):
+    env = kwargs["environment"]
+    batch_v1_api, api_v1 = get_k8s_apis()
+
+    job_name = start_script_in_k8s(batch_v1_api, api_v1, image, command, src, env)
+    job_succeeded = wait_for_k8s_job_completion(batch_v1_api, job_name)
+    pod_log = finish_script_in_k8s(batch_v1_api, api_v1, env["ORDER_UUID"])
 
     if not job_succeeded and not dry_run:
         raise JobFailedException(pod_log)
     return pod_log
 
 
+def is_k8s_mode():
+    return (
+        settings.WALDUR_MARKETPLACE_SCRIPT["SCRIPT_RUN_MODE"]
+        == DeploymentOptions.KUBERNETES.value
+    )
+
+
 def execute_script(image, command, src, dry_run=False, **kwargs):
     if (
         settings.WALDUR_MARKETPLACE_SCRIPT["SCRIPT_RUN_MODE"]
         == DeploymentOptions.DOCKER.value
     ):
         return execute_script_in_docker(image, command, src, **kwargs)
-    if (
-        settings.WALDUR_MARKETPLACE_SCRIPT["SCRIPT_RUN_MODE"]
-        == DeploymentOptions.KUBERNETES.value
-    ):
+    if is_k8s_mode():
         return execute_script_in_k8s(image, command, src, dry_run=dry_run, **kwargs)
 
 
 class ContainerExecutorMixin:
     hook_type = NotImplemented
+    # Pair of job status and output which is set when order processing
+    # is resumed after completion of asynchronously started Kubernetes job.
+    job_result = None
 
-    def send_request(self, user, resource=None, dry_run=False):
+    def get_script_parameters(self):
         options = self.order.offering.secret_options
 
         serializer = serializers.OrderSerializer(instance=self.order)
@@ -245,6 +309,10 @@ class ContainerExecutorMixin:
         for opt in options.get("environ", []):
             if isinstance(opt, dict):
                 environment.update({opt["name"]: opt["value"]})
+        environment = {
+            key: json.dumps(value) if isinstance(value, dict | list) else str(value)
+            for key, value in environment.items()
+        }
 
         language = options["language"]
         image = settings.WALDUR_MARKETPLACE_SCRIPT["DOCKER_IMAGES"].get(language)[
@@ -253,6 +321,52 @@ class ContainerExecutorMixin:
         command = settings.WALDUR_MARKETPLACE_SCRIPT["DOCKER_IMAGES"].get(language)[
             "command"
         ]
+        return image, command, options[self.hook_type], environment
+
+    def submit_script(self, user):
+        """
+        Start script as Kubernetes job without waiting for its completion.
+        Returns True if job has been started; in this case order processing
+        is resumed by poll_k8s_job task when job is completed.
+        """
+        if self.job_result is not None or not is_k8s_mode():
+            return False
+
+        from . import tasks
+
+        image, command, src, environment = self.get_script_parameters()
+        try:
+            batch_api, api = get_k8s_apis()
+            start_script_in_k8s(batch_api, api, image, command, src, environment)
+        except ApiException as exc:
+            logger.exception(
+                "Unable to submit marketplace script to Kubernetes. "
+                "Hook type is %s. Order ID is %s.",
+                self.hook_type,
+                self.order.id,
+            )
+            raise rf_serializers.ValidationError(str(exc))
+
+        order_uuid = environment["ORDER_UUID"]
+        serialized_user = core_utils.serialize_instance(user)
+        transaction.on_commit(
+            lambda: tasks.schedule_k8s_job_poll(order_uuid, serialized_user)
+        )
+        return True
+
+    def receive_job_result(self):
+        job_succeeded, output = self.job_result
+        if not job_succeeded:
+            raise JobFailedException(output)
+        self.order.output = output
+        self.order.save(update_fields=["output"])
+        return output
+
+    def send_request(self, user, resource=None, dry_run=False):
+        if self.job_result is not None:
+            return self.receive_job_result()
+
+        image, command, src, environment = self.get_script_parameters()
 
         logger.debug(
             "About to execute marketplace script via Docker. "
@@ -262,14 +376,10 @@ class ContainerExecutorMixin:
         )
 
         try:
-            environment = {
-                key: json.dumps(value) if isinstance(value, dict | list) else str(value)
-                for key, value in environment.items()
-            }
             output = execute_script(
                 image=image,
                 command=command,
-                src=options[self.hook_type],
+                src=src,
                 dry_run=dry_run,
                 environment=environment,
             )
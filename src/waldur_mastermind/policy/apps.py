@@ -9,6 +9,8 @@ class PolicyConfig(AppConfig):
         from django.db.models import signals
 
         from waldur_core.core.utils import camel_case_to_underscore
+        from waldur_mastermind.invoices import models as invoices_models
+        from waldur_mastermind.invoices import signals as invoices_signals
         from waldur_mastermind.policy import handlers
 
         from . import models
@@ -36,3 +38,9 @@ class PolicyConfig(AppConfig):
                     sender=observable_klass,
                     dispatch_uid=f"{klass_name}_handler_for_observable_class",
                 )
+
+        invoices_signals.invoice_items_bulk_changed.connect(
+            handlers.estimated_cost_policy_bulk_trigger_handler,
+            sender=invoices_models.InvoiceItem,
+            dispatch_uid="estimated_cost_policy_bulk_trigger_handler",
+        )
@@ -48,6 +48,35 @@ def project_estimated_cost_policy_trigger_handler(
     run_one_time_actions(policies)
 
 
+def estimated_cost_policy_bulk_trigger_handler(sender, invoice, items, **kwargs):
+    """
+    Policies are evaluated once per affected scope
+    instead of once per changed invoice item.
+    """
+    run_one_time_actions(
+        models.CustomerEstimatedCostPolicy.objects.filter(scope=invoice.customer)
+    )
+
+    projects = {item.project for item in items if item.project}
+    if projects:
+        run_one_time_actions(
+            models.ProjectEstimatedCostPolicy.objects.filter(scope__in=projects)
+        )
+
+    offerings = {
+        (item.resource.offering, item.resource.project.customer.organization_group)
+        for item in items
+        if item.resource
+    }
+    for offering, organization_group in offerings:
+        run_one_time_actions(
+            models.OfferingEstimatedCostPolicy.objects.filter(
+                scope=offering,
+                organization_groups=organization_group,
+            )
+        )
+
+
 def get_offering_trigger_handler(klass):
     def handler(sender, instance, created=False, **kwargs):
         resource = instance.resource
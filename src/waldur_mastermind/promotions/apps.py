@@ -14,3 +14,17 @@ class BookingConfig(AppConfig):
             sender=models.Campaign,
             dispatch_uid="waldur_mastermind.promotions.apply_campaign_to_pending_invoices",
         )
+
+        for model in (models.Campaign, models.DiscountedResource):
+            signals.post_save.connect(
+                handlers.reset_discount_index,
+                sender=model,
+                dispatch_uid="waldur_mastermind.promotions.reset_discount_index_on_%s_save"
+                % model.__name__,
+            )
+            signals.post_delete.connect(
+                handlers.reset_discount_index,
+                sender=model,
+                dispatch_uid="waldur_mastermind.promotions.reset_discount_index_on_%s_delete"
+                % model.__name__,
+            )
@@ -1,6 +1,6 @@
 import logging
 
-from waldur_mastermind.promotions import models
+from waldur_mastermind.promotions import models, utils
 
 logger = logging.getLogger(__name__)
 
@@ -58,3 +58,7 @@ def apply_campaign_to_pending_invoices(sender, instance, created=False, **kwargs
                     invoice_item.details["campaign_uuid"] = campaign.uuid.hex
                     invoice_item.details["unit_price"] = float(unit_price)
                     invoice_item.save()
+
+
+def reset_discount_index(sender, **kwargs):
+    utils.reset_active_discount_index()
@@ -1,5 +1,3 @@
-import datetime
-
 from django.db import models as django_models
 from django_fsm import FSMIntegerField, transition
 from model_utils import FieldTracker
@@ -94,29 +92,12 @@ class Campaign(UuidMixin, DescribableMixin, NameMixin):
 
     @classmethod
     def get_discount_for_resource(cls, resource, year, month, unit_price):
-        discount = None, unit_price
-
-        for dr in DiscountedResource.objects.filter(resource=resource):
-            campaign = dr.campaign
-            created = dr.created
-
-            invoice_date = datetime.date(year=year, month=month, day=1)
-            discount_end = datetime.date(
-                year=created.year,
-                month=created.month + campaign.months - 1,  # if campaign.months==1
-                # then discount price will be on one month only
-                day=1,
-            )
-
-            if invoice_date > discount_end:
-                continue
+        from waldur_mastermind.promotions import utils
 
-            unit_price = campaign.get_discount_price(unit_price)
-
-            if not discount[0] or discount[1] > unit_price:
-                discount = campaign, unit_price
-
-        return discount
+        index = utils.get_active_discount_index() or utils.DiscountIndex(
+            resource_ids=[resource.id]
+        )
+        return index.get_discount_for_resource(resource, year, month, unit_price)
 
     def check_resource_on_conditions_of_campaign(self, resource):
         other_offerings = (
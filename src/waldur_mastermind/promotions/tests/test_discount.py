@@ -6,8 +6,9 @@ from rest_framework import test
 
 from waldur_mastermind.invoices import models as invoices_models
 from waldur_mastermind.marketplace import models as marketplace_models
-from waldur_mastermind.promotions import models
-from waldur_mastermind.promotions.tests import fixtures
+from waldur_mastermind.marketplace.tests import factories as marketplace_factories
+from waldur_mastermind.promotions import models, utils
+from waldur_mastermind.promotions.tests import factories, fixtures
 
 
 @ddt
@@ -110,3 +111,51 @@ class DiscountTest(test.APITransactionTestCase):
         )
         self.assertFalse("unit_price" in invoice_item.details.keys())
         self.assertFalse("campaign_uuid" in invoice_item.details.keys())
+
+
+class DiscountIndexTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.PromotionsFixture()
+        self.resource = self.fixture.resource
+        self.campaign = self.fixture.campaign
+        self.today = datetime.date.today()
+
+    def get_discount(self, resource):
+        return models.Campaign.get_discount_for_resource(
+            resource, self.today.year, self.today.month, 100
+        )
+
+    def test_index_returns_the_same_discount_as_direct_lookup(self):
+        expected = self.get_discount(self.resource)
+        with utils.discount_index():
+            self.assertEqual(self.get_discount(self.resource), expected)
+        self.assertEqual(expected, (self.campaign, 50))
+
+    def test_discount_is_not_applied_after_end_of_campaign_period(self):
+        next_month = self.today.replace(day=1) + datetime.timedelta(days=31)
+        with utils.discount_index():
+            self.assertEqual(
+                models.Campaign.get_discount_for_resource(
+                    self.resource, next_month.year, next_month.month, 100
+                ),
+                (None, 100),
+            )
+
+    def test_lookups_do_not_depend_on_number_of_resources(self):
+        resources = [
+            factories.DiscountedResourceFactory(campaign=self.campaign).resource
+            for _ in range(10)
+        ]
+        with utils.discount_index():
+            with self.assertNumQueries(1):
+                for resource in resources:
+                    self.assertEqual(self.get_discount(resource), (self.campaign, 50))
+
+    def test_index_is_reset_when_discounted_resource_is_changed(self):
+        other_resource = marketplace_factories.ResourceFactory()
+        with utils.discount_index():
+            self.assertEqual(self.get_discount(other_resource), (None, 100))
+            factories.DiscountedResourceFactory(
+                campaign=self.campaign, resource=other_resource
+            )
+            self.assertEqual(self.get_discount(other_resource), (self.campaign, 50))
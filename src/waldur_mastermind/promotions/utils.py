@@ -0,0 +1,87 @@
+import collections
+import contextlib
+import datetime
+import threading
+
+from dateutil.relativedelta import relativedelta
+
+from waldur_mastermind.promotions import models
+
+_local = threading.local()
+
+
+def get_discount_end(discounted_resource):
+    # if campaign.months == 1 then discount price will be on one month only
+    created = discounted_resource.created
+    return datetime.date(year=created.year, month=created.month, day=1) + relativedelta(
+        months=discounted_resource.campaign.months - 1
+    )
+
+
+class DiscountIndex:
+    """
+    In-memory index of discounted resources.
+    It is filled by single query on first lookup, so that discount
+    for every resource is resolved without further database queries.
+    """
+
+    def __init__(self, resource_ids=None):
+        self.resource_ids = resource_ids
+        self.entries = None
+
+    def reset(self):
+        self.entries = None
+
+    def build(self):
+        queryset = models.DiscountedResource.objects.select_related("campaign")
+        if self.resource_ids is not None:
+            queryset = queryset.filter(resource_id__in=self.resource_ids)
+
+        entries = collections.defaultdict(list)
+        for discounted_resource in queryset:
+            entries[discounted_resource.resource_id].append(
+                (discounted_resource.campaign, get_discount_end(discounted_resource))
+            )
+        self.entries = entries
+
+    def get_discount_for_resource(self, resource, year, month, unit_price):
+        if self.entries is None:
+            self.build()
+
+        discount = None, unit_price
+        invoice_date = datetime.date(year=year, month=month, day=1)
+
+        for campaign, discount_end in self.entries.get(resource.id, []):
+            if invoice_date > discount_end:
+                continue
+
+            unit_price = campaign.get_discount_price(unit_price)
+
+            if not discount[0] or discount[1] > unit_price:
+                discount = campaign, unit_price
+
+        return discount
+
+
+def get_active_discount_index():
+    return getattr(_local, "index", None)
+
+
+@contextlib.contextmanager
+def discount_index():
+    """
+    Share single discount index between all discount lookups within the block,
+    for example, during creation of monthly invoices.
+    """
+    previous = get_active_discount_index()
+    _local.index = DiscountIndex()
+    try:
+        yield _local.index
+    finally:
+        _local.index = previous
+
+
+def reset_active_discount_index():
+    index = get_active_discount_index()
+    if index:
+        index.reset()
@@ -1,6 +1,8 @@
+import datetime
 import logging
 
 from celery import shared_task
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F
 from django.utils import timezone
 
 from waldur_mastermind.proposal import models as proposal_models
@@ -36,52 +38,67 @@ def create_reviews_if_strategy_is_after_proposal():
     )
 
     for r in rounds:
-        for proposal in r.proposal_set.filter(
-            state__in=(
-                proposal_models.Proposal.States.SUBMITTED,
-                proposal_models.Proposal.States.IN_REVIEW,
-            )
-        ):
-            utils.process_proposals_pending_reviewers(proposal)
+        utils.create_reviews(r, utils.get_proposals_pending_reviewers(r))
 
 
 @shared_task(
     name="waldur_mastermind.proposal.proposals_for_ended_rounds_should_be_cancelled"
 )
 def proposals_for_ended_rounds_should_be_cancelled():
-    for proposal in proposal_models.Proposal.objects.exclude(
-        state__in=(
-            proposal_models.Proposal.States.ACCEPTED,
-            proposal_models.Proposal.States.REJECTED,
-            proposal_models.Proposal.States.CANCELED,
-        )
-    ).filter(round__cutoff_time__lt=timezone.now()):
-        proposal.state = proposal_models.Proposal.States.CANCELED
-        proposal.save(update_fields=["state"])
-
-        log.event_logger.proposal.info(
+    States = proposal_models.Proposal.States
+    proposals = utils.bulk_transition(
+        proposal_models.Proposal.objects.filter(
+            round__cutoff_time__lt=timezone.now()
+        ).select_related("round__call__manager__customer"),
+        source_states=(
+            States.DRAFT,
+            States.TEAM_VERIFICATION,
+            States.SUBMITTED,
+            States.IN_REVIEW,
+            States.IN_REVISION,
+        ),
+        target_state=States.CANCELED,
+        event_logger=log.event_logger.proposal,
+        get_event=lambda proposal: (
             f"Proposal {proposal.name} has been canceled.",
-            event_type="proposal_canceled",
-            event_context={"proposal": proposal},
-        )
+            "proposal_canceled",
+            {"proposal": proposal},
+        ),
+    )
+
+    for proposal in proposals:
         logger.info(f"Proposal {proposal.name} has been canceled.")
 
 
 @shared_task(name="waldur_mastermind.proposal.expired_reviews_should_be_cancelled")
 def expired_reviews_should_be_cancelled():
-    for review in proposal_models.Review.objects.filter(
-        state__in=(
+    review_end_date = ExpressionWrapper(
+        F("created")
+        + ExpressionWrapper(
+            F("proposal__round__review_duration_in_days") * datetime.timedelta(days=1),
+            output_field=DurationField(),
+        ),
+        output_field=DateTimeField(),
+    )
+    reviews = utils.bulk_transition(
+        proposal_models.Review.objects.filter(
+            proposal__round__review_duration_in_days__gt=0
+        )
+        .alias(review_end_date=review_end_date)
+        .filter(review_end_date__lte=timezone.now())
+        .select_related("proposal__round__call__manager__customer"),
+        source_states=(
             proposal_models.Review.States.IN_REVIEW,
             proposal_models.Review.States.CREATED,
-        )
-    ):
-        if review.review_end_date <= timezone.now():
-            review.state = proposal_models.Review.States.REJECTED
-            review.save(update_fields=["state"])
-
-            log.event_logger.review.info(
-                f"Review for {review.proposal.name} has been canceled.",
-                event_type="review_canceled",
-                event_context={"review": review},
-            )
-            logger.info(f"Review {review.proposal.name} has been canceled.")
+        ),
+        target_state=proposal_models.Review.States.REJECTED,
+        event_logger=log.event_logger.review,
+        get_event=lambda review: (
+            f"Review for {review.proposal.name} has been canceled.",
+            "review_canceled",
+            {"review": review},
+        ),
+    )
+
+    for review in reviews:
+        logger.info(f"Review {review.proposal.name} has been canceled.")
@@ -1,6 +1,7 @@
 import datetime
 
 from ddt import data, ddt
+from django.utils import timezone
 from rest_framework import status, test
 
 from waldur_core.media.utils import dummy_image
@@ -549,3 +550,83 @@ class TaskTest(test.APITransactionTestCase):
         from waldur_core.logging.models import Event
 
         self.assertTrue(Event.objects.filter(event_type="proposal_canceled").exists())
+
+    def test_one_event_is_logged_for_every_cancelled_proposal(self):
+        from waldur_core.logging.models import Event
+
+        other_proposal = factories.ProposalFactory(
+            round=self.round, state=models.Proposal.States.SUBMITTED
+        )
+        accepted_proposal = factories.ProposalFactory(
+            round=self.round, state=models.Proposal.States.ACCEPTED
+        )
+        self.round.cutoff_time = datetime.datetime.now() - datetime.timedelta(days=1)
+        self.round.save()
+        week_ago = timezone.now() - datetime.timedelta(days=7)
+        models.Proposal.objects.update(modified=week_ago)
+
+        tasks.proposals_for_ended_rounds_should_be_cancelled()
+
+        accepted_proposal.refresh_from_db()
+        self.assertEqual(accepted_proposal.state, models.Proposal.States.ACCEPTED)
+        self.assertEqual(accepted_proposal.modified, week_ago)
+        for proposal in (self.proposal, other_proposal):
+            proposal.refresh_from_db()
+            self.assertGreater(proposal.modified, week_ago)
+        self.assertEqual(
+            set(
+                Event.objects.filter(event_type="proposal_canceled").values_list(
+                    "message", flat=True
+                )
+            ),
+            {
+                f"Proposal {self.proposal.name} has been canceled.",
+                f"Proposal {other_proposal.name} has been canceled.",
+            },
+        )
+        self.assertEqual(
+            Event.objects.filter(event_type="proposal_canceled").count(), 2
+        )
+
+        # Cancelled proposals are not processed again
+        tasks.proposals_for_ended_rounds_should_be_cancelled()
+        self.assertEqual(
+            Event.objects.filter(event_type="proposal_canceled").count(), 2
+        )
+
+    def test_expired_reviews_should_be_cancelled(self):
+        from waldur_core.logging.models import Event
+
+        review = self.fixture.review
+        self.round.review_duration_in_days = 1
+        self.round.save()
+
+        tasks.expired_reviews_should_be_cancelled()
+        review.refresh_from_db()
+        self.assertEqual(review.state, models.Review.States.CREATED)
+
+        two_days_ago = timezone.now() - datetime.timedelta(days=2)
+        models.Review.objects.filter(id=review.id).update(
+            created=two_days_ago, modified=two_days_ago
+        )
+        tasks.expired_reviews_should_be_cancelled()
+        review.refresh_from_db()
+        self.assertEqual(review.state, models.Review.States.REJECTED)
+        self.assertGreater(review.modified, two_days_ago)
+
+        events = Event.objects.filter(event_type="review_canceled")
+        self.assertEqual(events.count(), 1)
+        self.assertEqual(
+            events.get().message,
+            f"Review for {review.proposal.name} has been canceled.",
+        )
+
+    def test_reviews_of_rounds_without_review_duration_are_not_cancelled(self):
+        review = self.fixture.review
+        models.Review.objects.filter(id=review.id).update(
+            created=datetime.datetime.now() - datetime.timedelta(days=30)
+        )
+
+        tasks.expired_reviews_should_be_cancelled()
+        review.refresh_from_db()
+        self.assertEqual(review.state, models.Review.States.CREATED)
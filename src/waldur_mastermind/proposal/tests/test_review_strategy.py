@@ -1,6 +1,9 @@
 from rest_framework import test
 
-from waldur_mastermind.proposal import models, tasks
+from waldur_core.permissions import utils as permissions_utils
+from waldur_core.permissions.fixtures import CallRole
+from waldur_core.structure.tests import factories as structure_factories
+from waldur_mastermind.proposal import models, tasks, utils
 from waldur_mastermind.proposal.tests import factories, fixtures
 
 
@@ -98,3 +101,85 @@ class AfterProposalTest(test.APITransactionTestCase):
             self.proposal_draft.review_set.filter().count(),
             0,
         )
+
+
+class AssignReviewersTest(test.APITransactionTestCase):
+    def test_reviewers_are_assigned_evenly(self):
+        load = {10: 0, 11: 0, 12: 0}
+        assignments = utils.assign_reviewers({1: 2, 2: 2, 3: 2}, {}, load)
+
+        self.assertEqual(len(assignments), 6)
+        self.assertEqual(load, {10: 2, 11: 2, 12: 2})
+        for proposal_id in (1, 2, 3):
+            reviewers = [r for p, r in assignments if p == proposal_id]
+            self.assertEqual(len(set(reviewers)), 2)
+
+    def test_existing_load_is_taken_into_account(self):
+        assignments = utils.assign_reviewers({1: 1}, {}, {10: 3, 11: 1, 12: 2})
+        self.assertEqual(assignments, [(1, 11)])
+
+    def test_excluded_reviewers_are_not_assigned(self):
+        assignments = utils.assign_reviewers({1: 2}, {1: {10}}, {10: 0, 11: 5, 12: 7})
+        self.assertEqual(assignments, [(1, 11), (1, 12)])
+
+    def test_assignment_is_deterministic(self):
+        result = [
+            utils.assign_reviewers({3: 1, 1: 2, 2: 1}, {}, dict.fromkeys(ids, 0))
+            for ids in ((12, 10, 11), (10, 11, 12))
+        ]
+        self.assertEqual(result[0], result[1])
+        self.assertEqual(result[0], [(1, 10), (1, 11), (2, 12), (3, 10)])
+
+
+class CreateReviewsOfRoundTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.ProposalFixture()
+        self.round = self.fixture.round
+        self.round.minimum_number_of_reviewers = 2
+        self.round.save()
+        self.reviewers = [self.fixture.reviewer_1, self.fixture.reviewer_2]
+        for _ in range(2):
+            user = structure_factories.UserFactory()
+            permissions_utils.add_user(self.round.call, user, CallRole.REVIEWER)
+            self.reviewers.append(user)
+        self.proposals = [
+            factories.ProposalFactory(
+                round=self.round, state=models.Proposal.States.SUBMITTED
+            )
+            for _ in range(6)
+        ]
+
+    def test_reviews_are_balanced_between_reviewers(self):
+        utils.create_reviews_of_round(self.round)
+
+        for proposal in self.proposals:
+            proposal.refresh_from_db()
+            self.assertEqual(proposal.state, models.Proposal.States.IN_REVIEW)
+            reviewers = proposal.review_set.values_list("reviewer_id", flat=True)
+            self.assertEqual(len(reviewers), 2)
+            self.assertEqual(len(set(reviewers)), 2)
+
+        load = [
+            models.Review.objects.filter(
+                proposal__round__call=self.round.call, reviewer=reviewer
+            )
+            .exclude(state=models.Review.States.REJECTED)
+            .count()
+            for reviewer in self.reviewers
+        ]
+        self.assertLessEqual(max(load) - min(load), 1)
+
+    def test_rejected_reviewer_is_replaced_by_other_reviewer(self):
+        utils.create_reviews_of_round(self.round)
+        proposal = self.proposals[0]
+        review = proposal.review_set.first()
+        review.state = models.Review.States.REJECTED
+        review.save()
+
+        utils.create_reviews_of_round(self.round)
+
+        active_reviews = proposal.review_set.exclude(
+            state=models.Review.States.REJECTED
+        )
+        self.assertEqual(active_reviews.count(), 2)
+        self.assertFalse(active_reviews.filter(reviewer=review.reviewer).exists())
@@ -1,38 +1,146 @@
+import collections
+import heapq
+
 from django.db import transaction
-from django.db.models import OuterRef, QuerySet
+from django.db.models import Count, QuerySet
+from django.utils import timezone
 
-from waldur_core.core.utils import SubqueryCount, get_system_robot
+from waldur_core.core.utils import get_system_robot
 from waldur_core.permissions.enums import RoleEnum
 from waldur_core.permissions.utils import get_users
 from waldur_mastermind.marketplace import models as marketplace_models
 from waldur_mastermind.proposal import models as proposal_models
 
 
-def get_available_reviewer(proposal: proposal_models.Proposal):
-    reviewer_ids = proposal.review_set.values_list("reviewer_id", flat=True)
-    reviews = proposal_models.Review.objects.filter(
-        reviewer_id=OuterRef("pk"), proposal__round__call=proposal.round.call
-    ).exclude(state=proposal_models.Review.States.REJECTED)
-    available_reviewer = (
-        proposal.round.call.reviewers.exclude(id__in=reviewer_ids)
-        .annotate(reviewers_count=SubqueryCount(reviews))
-        .order_by("reviewers_count")
+def assign_reviewers(needed_reviewers, excluded_reviewers, reviewer_load):
+    """
+    Greedily assign the least loaded reviewers to proposals.
+    Proposals are processed in ascending order of ID and ties between reviewers
+    are broken by reviewer ID, so that result is deterministic.
+
+    :param needed_reviewers: dictionary mapping proposal ID to number of needed reviewers.
+    :param excluded_reviewers: dictionary mapping proposal ID to set of reviewer IDs
+        which can not be assigned to the proposal.
+    :param reviewer_load: dictionary mapping reviewer ID to number of active reviews.
+        It is updated in place.
+    :return: list of pairs of proposal ID and reviewer ID.
+    """
+    assignments = []
+    for proposal_id in sorted(needed_reviewers):
+        excluded = excluded_reviewers.get(proposal_id, set())
+        candidates = [
+            reviewer_id for reviewer_id in reviewer_load if reviewer_id not in excluded
+        ]
+        selected = heapq.nsmallest(
+            needed_reviewers[proposal_id],
+            candidates,
+            key=lambda reviewer_id: (reviewer_load[reviewer_id], reviewer_id),
+        )
+        for reviewer_id in selected:
+            reviewer_load[reviewer_id] += 1
+            assignments.append((proposal_id, reviewer_id))
+    return assignments
+
+
+def create_reviews(call_round, proposal_ids):
+    """
+    Create missing reviews for proposals of the round and mark proposals as being in review.
+    Current load of reviewers is loaded once for the whole round.
+    """
+    if not proposal_ids:
+        return
+
+    call = call_round.call
+    reviewer_load = dict.fromkeys(call.reviewers.values_list("id", flat=True), 0)
+    reviewer_load.update(
+        proposal_models.Review.objects.filter(
+            proposal__round__call=call, reviewer_id__in=reviewer_load.keys()
+        )
+        .exclude(state=proposal_models.Review.States.REJECTED)
+        .values_list("reviewer_id")
+        .annotate(count=Count("id"))
     )
-    number_of_needed_reviewers = (
-        proposal.round.minimum_number_of_reviewers
-        - proposal.review_set.exclude(
-            state=proposal_models.Review.States.REJECTED
-        ).count()
+
+    # Reviewer who has already been assigned to proposal can not be assigned again
+    # even if review has been rejected.
+    excluded_reviewers = collections.defaultdict(set)
+    active_reviews = collections.Counter()
+    for proposal_id, reviewer_id, state in proposal_models.Review.objects.filter(
+        proposal_id__in=proposal_ids
+    ).values_list("proposal_id", "reviewer_id", "state"):
+        excluded_reviewers[proposal_id].add(reviewer_id)
+        if state != proposal_models.Review.States.REJECTED:
+            active_reviews[proposal_id] += 1
+
+    minimum_number_of_reviewers = call_round.minimum_number_of_reviewers or 0
+    needed_reviewers = {
+        proposal_id: minimum_number_of_reviewers - active_reviews[proposal_id]
+        for proposal_id in proposal_ids
+    }
+    assignments = assign_reviewers(needed_reviewers, excluded_reviewers, reviewer_load)
+
+    with transaction.atomic():
+        proposal_models.Review.objects.bulk_create(
+            [
+                proposal_models.Review(proposal_id=proposal_id, reviewer_id=reviewer_id)
+                for proposal_id, reviewer_id in assignments
+            ]
+        )
+        proposal_models.Proposal.objects.filter(id__in=proposal_ids).update(
+            state=proposal_models.Proposal.States.IN_REVIEW,
+            modified=timezone.now(),
+        )
+
+
+def get_proposals_pending_reviewers(call_round):
+    return list(
+        call_round.proposal_set.filter(
+            state__in=(
+                proposal_models.Proposal.States.SUBMITTED,
+                proposal_models.Proposal.States.IN_REVIEW,
+            )
+        ).values_list("id", flat=True)
     )
-    return available_reviewer[:number_of_needed_reviewers]
 
 
-def process_proposals_pending_reviewers(proposal: proposal_models.Proposal):
-    for reviewer in get_available_reviewer(proposal):
-        proposal_models.Review.objects.create(reviewer=reviewer, proposal=proposal)
+def bulk_transition(queryset, source_states, target_state, event_logger, get_event):
+    """
+    Switch state of objects matching queryset using single UPDATE guarded by source states
+    and log event for every transitioned object using single batch of inserts.
+
+    :param event_logger: event logger used for transitioned objects, for example,
+        event_logger.proposal
+    :param get_event: callable which receives transitioned object and returns tuple
+        of message template, event type and event context.
+    :return: list of transitioned objects.
+    """
+    with transaction.atomic():
+        objects = list(
+            queryset.filter(state__in=source_states).select_for_update(of=("self",))
+        )
+        if not objects:
+            return []
+
+        model = queryset.model
+        values = {"state": target_state}
+        # Modification time is updated explicitly as save() would do it.
+        if any(field.name == "modified" for field in model._meta.concrete_fields):
+            values["modified"] = timezone.now()
+        model.objects.filter(
+            id__in=[obj.id for obj in objects], state__in=source_states
+        ).update(**values)
+
+        events = collections.defaultdict(list)
+        for obj in objects:
+            for field, value in values.items():
+                setattr(obj, field, value)
+            message, event_type, event_context = get_event(obj)
+            events[event_type].append((message, event_context))
 
-    proposal.state = proposal_models.Proposal.States.IN_REVIEW
-    return proposal.save()
+        for event_type, event_list in events.items():
+            event_logger.process_many("info", event_list, event_type=event_type)
+
+    return objects
 
 
 def allocate_proposal(proposal: proposal_models.Proposal):
@@ -79,10 +187,4 @@ def create_reviews_of_round(call_round):
         state=proposal_models.Proposal.States.CANCELED
     )
 
-    for proposal in call_round.proposal_set.filter(
-        state__in=(
-            proposal_models.Proposal.States.SUBMITTED,
-            proposal_models.Proposal.States.IN_REVIEW,
-        )
-    ):
-        process_proposals_pending_reviewers(proposal)
+    create_reviews(call_round, get_proposals_pending_reviewers(call_round))
@@ -9,10 +9,15 @@ from . import exceptions
 
 logger = logging.getLogger(__name__)
 
+# Timeout in seconds for metadata lookups, so that a stuck request does not block refresh.
+REQUEST_TIMEOUT = 30
+
 
 class DataciteBackend(ServiceBackend):
-    def __init__(self):
+    def __init__(self, session=None):
         self.settings = settings.WALDUR_PID["DATACITE"]
+        # Session allows to reuse connection for consecutive lookups.
+        self.session = session
 
     def _datacite_auth_request(self, request_verb, data, url=None):
         headers = {
@@ -48,10 +53,16 @@ class DataciteBackend(ServiceBackend):
 
         url = f"{url}/{doi}"
 
-        response = requests.get(
-            url=url,
-            headers=headers,
-        )
+        try:
+            response = (self.session or requests).get(
+                url=url,
+                headers=headers,
+                timeout=REQUEST_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            raise exceptions.DataciteException(
+                f"Unable to fetch Datacite data for {doi}: {e}"
+            ) from e
         return response
 
     def _get_request_data(self, instance):
@@ -24,3 +24,17 @@ class DataciteReferral(core_models.UuidMixin, core_mixins.ScopeMixin):
 
     def __str__(self):
         return f"{self.scope} | {self.pid}"
+
+
+class DataciteFingerprint(models.Model):
+    """
+    Digest of Datacite metadata last used to refresh referrals of a DOI.
+    It allows to skip lookups and database writes for unchanged DOIs.
+    """
+
+    doi = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.doi
@@ -0,0 +1,285 @@
+import collections
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from . import backend, exceptions, mixins, models
+
+logger = logging.getLogger(__name__)
+
+# Number of concurrent Datacite lookups.
+MAX_WORKERS = 8
+
+REFERRAL_FIELDS = (
+    "relation_type",
+    "resource_type",
+    "creator",
+    "publisher",
+    "title",
+    "published",
+    "referral_url",
+)
+
+_local = threading.local()
+
+
+def get_backend():
+    # Every worker thread has its own session, because sessions are not thread-safe.
+    if not hasattr(_local, "backend"):
+        _local.backend = backend.DataciteBackend(session=requests.Session())
+    return _local.backend
+
+
+def fetch_datacite_data(doi):
+    try:
+        return get_backend().get_datacite_data(doi)
+    except (
+        exceptions.DataciteException,
+        requests.RequestException,
+        ValueError,
+        KeyError,
+    ) as e:
+        # Malformed response is logged and the DOI is treated as failed.
+        logger.warning("Failed to lookup metadata for %s: %s", doi, e)
+
+
+def get_related_identifiers(datacite_data):
+    return [
+        (
+            x["relatedIdentifier"],
+            x["relationType"],
+            x["resourceTypeGeneral"],
+        )
+        for x in datacite_data["attributes"]["relatedIdentifiers"]
+    ]
+
+
+def get_fingerprint(doi, datacite_data):
+    """
+    Digest of metadata which is used for referrals refresh.
+    Other attributes, such as modification timestamp, do not affect it.
+    Return None if metadata is malformed.
+    """
+    try:
+        payload = {
+            "citation_count": datacite_data["attributes"]["citationCount"],
+            "related_identifiers": sorted(get_related_identifiers(datacite_data)),
+        }
+    except (KeyError, TypeError) as e:
+        logger.warning("Malformed metadata of %s: %r", doi, e)
+        return None
+    value = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def get_referral_details(pid, referral_data):
+    """
+    Return flat referral details or None if metadata is malformed.
+    """
+    try:
+        referral_attributes = referral_data["attributes"]
+        # some assumptions to get a flat structure
+        if len(referral_attributes["titles"]) > 0:
+            title = referral_attributes["titles"][0]["title"]
+        else:
+            title = "N/A"
+
+        if len(referral_attributes["creators"]) > 0:
+            creator = referral_attributes["creators"][0]["name"]
+        else:
+            creator = "N/A"
+
+        return {
+            "creator": creator,
+            "publisher": referral_attributes["publisher"],
+            "title": title,
+            "published": referral_attributes["published"],
+            "referral_url": referral_attributes["url"],
+        }
+    except (KeyError, TypeError, IndexError) as e:
+        logger.warning("Malformed metadata of referral %s: %r", pid, e)
+        return None
+
+
+class ReferralsRefresher:
+    """
+    Refresh citation count and referrals of referrables registered in Datacite.
+
+    Metadata of DOIs and of their referrals is fetched by a pool of threads,
+    every unique DOI is looked up only once. Referrables whose metadata
+    fingerprint has not changed since the previous refresh are skipped,
+    referrals of other ones are created, updated and deleted in bulk.
+    """
+
+    def __init__(self, referrables=None, force=False, max_workers=MAX_WORKERS):
+        self.referrables = referrables
+        self.force = force
+        self.max_workers = max_workers
+
+    def get_referrables(self):
+        if self.referrables is not None:
+            return [
+                referrable for referrable in self.referrables if referrable.datacite_doi
+            ]
+        referrables = []
+        for model in mixins.DataciteMixin.get_all_models():
+            referrables.extend(
+                model.objects.exclude(datacite_doi="").only(
+                    "id", "datacite_doi", "citation_count"
+                )
+            )
+        return referrables
+
+    def fetch(self, dois):
+        dois = sorted(set(dois))
+        if not dois:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(zip(dois, executor.map(fetch_datacite_data, dois)))
+
+    def run(self):
+        """
+        Return number of referrables which have been updated.
+        """
+        referrables = self.get_referrables()
+        metadata = self.fetch(referrable.datacite_doi for referrable in referrables)
+        fingerprints = {}
+        for doi, data in metadata.items():
+            fingerprint = data and get_fingerprint(doi, data)
+            if fingerprint:
+                fingerprints[doi] = fingerprint
+        previous = models.DataciteFingerprint.objects.in_bulk(
+            list(fingerprints), field_name="doi"
+        )
+
+        changed = []
+        for referrable in referrables:
+            doi = referrable.datacite_doi
+            if doi not in fingerprints:
+                continue
+            if (
+                not self.force
+                and doi in previous
+                and previous[doi].fingerprint == fingerprints[doi]
+                and referrable.citation_count >= 0
+            ):
+                continue
+            changed.append(referrable)
+
+        if not changed:
+            return 0
+
+        referrals = self.fetch(
+            pid
+            for referrable in changed
+            for pid, _, _ in get_related_identifiers(metadata[referrable.datacite_doi])
+        )
+
+        by_model = collections.defaultdict(list)
+        for referrable in changed:
+            by_model[type(referrable)].append(referrable)
+
+        complete_dois = set()
+        with transaction.atomic():
+            for model, items in by_model.items():
+                complete_dois.update(
+                    self.save_referrables(model, items, metadata, referrals)
+                )
+            self.save_fingerprints({doi: fingerprints[doi] for doi in complete_dois})
+        return len(changed)
+
+    def save_referrables(self, model, referrables, metadata, referrals):
+        """
+        Synchronize referrals of referrables of the same model with fetched metadata.
+        Return DOIs whose referrals have been fetched completely.
+        """
+        content_type = ContentType.objects.get_for_model(model)
+        existing = collections.defaultdict(dict)
+        for referral in models.DataciteReferral.objects.filter(
+            content_type=content_type,
+            object_id__in=[referrable.id for referrable in referrables],
+        ):
+            existing[referral.object_id][referral.pid] = referral
+
+        to_create = []
+        to_update = []
+        to_delete = []
+        complete_dois = set()
+
+        for referrable in referrables:
+            datacite_data = metadata[referrable.datacite_doi]
+            referrable.citation_count = datacite_data["attributes"]["citationCount"]
+            related_identifiers = get_related_identifiers(datacite_data)
+            current = existing[referrable.id]
+            complete = True
+
+            for pid, rel_type, resource_type in related_identifiers:
+                referral_data = referrals.get(pid)
+                values = referral_data and get_referral_details(pid, referral_data)
+                if not values:
+                    complete = False
+                    continue
+                values["relation_type"] = rel_type
+                values["resource_type"] = resource_type
+
+                referral = current.get(pid)
+                if referral is None:
+                    referral = models.DataciteReferral(
+                        pid=pid,
+                        content_type=content_type,
+                        object_id=referrable.id,
+                        **values,
+                    )
+                    current[pid] = referral
+                    to_create.append(referral)
+                elif any(
+                    getattr(referral, field) != value for field, value in values.items()
+                ):
+                    for field, value in values.items():
+                        setattr(referral, field, value)
+                    to_update.append(referral)
+
+            # cleanup stale citations
+            pids = {pid for pid, _, _ in related_identifiers}
+            to_delete.extend(
+                referral.id for pid, referral in current.items() if pid not in pids
+            )
+
+            if complete:
+                complete_dois.add(referrable.datacite_doi)
+
+        models.DataciteReferral.objects.bulk_create(to_create)
+        models.DataciteReferral.objects.bulk_update(to_update, REFERRAL_FIELDS)
+        if to_delete:
+            models.DataciteReferral.objects.filter(id__in=to_delete).delete()
+        model.objects.bulk_update(referrables, ["citation_count"])
+
+        logger.info(
+            "Referrals of %s %s have been refreshed: %s created, %s updated, %s deleted.",
+            len(referrables),
+            model._meta.verbose_name_plural,
+            len(to_create),
+            len(to_update),
+            len(to_delete),
+        )
+        return complete_dois
+
+    def save_fingerprints(self, fingerprints):
+        models.DataciteFingerprint.objects.bulk_create(
+            [
+                models.DataciteFingerprint(
+                    doi=doi, fingerprint=fingerprint, modified=timezone.now()
+                )
+                for doi, fingerprint in fingerprints.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["doi"],
+            update_fields=["fingerprint", "modified"],
+        )
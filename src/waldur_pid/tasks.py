@@ -1,11 +1,10 @@
 import logging
 
 from celery import shared_task
-from django.contrib.contenttypes.models import ContentType
 
 from waldur_core.core import utils as core_utils
 
-from . import backend, exceptions, mixins, models
+from . import backend, exceptions, mixins, refresh
 
 logger = logging.getLogger(__name__)
 
@@ -38,13 +37,9 @@ def link_doi_with_collection(serialized_instance):
 
 
 @shared_task(name="waldur_pid.update_all_referrables")
-def update_all_referrables():
-    for model in mixins.DataciteMixin.get_all_models():
-        for referrable in model.objects.exclude(datacite_doi=""):
-            try:
-                get_datacite_info_helper(referrable)
-            except Exception as e:
-                logger.critical(e)
+def update_all_referrables(force=False):
+    count = refresh.ReferralsRefresher(force=force).run()
+    logger.info("Referrals of %s referrables have been updated.", count)
 
 
 @shared_task
@@ -59,65 +54,8 @@ def update_referrable(serialized_referrable):
 
 def get_datacite_info_helper(referrable):
     logger.debug("Collecting referrals for Referrable %s" % referrable)
-    doi = referrable.datacite_doi
-    try:
-        datacite_data = backend.DataciteBackend().get_datacite_data(doi)
-    except exceptions.DataciteException as e:
-        logger.warning("Failed to lookup metadata for a Referrable %s" % doi)
-        logger.exception(e)
-        return
-
-    if datacite_data:
-        content_type = ContentType.objects.get_for_model(referrable)
-        referrable.citation_count = datacite_data["attributes"]["citationCount"]
-        referrals_pids = [
-            (
-                x["relatedIdentifier"],
-                x["relationType"],
-                x["resourceTypeGeneral"],
-            )
-            for x in datacite_data["attributes"]["relatedIdentifiers"]
-        ]
-        for pid, rel_type, resource_type in referrals_pids:
-            try:
-                referral_attributes = backend.DataciteBackend().get_datacite_data(pid)[
-                    "attributes"
-                ]
-            except exceptions.DataciteException as e:
-                logger.warning("Failed to lookup metadata about a reference %s" % pid)
-                logger.exception(e)
-                continue
-
-            # some assumptions to get a flat structure
-            if len(referral_attributes["titles"]) > 0:
-                title = referral_attributes["titles"][0]["title"]
-            else:
-                title = "N/A"
-
-            if len(referral_attributes["creators"]) > 0:
-                creator = referral_attributes["creators"][0]["name"]
-            else:
-                creator = "N/A"
-
-            referrable_referral, _ = models.DataciteReferral.objects.update_or_create(
-                pid=pid,
-                content_type=content_type,
-                object_id=referrable.id,
-                defaults={
-                    "relation_type": rel_type,
-                    "resource_type": resource_type,
-                    "creator": creator,
-                    "publisher": referral_attributes["publisher"],
-                    "title": title,
-                    "published": referral_attributes["published"],
-                    "referral_url": referral_attributes["url"],
-                },
-            )
-        # cleanup stale citations
-        models.DataciteReferral.objects.filter(
-            content_type=content_type, object_id=referrable.id
-        ).exclude(pid__in=[ref[0] for ref in referrals_pids]).delete()
-        referrable.save(update_fields=["citation_count"])
+    # Explicit refresh of single referrable does not rely on fingerprint.
+    refresh.ReferralsRefresher([referrable], force=True).run()
 
 
 @shared_task
@@ -1,9 +1,16 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import mock
 
 import requests
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import test
 
-from waldur_pid import backend
+from waldur_core.core import utils as core_utils
+from waldur_pid import backend, models, tasks
 from waldur_pid.tests import factories
 
 
@@ -59,3 +66,200 @@ class DataciteTest(test.APITransactionTestCase):
 
         self.backend.update_doi(self.offering)
         self.mock_logger.error.assert_called_once()
+
+
+class DataciteStubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        doi = self.path.lstrip("/")
+        self.server.requests.append(doi)
+        data = self.server.records.get(doi)
+        if data is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        if isinstance(data, bytes):
+            body = data
+        else:
+            body = json.dumps({"data": {"id": doi, "attributes": data}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.api+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DataciteStubServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), DataciteStubHandler)
+        self.records = {}
+        self.requests = []
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+
+def get_referrable_data(citation_count, *referrals):
+    return {
+        "citationCount": citation_count,
+        "relatedIdentifiers": [
+            {
+                "relatedIdentifier": pid,
+                "relationType": "IsCitedBy",
+                "resourceTypeGeneral": "Text",
+            }
+            for pid in referrals
+        ],
+    }
+
+
+def get_referral_data(title):
+    return {
+        "titles": [{"title": title}],
+        "creators": [{"name": "Creator"}],
+        "publisher": "Publisher",
+        "published": "2024",
+        "url": "https://example.com/paper",
+    }
+
+
+class ReferralsRefreshTest(test.APITransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = DataciteStubServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings_patcher = override_settings(
+            WALDUR_PID={"DATACITE": {"API_URL": self.server.url}}
+        )
+        settings_patcher.enable()
+        self.addCleanup(settings_patcher.disable)
+
+        self.offerings = [
+            factories.OfferingFactory(datacite_doi=f"10.1234/offering-{i}")
+            for i in range(3)
+        ]
+        for i, offering in enumerate(self.offerings):
+            self.server.records[offering.datacite_doi] = get_referrable_data(
+                i, "10.1234/paper-1", "10.1234/paper-2"
+            )
+        self.server.records["10.1234/paper-1"] = get_referral_data("Paper 1")
+        self.server.records["10.1234/paper-2"] = get_referral_data("Paper 2")
+
+    def get_referrals(self, offering):
+        return models.DataciteReferral.objects.filter(object_id=offering.id)
+
+    def test_referrals_are_created_and_every_doi_is_fetched_once(self):
+        tasks.update_all_referrables()
+
+        for i, offering in enumerate(self.offerings):
+            offering.refresh_from_db()
+            self.assertEqual(offering.citation_count, i)
+            self.assertEqual(
+                set(self.get_referrals(offering).values_list("title", flat=True)),
+                {"Paper 1", "Paper 2"},
+            )
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(len(set(self.server.requests)), 5)
+
+    def test_unchanged_metadata_is_not_written(self):
+        tasks.update_all_referrables()
+        self.server.requests.clear()
+
+        with CaptureQueriesContext(connection) as context:
+            tasks.update_all_referrables()
+
+        self.assertEqual(
+            sorted(self.server.requests),
+            sorted(offering.datacite_doi for offering in self.offerings),
+        )
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+            ]
+        )
+
+    def test_changed_metadata_updates_and_deletes_referrals(self):
+        tasks.update_all_referrables()
+        offering = self.offerings[0]
+        self.server.records[offering.datacite_doi] = get_referrable_data(
+            10, "10.1234/paper-1"
+        )
+        self.server.records["10.1234/paper-1"] = get_referral_data("New title")
+
+        tasks.update_all_referrables()
+
+        offering.refresh_from_db()
+        self.assertEqual(offering.citation_count, 10)
+        self.assertEqual(
+            list(self.get_referrals(offering).values_list("pid", "title")),
+            [("10.1234/paper-1", "New title")],
+        )
+        # Fingerprints of other offerings have not changed.
+        self.assertEqual(
+            self.get_referrals(self.offerings[1]).get(pid="10.1234/paper-1").title,
+            "Paper 1",
+        )
+
+    def test_failed_referral_lookup_is_retried(self):
+        del self.server.records["10.1234/paper-2"]
+        tasks.update_all_referrables()
+        offering = self.offerings[0]
+        self.assertEqual(self.get_referrals(offering).count(), 1)
+        self.assertFalse(models.DataciteFingerprint.objects.exists())
+
+        self.server.records["10.1234/paper-2"] = get_referral_data("Paper 2")
+        tasks.update_all_referrables()
+        self.assertEqual(self.get_referrals(offering).count(), 2)
+        self.assertEqual(models.DataciteFingerprint.objects.count(), 3)
+
+    def test_malformed_referrables_do_not_prevent_refresh_of_others(self):
+        self.server.records[self.offerings[0].datacite_doi] = b"<html></html>"
+        del self.server.records[self.offerings[1].datacite_doi]["citationCount"]
+
+        tasks.update_all_referrables()
+
+        for offering in self.offerings[:2]:
+            offering.refresh_from_db()
+            self.assertEqual(offering.citation_count, -1)
+            self.assertFalse(self.get_referrals(offering).exists())
+        self.assertEqual(self.get_referrals(self.offerings[2]).count(), 2)
+        self.assertEqual(
+            list(models.DataciteFingerprint.objects.values_list("doi", flat=True)),
+            [self.offerings[2].datacite_doi],
+        )
+
+    def test_malformed_referral_is_skipped_and_retried(self):
+        del self.server.records["10.1234/paper-2"]["publisher"]
+
+        tasks.update_all_referrables()
+
+        offering = self.offerings[0]
+        self.assertEqual(
+            list(self.get_referrals(offering).values_list("title", flat=True)),
+            ["Paper 1"],
+        )
+        self.assertFalse(models.DataciteFingerprint.objects.exists())
+
+    def test_single_referrable_is_refreshed_even_if_fingerprint_is_same(self):
+        tasks.update_all_referrables()
+        offering = self.offerings[0]
+        self.get_referrals(offering).update(title="Stale")
+        self.server.requests.clear()
+
+        tasks.update_referrable(core_utils.serialize_instance(offering))
+
+        self.assertEqual(
+            set(self.get_referrals(offering).values_list("title", flat=True)),
+            {"Paper 1", "Paper 2"},
+        )
+        self.assertEqual(len(self.server.requests), 3)
@@ -1,16 +1,18 @@
 import io
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import parse_qs, urlparse
 
 import requests
+from django.conf import settings as django_settings
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from django.utils.functional import cached_property
 
 from waldur_core.core import models as core_models
 from waldur_core.core import utils as core_utils
-from waldur_core.media.utils import guess_image_extension
+from waldur_core.media.utils import get_image_hash, guess_image_extension
 from waldur_core.structure.backend import ServiceBackend
 from waldur_core.structure.models import ServiceSettings
 from waldur_core.structure.registry import get_resource_type
@@ -805,44 +807,96 @@ class RancherBackend(ServiceBackend):
             settings=self.settings,
         )
 
-    def _get_external_template_icon(self, icon_url):
+    @cached_property
+    def external_icon_session(self):
+        return requests.Session()
+
+    def _get_external_template_icon(self, icon_url, validators=None):
         try:
-            response = requests.get(icon_url, timeout=3)
+            return client.get_icon(
+                self.external_icon_session, icon_url, validators, timeout=3
+            )
         except requests.RequestException as e:
             logger.debug(f"Failed to get {icon_url}: {e}")
             return None
 
-        status_code = response.status_code
-        if status_code == requests.codes.ok:  # only care about the positive case
-            return response.content
-        else:
+    def _fetch_template_icon(self, template):
+        """
+        Fetch icon of the template either from Rancher or from external icon URL.
+        Returns None if icon could not be fetched because of network error.
+        """
+        try:
+            response = self.client.get_template_icon(
+                template.backend_id, template.icon_validators
+            )
+        except RancherException as e:
+            logger.debug(f"Failed to get icon for template {template.backend_id}: {e}")
             return None
+        if (
+            not response.content
+            and not response.not_modified
+            and template.icon_url
+            and not urlparse(template.icon_url).netloc == urlparse(self.host).netloc
+        ):
+            # try to download icon from the icon_url field
+            logger.debug(
+                "Rancher did not return icon for a Template, trying with external URL"
+            )
+            response = self._get_external_template_icon(
+                template.icon_url, template.icon_validators
+            )
+        return response
 
-    def pull_template_icons(self):
-        for template in models.Template.objects.filter(settings=self.settings):
-            content = self.client.get_template_icon(template.backend_id)
-            if (
-                not content
-                and template.icon_url
-                and not urlparse(template.icon_url).netloc == urlparse(self.host).netloc
-            ):
-                # try to download icon from the icon_url field
-                logger.debug(
-                    "Rancher did not return icon for a Template, trying with external URL"
-                )
-                content = self._get_external_template_icon(template.icon_url)
-            if not content:
+    def _update_template_icon(self, template, response):
+        if response is None or response.not_modified:
+            return
+
+        if not response.content:
+            if template.icon or template.icon_hash:
                 # Clear icon field so that default icon would be rendered
                 template.icon = None
-                template.save()
-                continue
-            extension = guess_image_extension(content)
-            if not extension:
-                continue
-            # Overwrite existing file
-            if template.icon:
-                template.icon.delete()
-            template.icon.save(f"{template.uuid}.{extension}", io.BytesIO(content))
+                template.icon_hash = ""
+                template.icon_validators = {}
+                template.save(update_fields=["icon", "icon_hash", "icon_validators"])
+            return
+
+        validators = {
+            "url": response.url,
+            "etag": response.etag,
+            "last_modified": response.last_modified,
+        }
+        content_hash = get_image_hash(response.content)
+        if template.icon and template.icon_hash == content_hash:
+            # Content is the same, so only validators may need to be refreshed
+            if template.icon_validators != validators:
+                template.icon_validators = validators
+                template.save(update_fields=["icon_validators"])
+            return
+
+        extension = guess_image_extension(response.content)
+        if not extension:
+            return
+        # Overwrite existing file
+        if template.icon:
+            template.icon.delete(save=False)
+        template.icon_hash = content_hash
+        template.icon_validators = validators
+        template.icon.save(f"{template.uuid}.{extension}", io.BytesIO(response.content))
+
+    def pull_template_icons(self):
+        """
+        Icons are fetched concurrently using conditional requests,
+        whereas database and storage are updated in the current thread
+        only if content of the icon has actually changed.
+        """
+        templates = list(models.Template.objects.filter(settings=self.settings))
+        max_workers = django_settings.WALDUR_RANCHER["ICON_SYNC_WORKERS"]
+        # Shared sessions are initialized before worker threads start using them
+        _ = self.client, self.external_icon_session
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = executor.map(self._fetch_template_icon, templates)
+            for template, response in zip(templates, responses):
+                self._update_template_icon(template, response)
 
     def list_project_secrets(self, project):
         return self.client.list_project_secrets(project.backend_id)
@@ -1,4 +1,5 @@
 import logging
+from typing import NamedTuple
 
 import requests
 
@@ -9,6 +10,50 @@ from .exceptions import NotFound, RancherException
 logger = logging.getLogger(__name__)
 
 
+class IconResponse(NamedTuple):
+    url: str
+    content: bytes | None = None
+    etag: str = ""
+    last_modified: str = ""
+    not_modified: bool = False
+
+
+def get_icon(session, url, validators=None, **kwargs):
+    """
+    Fetch icon using conditional request if validators of previous response
+    for the same URL are known.
+
+    :param validators: dictionary with url, etag and last_modified keys
+    :rtype: IconResponse
+    """
+    headers = {}
+    if validators and validators.get("url") == url:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = session.get(url, headers=headers, **kwargs)
+
+    if response.status_code == requests.codes.not_modified:
+        return IconResponse(
+            url=url,
+            etag=validators.get("etag", ""),
+            last_modified=validators.get("last_modified", ""),
+            not_modified=True,
+        )
+
+    if response.status_code != requests.codes.ok or not response.content:
+        return IconResponse(url=url)
+
+    return IconResponse(
+        url=url,
+        content=response.content,
+        etag=response.headers.get("ETag", ""),
+        last_modified=response.headers.get("Last-Modified", ""),
+    )
+
+
 class RancherClient:
     """
     Rancher API client.
@@ -348,8 +393,12 @@ class RancherClient:
             params["clusterId"] = cluster_id
         return self._get("templates", params=params)["data"]
 
-    def get_template_icon(self, template_id):
-        return self._get(f"templates/{template_id}/icon")
+    def get_template_icon(self, template_id, validators=None):
+        url = f"{self._base_url}/templates/{template_id}/icon"
+        try:
+            return get_icon(self._session, url, validators)
+        except requests.RequestException as e:
+            raise RancherException(e)
 
     def get_template_version_details(self, template_id, template_version):
         return self._get(f"templateVersions/{template_id}-{template_version}")
@@ -24,6 +24,7 @@ class RancherExtension(WaldurExtension):
             "DISABLE_AUTOMANAGEMENT_OF_USERS": False,
             "DISABLE_SSH_KEY_INJECTION": False,
             "DISABLE_DATA_VOLUME_CREATION": False,
+            "ICON_SYNC_WORKERS": 8,
         }
 
     @staticmethod
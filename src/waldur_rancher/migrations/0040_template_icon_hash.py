@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("waldur_rancher", "0039_cluster_tenant"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="template",
+            name="icon_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="template",
+            name="icon_validators",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
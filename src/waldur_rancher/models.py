@@ -326,6 +326,9 @@ class Template(
     default_version = models.CharField(max_length=255)
     versions = ArrayField(models.CharField(max_length=255))
     icon = models.FileField(upload_to="rancher_icons", blank=True, null=True)
+    icon_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # HTTP validators (url, etag, last_modified) of the response icon was fetched from
+    icon_validators = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.name
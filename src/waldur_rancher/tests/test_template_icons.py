@@ -0,0 +1,83 @@
+import io
+from unittest import mock
+
+from PIL import Image
+from rest_framework import test
+
+from waldur_rancher.backend import RancherBackend
+from waldur_rancher.client import IconResponse
+
+from . import factories, fixtures
+
+
+def get_png(color):
+    content = io.BytesIO()
+    Image.new("RGB", (1, 1), color).save(content, format="PNG")
+    return content.getvalue()
+
+
+@mock.patch("waldur_rancher.backend.RancherBackend.client")
+class TemplateIconsPullTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.RancherFixture()
+        self.template = factories.TemplateFactory(settings=self.fixture.settings)
+        self.backend = RancherBackend(self.fixture.settings)
+        self.url = (
+            f"https://rancher.example.com/v3/templates/{self.template.backend_id}/icon"
+        )
+
+    def pull(self, mock_client, response):
+        mock_client.get_template_icon.return_value = response
+        self.backend.pull_template_icons()
+        self.template.refresh_from_db()
+
+    def test_icon_is_saved_with_hash_and_validators(self, mock_client):
+        self.pull(
+            mock_client,
+            IconResponse(url=self.url, content=get_png("red"), etag='"v1"'),
+        )
+
+        self.assertTrue(self.template.icon)
+        self.assertEqual(len(self.template.icon_hash), 64)
+        self.assertEqual(self.template.icon_validators["etag"], '"v1"')
+
+    def test_validators_are_passed_to_client(self, mock_client):
+        validators = {"url": self.url, "etag": '"v1"', "last_modified": ""}
+        self.template.icon_validators = validators
+        self.template.save()
+
+        self.pull(mock_client, IconResponse(url=self.url, not_modified=True))
+
+        mock_client.get_template_icon.assert_called_once_with(
+            self.template.backend_id, validators
+        )
+
+    def test_storage_is_not_rewritten_if_content_is_unchanged(self, mock_client):
+        content = get_png("red")
+        self.pull(mock_client, IconResponse(url=self.url, content=content))
+        icon_name = self.template.icon.name
+
+        with mock.patch("django.db.models.fields.files.FieldFile.save") as save:
+            self.pull(
+                mock_client, IconResponse(url=self.url, content=content, etag='"v2"')
+            )
+            save.assert_not_called()
+
+        self.assertEqual(self.template.icon.name, icon_name)
+        self.assertEqual(self.template.icon_validators["etag"], '"v2"')
+
+    def test_storage_is_rewritten_if_content_is_changed(self, mock_client):
+        self.pull(mock_client, IconResponse(url=self.url, content=get_png("red")))
+        old_hash = self.template.icon_hash
+
+        self.pull(mock_client, IconResponse(url=self.url, content=get_png("blue")))
+
+        self.assertNotEqual(self.template.icon_hash, old_hash)
+
+    def test_icon_is_cleared_if_it_is_not_available(self, mock_client):
+        self.pull(mock_client, IconResponse(url=self.url, content=get_png("red")))
+
+        self.pull(mock_client, IconResponse(url=self.url))
+
+        self.assertFalse(self.template.icon)
+        self.assertEqual(self.template.icon_hash, "")